@@ -0,0 +1,56 @@
+from typing import List, Dict, Optional, Any, Literal
+from pydantic import BaseModel, Field
+
+
+class ChatRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    deadline_seconds: Optional[float] = Field(None, gt=0, description="Time budget for the turn (default CHAT_DEADLINE_SECONDS)")
+
+
+class ChatResponse(BaseModel):
+    response: str
+    conversation_id: Optional[int] = None
+    metadata: Dict[str, Any] = {}
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    k: int = Field(4, ge=1, le=50)
+
+
+class SearchHit(BaseModel):
+    content: str
+    page: Optional[int] = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    document: Optional[str] = None
+    results: List[SearchHit]
+
+
+class FeedbackRequest(BaseModel):
+    conversation_id: int = Field(..., ge=0)
+    feedback: Literal["positive", "negative"]
+
+
+class IngestResponse(BaseModel):
+    success: bool
+    filename: Optional[str] = None
+    pages: Optional[int] = None
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+
+
+class HistoryItem(BaseModel):
+    conversation_id: int
+    timestamp: str
+    query: str
+    response: str
+    tools_used: List[str]
+    feedback: Optional[str] = None
+
+
+class HistoryResponse(BaseModel):
+    items: List[HistoryItem]
+    next_before: Optional[int] = Field(None, description="Pass as `before` to fetch the previous page")
@@ -0,0 +1,228 @@
+"""
+Headless JSON API over AgenticRAG
+=================================
+
+Lean HTTP interface for integrations, next to the Gradio UI:
+
+    POST /chat            JSON answer with metadata
+    POST /chat/stream     server-sent events: start, llm_start/llm_end,
+                          tool_start/tool_end, answer, done
+    POST /ingest          multipart PDF upload
+    POST /search          raw document search (no agent)
+    POST /feedback        thumbs up/down for a conversation
+    GET  /history         paged interaction history
+    GET  /health, /ready, /status
+
+Run with `python -m backend.api.server` (API_HOST/API_PORT). Handlers are
+async; blocking work runs on a thread pool sized by API_THREADS.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, AsyncIterator, TYPE_CHECKING
+
+import orjson
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.api.schemas import (
+    ChatRequest, ChatResponse, SearchRequest, SearchResponse, FeedbackRequest,
+    IngestResponse, HistoryItem, HistoryResponse
+)
+from backend.services.logger import logger
+from backend.services import metrics
+from backend.config.settings import settings
+
+if TYPE_CHECKING:
+    from backend.services.agentic_rag import AgenticRAG
+
+
+_rag_system: Optional["AgenticRAG"] = None
+_rag_error: Optional[BaseException] = None
+_rag_ready = threading.Event()
+
+
+def _warm_up():
+    global _rag_system, _rag_error
+    try:
+        from backend.services.agentic_rag import AgenticRAG
+        _rag_system = AgenticRAG()
+        logger.info("🔌 API ready")
+    except BaseException as e:
+        _rag_error = e
+        logger.error(f"API warm-up failed: {e}")
+    finally:
+        _rag_ready.set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.api_threads
+    # Bind the port first; /ready reports when the system can take requests
+    threading.Thread(target=_warm_up, name="api-warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Agentic RAG API", version="1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+
+def get_rag() -> "AgenticRAG":
+    if not _rag_ready.is_set():
+        raise HTTPException(status_code=503, detail="System is warming up")
+    if _rag_error is not None:
+        raise HTTPException(status_code=503, detail=f"System failed to start: {_rag_error}")
+    return _rag_system
+
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, default=str) + b"\n\n"
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Health
+# ═══════════════════════════════════════════════════════════════════
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    get_rag()
+    return {"status": "ready", "in_flight": metrics.requests_in_flight()}
+
+
+@app.get("/status")
+async def status():
+    # May reload the index from disk and takes the history lock: off the event loop
+    return await run_in_threadpool(get_rag().get_system_status)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Chat
+# ═══════════════════════════════════════════════════════════════════
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    rag = get_rag()
+    result = await run_in_threadpool(rag.chat, request.query, request.deadline_seconds)
+    return ChatResponse(**result)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    rag = get_rag()
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: str, data: Dict[str, Any]):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    task = asyncio.ensure_future(run_in_threadpool(rag.chat, request.query, request.deadline_seconds, on_event))
+
+    async def stream() -> AsyncIterator[bytes]:
+        yield _sse("start", {"query": request.query})
+        while not task.done():
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield _sse(*getter.result())
+            else:
+                getter.cancel()
+        while not events.empty():
+            yield _sse(*events.get_nowait())
+
+        try:
+            result = task.result()
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+        else:
+            yield _sse("answer", result)
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Documents
+# ═══════════════════════════════════════════════════════════════════
+
+@app.post("/ingest", response_model=IngestResponse)
+async def ingest(file: UploadFile = File(...)):
+    rag = get_rag()
+    filename = Path(file.filename or "upload.pdf").name
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=415, detail="Only PDF files are supported")
+
+    with tempfile.TemporaryDirectory(prefix="ingest_") as workdir:
+        path = Path(workdir) / filename
+        with open(path, "wb") as out:
+            while chunk := await file.read(1024 * 1024):
+                out.write(chunk)
+        result = await run_in_threadpool(rag.process_pdf, str(path))
+
+    if not result.get("success"):
+        return ORJSONResponse(IngestResponse(**result).model_dump(), status_code=422)
+    return IngestResponse(**result)
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    rag = get_rag()
+    await run_in_threadpool(rag.sync_index)
+    if not rag.vectorstore:
+        raise HTTPException(status_code=409, detail="No document has been uploaded yet")
+    results = await run_in_threadpool(rag.search_documents, request.query, request.k)
+    return SearchResponse(document=rag.document_metadata.get("filename"), results=results)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Feedback and history
+# ═══════════════════════════════════════════════════════════════════
+
+@app.post("/feedback")
+async def feedback(request: FeedbackRequest):
+    rag = get_rag()
+    total = await run_in_threadpool(lambda: rag.memory_manager.total_interactions)
+    if request.conversation_id >= total:
+        raise HTTPException(status_code=404, detail="Unknown conversation_id")
+    await run_in_threadpool(rag.add_feedback, request.conversation_id, request.feedback)
+    return {"conversation_id": request.conversation_id, "feedback": request.feedback}
+
+
+@app.get("/history", response_model=HistoryResponse)
+async def history(before: Optional[int] = Query(None, ge=0), limit: int = Query(20, ge=1, le=200)):
+    rag = get_rag()
+    page = await run_in_threadpool(rag.get_history_page, before, limit)
+    items = [
+        HistoryItem(
+            conversation_id=index,
+            timestamp=interaction.timestamp,
+            query=interaction.query,
+            response=interaction.response,
+            tools_used=interaction.tools_used,
+            feedback=interaction.feedback
+        )
+        for index, interaction in page
+    ]
+    next_before = page[0][0] if page and page[0][0] > 0 else None
+    return HistoryResponse(items=items, next_before=next_before)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    metrics.start_metrics_server(settings.metrics_port)
+    uvicorn.run(app, host=settings.api_host, port=settings.api_port, log_level="info")
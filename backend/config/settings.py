@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Dict
 
 class Settings:
     """Application settings and configuration."""
@@ -7,10 +7,149 @@ class Settings:
     def __init__(self):
         self.openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
         self.tavily_api_key: Optional[str] = os.getenv("TAVILY_API_KEY")
+        self.openai_base_url: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
         # self.frontend_host: str = os.getenv("FRONTEND_HOST", "0.0.0.0")
         # self.frontend_port: int = int(os.getenv("FRONTEND_PORT", "7819"))
         self.model_name: str = os.getenv("MODEL_NAME", "gpt-4")
+
+        # Model backends: openai | record | replay | fake (record/replay use RECORDING_PATH); embeddings also: local
+        self.llm_backend: str = os.getenv("LLM_BACKEND", "openai")
+        self.embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "openai")
+        self.recording_path: str = os.getenv("RECORDING_PATH", "recordings")
+        self.fake_llm_latency: str = os.getenv("FAKE_LLM_LATENCY", "none")
+        self.fake_embedding_latency: str = os.getenv("FAKE_EMBEDDING_LATENCY", "none")
+
         self.temperature: float = float(os.getenv("TEMPERATURE", "0.3"))
 
+        # Embedding models. Each model gets its own index namespace under INDEX_PATH.
+        # LOCAL_EMBEDDING_MODEL is a sentence-transformers model (optional dependency) or "hash"
+        self.openai_embedding_model: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+        self.local_embedding_model: str = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.local_embedding_device: str = os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu")
+        self.local_embedding_batch_size: int = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+        self.local_embedding_dimensions: int = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "1024"))
+        self.embedding_workers: int = int(os.getenv("EMBEDDING_WORKERS", str(os.cpu_count() or 1)))
+
+        # Ingest embedding scheduler for rate-limited APIs: concurrent batches under request/token
+        # per-minute limits, adaptive batch size, 429 backoff, resumable checkpoints.
+        # EMBEDDING_SCHEDULER: auto (on for openai/record) | on | off
+        self.embedding_scheduler: str = os.getenv("EMBEDDING_SCHEDULER", "auto").lower()
+        self.embedding_rpm: float = float(os.getenv("EMBEDDING_RPM", "3000"))
+        self.embedding_tpm: float = float(os.getenv("EMBEDDING_TPM", "1000000"))
+        self.embedding_max_in_flight: int = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "4"))
+        self.embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        self.embedding_max_batch_size: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "512"))
+        self.embedding_max_batch_tokens: int = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "200000"))
+        self.embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+        self.embedding_checkpoint_path: str = os.getenv("EMBEDDING_CHECKPOINT_PATH", "memory_store/embedding_checkpoints")
+
+        # Pooled HTTP connections shared by all OpenAI chat/embedding calls
+        self.openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+        self.openai_max_keepalive: int = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+
+        # Agent loop: "react" (text Thought/Action parsing) or "tools" (native tool calling)
+        self.agent_mode: str = os.getenv("AGENT_MODE", "react").lower()
+
+        # Time budgets: whole chat turn, each LLM call, each tool call (seconds)
+        self.chat_deadline: float = float(os.getenv("CHAT_DEADLINE_SECONDS", "90"))
+        self.llm_call_timeout: float = float(os.getenv("LLM_CALL_TIMEOUT", "30"))
+        self.llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.llm_hedge_quantile: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0"))
+        self.tool_timeout: float = float(os.getenv("TOOL_TIMEOUT", "20"))
+
+        # Tool execution: each tool runs in its own bounded pool behind a circuit breaker.
+        # TOOL_POLICIES overrides timeout/concurrency per tool as "ToolName:timeout:concurrency" pairs
+        self.tool_concurrency: int = int(os.getenv("TOOL_CONCURRENCY", "8"))
+        self.tool_policies: Dict[str, Dict[str, float]] = {
+            name.strip(): {"timeout": float(timeout), "concurrency": int(concurrency)}
+            for name, timeout, concurrency in (item.split(":") for item in os.getenv("TOOL_POLICIES", "WebSearch:15:4,Wikipedia:15:4").split(",") if item.strip())
+        }
+        self.tool_breaker_failures: int = int(os.getenv("TOOL_BREAKER_FAILURES", "5"))
+        self.tool_breaker_reset: float = float(os.getenv("TOOL_BREAKER_RESET_SECONDS", "30"))
+
+        # Interaction history retention (hot tier in memory, older segments zstd-archived)
+        self.history_hot_limit: int = int(os.getenv("HISTORY_HOT_LIMIT", "500"))
+        self.history_segment_size: int = int(os.getenv("HISTORY_SEGMENT_SIZE", "200"))
+        self.history_retention_days: int = int(os.getenv("HISTORY_RETENTION_DAYS", "365"))
+        self.history_archive_max_mb: int = int(os.getenv("HISTORY_ARCHIVE_MAX_MB", "512"))
+        self.history_compression_level: int = int(os.getenv("HISTORY_COMPRESSION_LEVEL", "10"))
+        self.history_page_size: int = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+        self.history_tail_window: int = int(os.getenv("HISTORY_TAIL_WINDOW", "50"))
+        self.history_page_cache: int = int(os.getenv("HISTORY_PAGE_CACHE", "8"))
+
+        # Tool result cache ("ToolName:ttl_seconds" pairs; tools without a TTL are never cached)
+        self.tool_cache_ttls: Dict[str, float] = {
+            name.strip(): float(ttl)
+            for name, ttl in (item.split(":") for item in os.getenv("TOOL_CACHE_TTLS", "Wikipedia:86400,WebSearch:900").split(",") if item.strip())
+        }
+        self.tool_cache_max_entries: int = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1000"))
+        self.tool_cache_path: Optional[str] = os.getenv("TOOL_CACHE_PATH") or None
+
+        # Calculator tool: "process" evaluates in killable worker processes, "inline" in the calling thread
+        self.calculator_isolation: str = os.getenv("CALCULATOR_ISOLATION", "process").lower()
+        self.calculator_timeout: float = float(os.getenv("CALCULATOR_TIMEOUT", "2"))
+        self.calculator_workers: int = int(os.getenv("CALCULATOR_WORKERS", "2"))
+        self.calculator_max_digits: int = int(os.getenv("CALCULATOR_MAX_DIGITS", "1000"))
+        self.calculator_max_elements: int = int(os.getenv("CALCULATOR_MAX_ELEMENTS", "100000"))
+        self.calculator_memory_mb: int = int(os.getenv("CALCULATOR_MEMORY_MB", "1024"))
+
+        # Text analysis: blocks are counted across a process pool once an input passes the threshold
+        self.text_analysis_workers: int = int(os.getenv("TEXT_ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.text_analysis_block_chars: int = int(os.getenv("TEXT_ANALYSIS_BLOCK_CHARS", "262144"))
+        self.text_analysis_parallel_min_chars: int = int(os.getenv("TEXT_ANALYSIS_PARALLEL_MIN_CHARS", "1000000"))
+        self.text_stats_top_terms: int = int(os.getenv("TEXT_STATS_TOP_TERMS", "200"))
+
+        # Data formatter: output is cut to this many tokens (TOKEN_ENCODING via tiktoken, else ~4 chars/token)
+        self.data_formatter_token_budget: int = int(os.getenv("DATA_FORMATTER_TOKEN_BUDGET", "1500"))
+        self.data_formatter_max_cell_chars: int = int(os.getenv("DATA_FORMATTER_MAX_CELL_CHARS", "60"))
+        self.token_encoding: str = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+        # Speculative retrieval: search the document while the agent plans (opt-in)
+        self.speculative_retrieval: bool = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() in ("1", "true", "yes")
+        self.speculative_match_threshold: float = float(os.getenv("SPECULATIVE_MATCH_THRESHOLD", "0.6"))
+
+        # Query planning: split multi-part questions into concurrent sub-queries (opt-in)
+        self.query_planner: bool = os.getenv("QUERY_PLANNER", "false").lower() in ("1", "true", "yes")
+        self.query_planner_max_parts: int = int(os.getenv("QUERY_PLANNER_MAX_PARTS", "5"))
+        self.query_planner_workers: int = int(os.getenv("QUERY_PLANNER_WORKERS", "16"))
+
+        # Vector index shared by all workers (versioned, opened memory-mapped)
+        self.index_path: str = os.getenv("INDEX_PATH", "faiss_index")
+
+        # Gradio UI server (frontend/app.py)
+        self.ui_host: str = os.getenv("UI_HOST", "0.0.0.0")
+        self.ui_port: int = int(os.getenv("UI_PORT", "7819"))
+        self.ui_open_browser: bool = os.getenv("UI_OPEN_BROWSER", "true").lower() in ("1", "true", "yes")
+
+        # UI queue lanes ("lane:concurrency:max_waiting"); events outside a lane use the default limit
+        self.ui_lanes: Dict[str, Dict[str, int]] = {
+            name.strip(): {"concurrency": int(concurrency), "queue": int(queue)}
+            for name, concurrency, queue in (item.split(":") for item in os.getenv("UI_LANES", "chat:16:64,ingest:2:4,admin:2:8").split(",") if item.strip())
+        }
+        self.ui_queue_max_wait: float = float(os.getenv("UI_QUEUE_MAX_WAIT", "120"))
+        self.ui_default_concurrency: int = int(os.getenv("UI_DEFAULT_CONCURRENCY", "8"))
+
+        # Chat sessions kept server-side: turns sent per update, "Load Older" page size, limits
+        self.chat_window_turns: int = int(os.getenv("CHAT_WINDOW_TURNS", "20"))
+        self.chat_history_page: int = int(os.getenv("CHAT_HISTORY_PAGE", "20"))
+        self.chat_session_max_turns: int = int(os.getenv("CHAT_SESSION_MAX_TURNS", "500"))
+        self.chat_max_sessions: int = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+        self.chat_session_ttl: float = float(os.getenv("CHAT_SESSION_TTL", "3600"))
+
+        # Multi-worker launcher (start_services.py): N workers on consecutive ports
+        # behind a sticky TCP load balancer on UI_PORT/API_PORT
+        self.workers: int = int(os.getenv("WORKERS", "1"))
+        self.worker_base_port: int = int(os.getenv("WORKER_BASE_PORT", "7900"))
+        self.worker_health_interval: float = float(os.getenv("WORKER_HEALTH_INTERVAL", "2"))
+        self.worker_drain_timeout: float = float(os.getenv("WORKER_DRAIN_TIMEOUT", "120"))
+
+        # Headless JSON API (python -m backend.api.server)
+        self.api_host: str = os.getenv("API_HOST", "0.0.0.0")
+        self.api_port: int = int(os.getenv("API_PORT", "8000"))
+        self.api_threads: int = int(os.getenv("API_THREADS", "64"))
+
+        # Prometheus metrics endpoint (0 disables)
+        self.metrics_port: int = int(os.getenv("METRICS_PORT", "9464"))
+
 settings = Settings()
 
@@ -0,0 +1,177 @@
+from typing import List, Dict, Tuple, Optional, Iterable
+from datetime import datetime
+import numpy as np
+
+from backend.models.schemas import InteractionLog
+
+
+class InteractionRecord:
+    """Slotted, read-only view of one interaction for bulk history processing."""
+
+    __slots__ = ("index", "timestamp", "query", "response", "tools_used", "feedback", "num_steps")
+
+    def __init__(self, index: int, timestamp: str, query: str, response: str,
+                 tools_used: Tuple[str, ...], feedback: Optional[str], num_steps: int):
+        self.index = index
+        self.timestamp = timestamp
+        self.query = query
+        self.response = response
+        self.tools_used = tools_used
+        self.feedback = feedback
+        self.num_steps = num_steps
+
+    def __repr__(self) -> str:
+        return f"InteractionRecord(index={self.index}, timestamp={self.timestamp!r}, tools_used={self.tools_used!r}, feedback={self.feedback!r})"
+
+
+class CodeTable:
+    """Interns strings as small integer codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class InteractionColumns:
+    """
+    Compact columnar store for bulk interaction history.
+
+    Tool names are interned and stored as a per-row bitmask (up to 64 distinct
+    tools); feedback values are interned as int8 codes (-1 = no feedback).
+    Numeric columns are NumPy arrays so statistics run vectorized and
+    to_pandas() wraps them without per-row Python objects.
+    """
+
+    MAX_TOOLS = 64
+
+    def __init__(self, capacity: int = 1024, keep_text: bool = True):
+        self.keep_text = keep_text
+        self.tools = CodeTable()
+        self.feedback_values = CodeTable()
+        self._size = 0
+
+        capacity = max(capacity, 16)
+        self.index = np.empty(capacity, dtype=np.int64)
+        self.timestamp = np.empty(capacity, dtype="datetime64[us]")
+        self.tools_mask = np.empty(capacity, dtype=np.uint64)
+        self.feedback = np.empty(capacity, dtype=np.int8)
+        self.num_steps = np.empty(capacity, dtype=np.int16)
+        self.query_len = np.empty(capacity, dtype=np.int32)
+        self.response_len = np.empty(capacity, dtype=np.int32)
+
+        # Free text stays in plain lists; it is not interned
+        self.queries: List[str] = []
+        self.responses: List[str] = []
+
+    @classmethod
+    def from_history(cls, history: Iterable[Tuple[int, InteractionLog]], keep_text: bool = True) -> "InteractionColumns":
+        """Build columns from (global index, InteractionLog) pairs."""
+        columns = cls(keep_text=keep_text)
+        for index, interaction in history:
+            columns.append(index, interaction)
+        return columns
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, index: int, interaction: InteractionLog):
+        if self._size == len(self.index):
+            self._grow()
+
+        mask = 0
+        for tool in interaction.tools_used:
+            code = self.tools.code(tool)
+            if code >= self.MAX_TOOLS:
+                raise ValueError(f"InteractionColumns supports at most {self.MAX_TOOLS} distinct tools")
+            mask |= 1 << code
+
+        row = self._size
+        self.index[row] = index
+        self.timestamp[row] = np.datetime64(datetime.fromisoformat(interaction.timestamp), "us")
+        self.tools_mask[row] = mask
+        self.feedback[row] = self.feedback_values.code(interaction.feedback) if interaction.feedback else -1
+        self.num_steps[row] = min(len(interaction.agent_steps), np.iinfo(np.int16).max)
+        self.query_len[row] = len(interaction.query)
+        self.response_len[row] = len(interaction.response)
+        if self.keep_text:
+            self.queries.append(interaction.query)
+            self.responses.append(interaction.response)
+        self._size += 1
+
+    def record(self, row: int) -> InteractionRecord:
+        """Materialize a single row as a slotted record."""
+        if not 0 <= row < self._size:
+            raise IndexError("row out of range")
+        mask = int(self.tools_mask[row])
+        feedback_code = int(self.feedback[row])
+        return InteractionRecord(
+            index=int(self.index[row]),
+            timestamp=str(self.timestamp[row]),
+            query=self.queries[row] if self.keep_text else "",
+            response=self.responses[row] if self.keep_text else "",
+            tools_used=tuple(tool for code, tool in enumerate(self.tools.values) if mask >> code & 1),
+            feedback=self.feedback_values.values[feedback_code] if feedback_code >= 0 else None,
+            num_steps=int(self.num_steps[row])
+        )
+
+    def tool_column(self, tool: str) -> np.ndarray:
+        """Boolean array: which rows used the given tool."""
+        if tool not in self.tools._codes:
+            return np.zeros(self._size, dtype=bool)
+        bit = np.uint64(1 << self.tools._codes[tool])
+        return (self.tools_mask[:self._size] & bit) != 0
+
+    def tool_counts(self) -> Dict[str, int]:
+        """Number of interactions that used each tool."""
+        return {tool: int(np.count_nonzero(self.tool_column(tool))) for tool in self.tools.values}
+
+    def feedback_counts(self) -> Dict[str, int]:
+        """Number of interactions per feedback value (None = no feedback)."""
+        codes = self.feedback[:self._size].astype(np.int16) + 1
+        counts = np.bincount(codes, minlength=len(self.feedback_values) + 1)
+        result: Dict[str, int] = {value: int(counts[code + 1]) for code, value in enumerate(self.feedback_values.values)}
+        result[None] = int(counts[0])
+        return result
+
+    def to_pandas(self):
+        """
+        DataFrame over the columns. Numeric columns are passed as array views
+        (pandas makes at most one consolidation copy); feedback is a Categorical
+        built directly from the int8 codes; each tool becomes a boolean column.
+        """
+        import pandas as pd
+
+        n = self._size
+        data = {
+            "index": self.index[:n],
+            "timestamp": self.timestamp[:n],
+            "feedback": pd.Categorical.from_codes(self.feedback[:n], categories=list(self.feedback_values.values)),
+            "num_steps": self.num_steps[:n],
+            "query_len": self.query_len[:n],
+            "response_len": self.response_len[:n],
+        }
+        for tool in self.tools.values:
+            data[f"tool_{tool}"] = self.tool_column(tool)
+        if self.keep_text:
+            data["query"] = self.queries
+            data["response"] = self.responses
+        return pd.DataFrame(data, copy=False)
+
+    def _grow(self):
+        capacity = len(self.index) * 2
+        for name in ("index", "timestamp", "tools_mask", "feedback", "num_steps", "query_len", "response_len"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
@@ -12,3 +12,4 @@ class InteractionLog:
     tools_used: List[str]
     feedback: Optional[str] = None
     feedback_timestamp: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
@@ -1,39 +1,55 @@
-import json
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Tuple, TYPE_CHECKING
 from datetime import datetime
 from pathlib import Path
-from dataclasses import asdict
+import threading
 
 # LangChain imports - OLD STYLE (0.4.x)
-from langchain.agents import initialize_agent, AgentType
-from langchain_core.tools import Tool
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.memory import ConversationBufferMemory
-
-# Tool imports
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
+# Agents, loaders, FAISS and the Wikipedia/Tavily tools are imported where they
+# are first used, so importing this module (and starting the UI) stays fast.
+from langchain_core.tools import Tool, BaseTool
+from langchain_core.agents import AgentAction
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
 
 from backend.services.memory_manager import MemoryManager
+from backend.services.log_exporter import LogExporter
+from backend.services.tool_cache import ToolResultCache
+from backend.services.tracing import Trace, start_trace, span, event_listener, trace_callback_handler
+from backend.services import metrics
+from backend.services.deadline import DeadlineExceeded, deadline_scope, current_deadline
+from backend.services.tool_executor import ToolExecutor, ToolPolicy, ToolUnavailable
+from backend.services.single_flight import SingleFlight
+from backend.services.speculative_retrieval import SpeculativeRetrieval
+from backend.services.query_planner import QueryPlanner
+from backend.services.shared_index import SharedIndex
+from backend.services.resilient_llm import ResilientChatModel
+from backend.services.model_backends import TimedEmbeddings, create_chat_model, create_embeddings
 from backend.services.tool_data_formater import DataFormatterTool
 from backend.services.tool_document_search import DocumentSearchTool
 from backend.services.tool_text_analysis import TextAnalysisTool
 from backend.services.tool_python_calculator import PythonCalculatorTool
 from backend.services.logger import logger
 from backend.models.schemas import InteractionLog
+from backend.models.columnar import InteractionColumns
 from backend.config.settings import settings
 
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
 
-# Tavily Search (replaces SerpAPI)
-try:
-    from langchain_community.tools.tavily_search import TavilySearchResults
-    TAVILY_AVAILABLE = True
-except ImportError:
-    TAVILY_AVAILABLE = False
-    print("Tavily not available. Install: pip install tavily-python")
+
+TOOL_CALLING_SYSTEM_PROMPT = """You are a helpful assistant with access to tools.
+Answer general questions (facts, concepts, explanations, comparisons) yourself without calling a tool.
+Use DocumentSearch only when the user refers to the uploaded document, Calculator for arithmetic,
+TextAnalysis or DataFormatter only when explicitly asked, WebSearch only for current/latest information,
+and Wikipedia only when the user asks for it.
+When a question has independent parts, request all the tools you need in the same turn."""
+
+
+# TavilySearchResults catches its own exceptions and returns repr(e) as the
+# result (results are a list), so failures would never reach the breaker
+TOOL_ERROR_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "WebSearch": lambda result: isinstance(result, str),
+}
 
 
 class AgenticRAG:
@@ -43,26 +59,97 @@ class AgenticRAG:
     Uses: AgentType.ZERO_SHOT_REACT_DESCRIPTION
     """
 
-    def __init__(self, memory_path: str = "memory_store"):
-        """Initialize the Agentic RAG System."""
+    def __init__(
+        self,
+        memory_path: str = "memory_store",
+        llm: Optional[BaseChatModel] = None,
+        embeddings: Optional[Embeddings] = None
+    ):
+        """
+        Initialize the Agentic RAG System.
+        llm/embeddings override the LLM_BACKEND/EMBEDDING_BACKEND models (e.g. fakes for load tests).
+        """
         logger.info("🚀 Initializing Agentic RAG System with initialize_agent()...")
 
 
-        self.llm = ChatOpenAI(model=settings.model_name, temperature=settings.temperature,api_key=settings.openai_api_key)
-        self.embeddings = OpenAIEmbeddings()
-        self.vectorstore: Optional[FAISS] = None
+        # Retries/timeouts are handled by the wrapper, bounded by each request's deadline
+        self.llm = ResilientChatModel(
+            inner=llm or create_chat_model(),
+            call_timeout=settings.llm_call_timeout,
+            max_retries=settings.llm_max_retries,
+            hedge_quantile=settings.llm_hedge_quantile,
+            callbacks=[trace_callback_handler]
+        )
+        self.embeddings = TimedEmbeddings(embeddings or create_embeddings())
+        self.vectorstore: Optional["FAISS"] = None
         self.document_metadata: Dict[str, Any] = {}
 
+        # Published index version currently loaded; part of the request coalescing key.
+        # Workers sharing INDEX_PATH pick up each other's ingests; every embedding
+        # model has its own namespace directory so vector spaces never mix.
+        self.shared_index = SharedIndex(str(Path(settings.index_path) / self.embeddings.namespace))
+        if (Path(settings.index_path) / SharedIndex.POINTER_NAME).exists():
+            logger.warning(f"⚠️ {settings.index_path}/ holds an index from before per-model namespaces; re-upload the document to use it")
+        self.index_version = 0
+        self._index_lock = threading.Lock()
+
+        # Rate-limited embedding APIs: ingest goes through the scheduler (local/fake embed in one call)
+        self.embedding_scheduler = None
+        if settings.embedding_scheduler == "on" or (settings.embedding_scheduler == "auto" and settings.embedding_backend in ("openai", "record")):
+            from backend.services.embedding_scheduler import EmbeddingScheduler
+            self.embedding_scheduler = EmbeddingScheduler(
+                self.embeddings,
+                namespace=self.embeddings.namespace,
+                requests_per_minute=settings.embedding_rpm,
+                tokens_per_minute=settings.embedding_tpm,
+                max_in_flight=settings.embedding_max_in_flight,
+                batch_size=settings.embedding_batch_size,
+                max_batch_size=settings.embedding_max_batch_size,
+                max_batch_tokens=settings.embedding_max_batch_tokens,
+                max_retries=settings.embedding_max_retries,
+                checkpoint_path=settings.embedding_checkpoint_path
+            )
+        self.single_flight = SingleFlight()
+
         # Memory manager
         self.memory_manager = MemoryManager(memory_path)
+        self.log_exporter = LogExporter(self.memory_manager)
+
+        # Gauges are read lazily on every scrape
+        metrics.INDEX_SIZE.set_function(lambda: self.vectorstore.index.ntotal if self.vectorstore else 0)
+        metrics.HISTORY_SIZE.labels(tier="hot").set_function(lambda: len(self.memory_manager.interaction_history))
+        metrics.HISTORY_SIZE.labels(tier="total").set_function(lambda: self.memory_manager.total_interactions)
+
+
+        # Shared result cache for slow external tools
+        self.tool_cache = ToolResultCache(
+            ttls=settings.tool_cache_ttls,
+            max_entries=settings.tool_cache_max_entries,
+            persist_path=settings.tool_cache_path
+        )
 
+        # Every tool call runs in that tool's own pool, with its timeout and circuit breaker
+        self.tool_executor = ToolExecutor(
+            default=ToolPolicy(settings.tool_timeout, settings.tool_concurrency, settings.tool_breaker_failures, settings.tool_breaker_reset),
+            overrides={
+                name: ToolPolicy(policy["timeout"], policy["concurrency"], settings.tool_breaker_failures, settings.tool_breaker_reset)
+                for name, policy in settings.tool_policies.items()
+            }
+        )
 
         # Custom tool instances
         self.doc_search_tool = DocumentSearchTool()
-        self.calculator_tool = PythonCalculatorTool()
+        self.speculative_retrieval = SpeculativeRetrieval(
+            self.doc_search_tool.search,
+            threshold=settings.speculative_match_threshold
+        )
         self.text_analysis_tool = TextAnalysisTool()
+        self.sync_index()
+        self.calculator_tool = PythonCalculatorTool()
         self.data_formatter_tool = DataFormatterTool()
 
+        from langchain.memory import ConversationBufferMemory
+
          # Conversation memory for agent (maintains context across tools)
         self.agent_memory = ConversationBufferMemory(
             memory_key="chat_history",
@@ -85,7 +172,7 @@ class AgenticRAG:
     def _load_recent_conversations_to_memory(self):
         """Load recent conversations from MemoryManager into agent memory."""
         # Get last 10 interactions
-        recent = self.memory_manager.interaction_history[-10:]
+        recent = self.memory_manager.get_recent(10)
         
         for interaction in recent:
             # Save to agent memory
@@ -101,13 +188,24 @@ class AgenticRAG:
     def _initialize_agent(self):
         """Initialize agent using OLD initialize_agent method."""
         logger.info("Initializing agent with initialize_agent()...")
+        from langchain.agents import initialize_agent, AgentType
         
         # Create tool list
         tools = self._create_tools()
+        # Batched searches share DocumentSearch's timeout, breaker and metrics
+        search_runner = self.tool_executor.runners["DocumentSearch"]
+        self.query_planner = QueryPlanner(
+            self.llm,
+            {tool.name: tool for tool in tools},
+            metrics.observe_tool("DocumentSearch", lambda queries: search_runner.call(self.doc_search_tool.search_batch, queries)),
+            max_parts=settings.query_planner_max_parts,
+            workers=settings.query_planner_workers
+        )
 
         # Custom parsing error handler
         def handle_parsing_error(error) -> str:
             """Provide helpful feedback when agent has formatting errors."""
+            metrics.PARSING_RETRIES.inc()
             return (
                 "ERROR: Invalid format detected. You must use this EXACT format:\n\n"
                 "Thought: [your reasoning]\n"
@@ -120,6 +218,11 @@ class AgenticRAG:
                 "If you cannot use tools, use DirectAnswer to respond directly."
             )
         
+        if settings.agent_mode == "tools":
+            self.agent_executor = self._create_tool_calling_executor(tools)
+            logger.info(f"Agent initialized with {len(tools)} tools + memory (TOOL-CALLING agent)")
+            return
+
         # OLD WAY: Using initialize_agent with AgentType and Memory
         # Using CONVERSATIONAL_REACT_DESCRIPTION which properly uses conversation memory
         try:
@@ -131,6 +234,8 @@ class AgenticRAG:
                 memory=self.agent_memory,  # Conversation memory for context
                 handle_parsing_errors=handle_parsing_error,
                 max_iterations=6,
+                # Stop iterating with time left for the final "generate" call
+                max_execution_time=settings.chat_deadline * 0.75 if settings.chat_deadline > 0 else None,
                 early_stopping_method="generate",
                 return_intermediate_steps=True
             )
@@ -139,7 +244,40 @@ class AgenticRAG:
             logger.error(f"Failed to initialize agent: {e}")
             raise
 
-    
+
+    def _create_tool_calling_executor(self, tools: List[Tool]):
+        """
+        Agent driven by native tool calls instead of parsed Thought/Action text.
+        The model can request several tools per turn and answer without a tool,
+        so there is no format to get wrong and no DirectAnswer round trip.
+        """
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", TOOL_CALLING_SYSTEM_PROMPT),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder("agent_scratchpad"),
+        ])
+        agent = create_tool_calling_agent(self.llm, tools, prompt)
+
+        def handle_parsing_error(error) -> str:
+            metrics.PARSING_RETRIES.inc()
+            return f"Invalid tool call ({error}). Call one of the listed tools with valid arguments, or answer directly."
+
+        return AgentExecutor(
+            agent=agent,
+            tools=tools,
+            verbose=True,
+            memory=self.agent_memory,
+            handle_parsing_errors=handle_parsing_error,
+            max_iterations=6,
+            max_execution_time=settings.chat_deadline * 0.75 if settings.chat_deadline > 0 else None,
+            return_intermediate_steps=True
+        )
+
+
     def _create_tools(self) -> List[Tool]:
         """Create all available tools for the agent."""
         tools = []
@@ -161,7 +299,7 @@ ALWAYS use this UNLESS user needs: document search, calculations, or explicitly
         tools.append(
             Tool(
                 name="DocumentSearch",
-                func=self.doc_search_tool.search,
+                func=self._search_document,
                 description="""Search the uploaded PDF document ONLY when user explicitly mentions the document.
 Trigger phrases: "in the document", "from the PDF", "according to the file", "what does the document say".
 Input: Search keywords (e.g., "databases", "Azure Storage").
@@ -177,7 +315,8 @@ For general questions, use DirectAnswer instead."""
                 func=self.calculator_tool.calculate,
                 description="""Perform mathematical calculations.
 Use when: User asks to calculate, compute, or do math.
-Input: Math expression ONLY (e.g., "25*4", "100/12", "2+2").
+Input: Math expression ONLY (e.g., "25*4", "100/12", "2**10", "sqrt(16)").
+Lists and range() apply elementwise (e.g., "sqrt([1,4,9])", "mean([2,4,9])", "sum(range(1,101))").
 Example: "Calculate 25 times 4" → input: "25*4"."""
             )
         )
@@ -188,9 +327,9 @@ Example: "Calculate 25 times 4" → input: "25*4"."""
                 name="TextAnalysis",
                 func=self.text_analysis_tool.analyze,
                 description="""Analyze text to get word count, keywords, and summary.
-Use when: User explicitly asks to ANALYZE text.
-Input: The text to analyze.
-Example: "Analyze this: [text]" → input: "[text]"."""
+Use when: User explicitly asks to ANALYZE text or the uploaded document.
+Input: The text to analyze, or "document" to analyze the whole uploaded document.
+Example: "Analyze this: [text]" → input: "[text]". "Analyze the uploaded document" → input: "document"."""
             )
         )
         
@@ -199,59 +338,138 @@ Example: "Analyze this: [text]" → input: "[text]"."""
             Tool(
                 name="DataFormatter",
                 func=self.data_formatter_tool.format,
-                description="""Format items as a bullet point list.
-Use when: User explicitly asks to FORMAT or make a LIST.
-Input: Comma-separated items.
+                description="""Format items as a bullet point list, or CSV/JSON data as a table.
+Use when: User explicitly asks to FORMAT, make a LIST or a TABLE.
+Input: Comma-separated items, CSV rows (first row = header), or a JSON array.
 Example: "List these as bullets: A, B, C" → input: "A, B, C"."""
             )
         )
         
         # 5. Web Search Tool - ONLY when user explicitly asks for real-time info
-        if TAVILY_AVAILABLE and len (settings.tavily_api_key) !=0:
-            try:
-                # TavilySearchResults is already a BaseTool, use directly
-                tavily_tool = TavilySearchResults(
-                    max_results=3,
-                    name="WebSearch",
-                    description="""Search internet ONLY when user EXPLICITLY says: "latest", "today", "now", "2024", "2025", "current", "recent".
+        # External tools are built on first use; the client imports are slow
+        if settings.tavily_api_key:
+            def build_tavily() -> BaseTool:
+                from langchain_community.tools.tavily_search import TavilySearchResults
+                return TavilySearchResults(max_results=3)
+
+            tools.append(self._lazy_tool(
+                "WebSearch",
+                """Search internet ONLY when user EXPLICITLY says: "latest", "today", "now", "2024", "2025", "current", "recent".
 DO NOT use for general questions - use DirectAnswer instead.
 Input: Search query.
-Example: "Latest Azure pricing TODAY" → input: "Azure pricing 2024"."""
-                )
-                tools.append(tavily_tool)
-                logger.info("Tavily WebSearch tool added")
-            except Exception as e:
-                logger.warning(f"Tavily tool failed to initialize: {e}")
+Example: "Latest Azure pricing TODAY" → input: "Azure pricing 2024".""",
+                build_tavily
+            ))
+            logger.info("Tavily WebSearch tool added")
         else:
             logger.info("Tavily WebSearch not available (set TAVILY_API_KEY to enable)")
         
         # 6. Wikipedia Tool - ONLY when explicitly needed (rarely use)
-        # WikipediaQueryRun is already a BaseTool, but we need to set the name
-        wikipedia_tool = WikipediaQueryRun(
-            api_wrapper=WikipediaAPIWrapper(),
-            name="Wikipedia",
-            description="""Search Wikipedia ONLY when DirectAnswer cannot help with very specific factual topics.
+        def build_wikipedia() -> BaseTool:
+            from langchain_community.tools import WikipediaQueryRun
+            from langchain_community.utilities import WikipediaAPIWrapper
+            return WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper())
+
+        tools.append(self._lazy_tool(
+            "Wikipedia",
+            """Search Wikipedia ONLY when DirectAnswer cannot help with very specific factual topics.
 RARELY use this - prefer DirectAnswer for most questions.
 Use ONLY if user explicitly says "Wikipedia" or needs very specific biographical/historical facts.
 Input: Search topic.
-Example: User says "Check Wikipedia for..." → input: search term."""
-        )
-        tools.append(wikipedia_tool)
+Example: User says "Check Wikipedia for..." → input: search term.""",
+            build_wikipedia
+        ))
+
+        # Cache slow tools and record per-tool latency
+        tools = [self._wrap_tool(tool, TOOL_ERROR_CHECKS.get(tool.name)) for tool in tools]
         
         logger.info(f"Created {len(tools)} tools: {[t.name for t in tools]}")
         return tools
+
+
+    def _lazy_tool(self, name: str, description: str, factory: Callable[[], BaseTool]) -> Tool:
+        """Tool whose implementation is built by factory on the first call (once, thread-safe)."""
+        built: List[BaseTool] = []
+        lock = threading.Lock()
+
+        def run(query: str) -> str:
+            if not built:
+                with lock:
+                    if not built:
+                        try:
+                            built.append(factory())
+                        except ImportError as e:
+                            logger.warning(f"{name} tool unavailable: {e}")
+                            return ToolUnavailable(f"{name} is not available on this server. Try another tool.")
+                        logger.info(f"{name} tool initialized on first use")
+            return built[0].run(query)
+
+        return Tool(name=name, func=run, description=description)
+
+
+    def _search_document(self, query: str) -> str:
+        """DocumentSearch, served from the speculative prefetch when the input matches."""
+        prefetched = self.speculative_retrieval.serve(query, self.index_version)
+        return prefetched if prefetched is not None else self.doc_search_tool.search(query)
+
+
+    def _wrap_tool(self, tool: BaseTool, is_error: Optional[Callable[[Any], bool]] = None) -> Tool:
+        """
+        Wrap a tool with its execution pool (timeout, concurrency limit, circuit breaker),
+        latency metrics and, if it has a TTL configured, the shared result cache.
+        is_error flags results that are really failures (see TOOL_ERROR_CHECKS).
+        """
+        func = tool.func if isinstance(tool, Tool) else tool.run
+        func = self.tool_executor.wrap(tool.name, func, is_error)
+        if self.tool_cache.is_cached(tool.name):
+            func = self.tool_cache.wrap(tool.name, func, is_error)
+
+        return Tool(
+            name=tool.name,
+            func=metrics.observe_tool(tool.name, func),
+            description=tool.description
+        )
     
 
 
+    def sync_index(self):
+        """Switch to the latest published index (another worker's ingest, or a previous run)."""
+        if self.shared_index.current_version() == self.index_version:
+            return
+        with self._index_lock:
+            if self.shared_index.current_version() == self.index_version:
+                return
+            try:
+                loaded = self.shared_index.load(self.embeddings)
+            except Exception as e:
+                logger.error(f"Could not load the shared index: {e}")
+                metrics.ERRORS.labels(component="ingest").inc()
+                return
+            if loaded:
+                self.vectorstore, self.document_metadata, self.index_version = loaded
+                self.doc_search_tool.update_vectorstore(self.vectorstore)
+                self.text_analysis_tool.update_document(self.vectorstore, self.document_metadata)
+
+
     def process_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
         Process PDF document and create vector database.
         Same as main version.
         """
+        with metrics.in_flight(), metrics.PDF_LATENCY.time():
+            return self._process_pdf(pdf_path)
+
+
+    def _process_pdf(self, pdf_path: str) -> Dict[str, Any]:
+        """Load, split, embed and index a PDF."""
         try:
             logger.info(f"Processing PDF: {pdf_path}")
             
             # Load PDF
+            from langchain_community.document_loaders import PyPDFLoader
+            from langchain_community.vectorstores import FAISS
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
             loader = PyPDFLoader(pdf_path)
             pages = loader.load()
             
@@ -270,21 +488,33 @@ Example: User says "Check Wikipedia for..." → input: search term."""
             chunks = text_splitter.split_documents(pages)
             
             # Create vector store
-            self.vectorstore = FAISS.from_documents(chunks, self.embeddings)
-            
-            # Update document search tool
-            self.doc_search_tool.update_vectorstore(self.vectorstore)
-            
-            # Save to disk
-            self.vectorstore.save_local("faiss_index")
-            
-            # Store metadata
-            self.document_metadata = {
+            if self.embedding_scheduler is not None:
+                texts = [chunk.page_content for chunk in chunks]
+                vectors = self.embedding_scheduler.embed(texts)
+                vectorstore = FAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings,
+                                                    metadatas=[chunk.metadata for chunk in chunks])
+            else:
+                vectorstore = FAISS.from_documents(chunks, self.embeddings)
+
+            # Term statistics over the pages (not the overlapping chunks), shared with the index
+            text_stats = self.text_analysis_tool.engine.analyze(page.page_content + "\n" for page in pages)
+            metadata = {
                 'filename': Path(pdf_path).name,
                 'pages': len(pages),
                 'chunks': len(chunks),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now().isoformat(),
+                'embedding_namespace': self.embeddings.namespace,
+                'text_stats': text_stats.to_dict(settings.text_stats_top_terms)
             }
+
+            # Publish to disk for the other workers, then serve it here
+            version = self.shared_index.publish(vectorstore, metadata)
+            with self._index_lock:
+                self.vectorstore = vectorstore
+                self.document_metadata = metadata
+                self.index_version = version
+                self.doc_search_tool.update_vectorstore(self.vectorstore)
+                self.text_analysis_tool.update_document(self.vectorstore, self.document_metadata)
             
             logger.info(f"PDF processed: {len(pages)} pages, {len(chunks)} chunks")
             
@@ -297,18 +527,26 @@ Example: User says "Check Wikipedia for..." → input: search term."""
             
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
+            metrics.ERRORS.labels(component="ingest").inc()
             return {
                 'success': False,
                 'error': str(e)
             }
         
     
-    def chat(self, query: str) -> Dict[str, Any]:
+    def chat(
+        self,
+        query: str,
+        deadline_seconds: Optional[float] = None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """
         Main chat interface using OLD initialize_agent.
         
         Args:
             query: User's question
+            deadline_seconds: Time budget for the whole turn (defaults to CHAT_DEADLINE_SECONDS)
+            on_event: Called with agent progress events (llm_start, llm_end, tool_start, tool_end)
             
         Returns:
             Dict with response and metadata
@@ -318,12 +556,35 @@ Example: User says "Check Wikipedia for..." → input: search term."""
                 "response": "Agent not initialized properly.",
                 "metadata": {"error": "Agent initialization failed"}
             }
-        
+
+        self.sync_index()
+        budget = settings.chat_deadline if deadline_seconds is None else deadline_seconds
+        with metrics.in_flight(), metrics.CHAT_LATENCY.time(), deadline_scope(budget), event_listener(on_event), \
+                start_trace("chat", query=query[:100]) as trace:
+            return self._traced_chat(query, trace)
+
+
+    def _traced_chat(self, query: str, trace: Trace) -> Dict[str, Any]:
+        """Run the agent for one query inside an active trace."""
         try:
             logger.info(f"Processing query: {query[:100]}...")
             
-            # OLD WAY: invoke with {"input": query}
-            result = self.agent_executor.invoke({"input": query})
+            # Identical concurrent questions share one agent run; each caller
+            # still records its own interaction and conversation id below
+            coalesce_key = (" ".join(query.lower().split()), self.index_version)
+            deadline = current_deadline()
+            try:
+                result, coalesced = self.single_flight.do(
+                    coalesce_key,
+                    lambda: self._run_agent(query),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            except (DeadlineExceeded, TimeoutError) as e:
+                logger.warning(f"⏱️ {e} - answering with partial results")
+                result, coalesced = self._partial_result(trace), False
+            if coalesced:
+                metrics.COALESCED_REQUESTS.inc()
+                logger.info("🔗 Served by an identical in-flight request")
             
             # Debug logging
             logger.info(f"Result keys: {result.keys()}")
@@ -358,13 +619,18 @@ Example: User says "Check Wikipedia for..." → input: search term."""
             logger.info(f"Extracted {len(agent_steps)} agent steps")
             logger.info(f"Tools used: {tools_used}")
             
-            # Save to memory
-            self.memory_manager.add_interaction(
-                query=query,
-                response=response,
-                agent_steps=agent_steps,
-                tools_used=tools_used
-            )
+            # Save to memory with the finished trace, so each turn is written once
+            # (the persist span itself only shows in the returned summary)
+            trace.root.finish()
+            finished_trace = trace.to_dict()
+            with span("memory_persist", kind="persistence"):
+                conversation_id = self.memory_manager.add_interaction(
+                    query=query,
+                    response=response,
+                    agent_steps=agent_steps,
+                    tools_used=tools_used,
+                    trace=finished_trace
+                )
             
             # Format response
             result_dict = {
@@ -372,9 +638,13 @@ Example: User says "Check Wikipedia for..." → input: search term."""
                 "metadata": {
                     "tools_used": tools_used,
                     "num_steps": len(agent_steps),
-                    "agent_reasoning": agent_steps
+                    "agent_reasoning": agent_steps,
+                    "trace": trace.summary(),
+                    "timed_out": bool(result.get('timed_out')),
+                    "planned": bool(result.get('planned')),
+                    "coalesced": coalesced
                 },
-                "conversation_id": len(self.memory_manager.interaction_history) - 1
+                "conversation_id": conversation_id
             }
             
             logger.info(f"Query completed. Tools used: {tools_used}")
@@ -382,14 +652,55 @@ Example: User says "Check Wikipedia for..." → input: search term."""
             
         except Exception as e:
             logger.error(f"Error in chat: {e}")
+            metrics.ERRORS.labels(component="chat").inc()
             import traceback
             traceback.print_exc()
             return {
                 "response": f"An error occurred: {str(e)}",
-                "metadata": {"error": str(e)}
+                "metadata": {"error": str(e), "trace": trace.summary()}
             }
     
 
+    def _run_agent(self, query: str) -> Dict[str, Any]:
+        """Run the agent loop once (OLD WAY: invoke with {"input": query})."""
+        if settings.query_planner:
+            chat_history = list(self.agent_memory.chat_memory.messages)
+            parts = self.query_planner.plan(query, chat_history)
+            if parts:
+                result = self.query_planner.run(query, parts, chat_history)
+                self.agent_memory.save_context({"input": query}, {"output": result["output"]})
+                return result
+
+        if settings.speculative_retrieval and self.vectorstore:
+            # Search the document while the agent makes its first LLM call
+            with self.speculative_retrieval.scope(query, self.index_version):
+                return self._invoke_agent(query)
+        return self._invoke_agent(query)
+
+
+    def _invoke_agent(self, query: str) -> Dict[str, Any]:
+        return self.agent_executor.invoke(
+            {"input": query},
+            config={"callbacks": [trace_callback_handler]}
+        )
+    
+
+    def _partial_result(self, trace: Trace) -> Dict[str, Any]:
+        """Build an agent-style result from the tool calls that finished before the deadline."""
+        steps = []
+        for tool_span in trace.root.walk():
+            if tool_span.kind == "tool" and tool_span.end is not None and "output" in tool_span.attributes:
+                action = AgentAction(tool=tool_span.name, tool_input=tool_span.attributes.get("input", ""), log="")
+                steps.append((action, tool_span.attributes["output"]))
+
+        if steps:
+            findings = "\n".join(f"- {action.tool}: {observation}" for action, observation in steps)
+            output = f"I ran out of time before finishing my answer. Here is what I found so far:\n{findings}"
+        else:
+            output = "Sorry, I ran out of time before I could answer. Please try again or ask a simpler question."
+        return {"output": output, "intermediate_steps": steps, "timed_out": True}
+    
+
     def add_feedback(self, conversation_id: int, feedback: str):
         """Add user feedback to a conversation."""
         self.memory_manager.add_feedback(conversation_id, feedback)
@@ -397,7 +708,51 @@ Example: User says "Check Wikipedia for..." → input: search term."""
 
     def get_conversation_history(self, num_interactions: int = 10) -> List[InteractionLog]:
         """Get recent conversation history."""
-        return self.memory_manager.interaction_history[-num_interactions:]
+        return self.memory_manager.get_recent(num_interactions)
+    
+
+    def get_history_page(self, before: Optional[int] = None, limit: int = 50) -> List[Tuple[int, InteractionLog]]:
+        """Page of (conversation_id, interaction) older than `before`, oldest first."""
+        return self.memory_manager.get_history_page(before=before, limit=limit)
+
+
+    def search_documents(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+        """Raw document search (no agent): matching chunks with page and L2 distance."""
+        self.sync_index()
+        if not self.vectorstore:
+            return []
+        with span("embed_query", kind="embedding"):
+            embedding = self.embeddings.embed_query(query)
+        with span("faiss_search", kind="retrieval", k=k):
+            matches = self.vectorstore.similarity_search_with_score_by_vector(embedding, k=k)
+        return [
+            {"content": doc.page_content, "page": doc.metadata.get('page'), "score": float(score)}
+            for doc, score in matches
+        ]
+
+
+    def get_system_status(self) -> Dict[str, Any]:
+        """Live counters for the status bar."""
+        self.sync_index()
+        return {
+            "index_vectors": self.vectorstore.index.ntotal if self.vectorstore else 0,
+            "document": self.document_metadata.get('filename'),
+            "history_hot": len(self.memory_manager.interaction_history),
+            "history_total": self.memory_manager.total_interactions,
+            "active_sessions": metrics.active_sessions(),
+            "unavailable_tools": [name for name, state in self.tool_executor.status().items() if state["state"] != "closed"],
+            "agent_mode": settings.agent_mode
+        }
+    
+
+    def get_tool_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool cache hit/miss statistics."""
+        return self.tool_cache.stats()
+    
+
+    def get_history_columns(self, include_archive: bool = False) -> InteractionColumns:
+        """Get interaction history as compact columns (hot tier unless include_archive)."""
+        return self.memory_manager.to_columns(include_archive=include_archive, keep_text=False)
     
 
     def clear_memory(self):
@@ -408,15 +763,25 @@ Example: User says "Check Wikipedia for..." → input: search term."""
         logger.info("Memory cleared from UI (both MemoryManager and agent memory)")
     
 
-    def export_logs(self, filepath: str = "interaction_logs.json") -> bool:
-        """Export interaction logs to JSON."""
-        try:
-            logs = [asdict(log) for log in self.memory_manager.interaction_history]
-            with open(filepath, 'w') as f:
-                json.dump(logs, f, indent=2)
-            logger.info(f"Logs exported to {filepath}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to export logs: {e}")
-            return False
+    def export_logs(
+        self,
+        filepath: str = "interaction_logs.jsonl",
+        compress: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        feedback: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream interaction logs (archived + recent) to JSONL.
+        A ".zst" filepath enables zstd compression unless compress is given.
+        """
+        return self.log_exporter.export(
+            filepath,
+            compress=compress,
+            since=since,
+            until=until,
+            feedback=feedback,
+            progress_callback=progress_callback
+        )
     
\ No newline at end of file
@@ -0,0 +1,459 @@
+from backend.services.logger import logger
+from typing import Any, Callable, Dict, Optional, Tuple
+from functools import lru_cache
+import ast
+import gc
+import math
+import multiprocessing
+import os
+import queue
+import threading
+
+
+class CalculatorError(ValueError):
+    """Expression rejected (syntax, disallowed construct or resource limit)."""
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Guarded operations
+# ═══════════════════════════════════════════════════════════════════
+
+class Limits:
+    """
+    Resource limits applied while evaluating one expression. Operators check
+    the size of their result before computing it, so `9**9**9` or
+    `pow(10, 10**8)` fail in microseconds instead of pinning a core.
+    """
+
+    def __init__(self, max_digits: int = 1000, max_elements: int = 100_000):
+        self.max_digits = max_digits
+        self.max_bits = int(max_digits * math.log2(10)) + 1
+        self.max_elements = max_elements
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _np():
+    import numpy
+    return numpy
+
+
+def _is_array(value: Any) -> bool:
+    # NumPy arrays, not NumPy scalars (which also carry a shape)
+    return type(value).__module__ == "numpy" and getattr(value, "ndim", 0) > 0
+
+
+# Integer lists stay int64 while results provably fit; anything that could
+# wrap around is computed in float instead
+_INT_SAFE = 2 ** 62
+
+
+def _is_int_array(value: Any) -> bool:
+    return _is_array(value) and value.dtype.kind in "iu"
+
+
+def _max_abs(value: Any) -> float:
+    if _is_array(value):
+        return float(_np().abs(value).max()) if value.size else 0.0
+    try:
+        return abs(float(value))
+    except OverflowError:
+        return math.inf
+
+
+def _as_float(value: Any) -> Any:
+    return value.astype(float) if _is_array(value) else float(value)
+
+
+class _Ops:
+    """Functions the compiled expression calls; every one enforces the limits."""
+
+    def __init__(self, limits: Limits):
+        self.limits = limits
+
+    def check(self, value: Any) -> Any:
+        if _is_int(value) and value.bit_length() > self.limits.max_bits:
+            raise CalculatorError(f"result exceeds {self.limits.max_digits} digits")
+        if _is_array(value) and value.size > self.limits.max_elements:
+            raise CalculatorError(f"result exceeds {self.limits.max_elements} elements")
+        return value
+
+    def check_bits(self, bits: float):
+        if bits > self.limits.max_bits:
+            raise CalculatorError(f"result would exceed {self.limits.max_digits} digits")
+
+    def widen(self, a, b, bound: Callable[[float, float], float]):
+        """Operands as float if an int64 array result could exceed _INT_SAFE."""
+        if (_is_int_array(a) or _is_int_array(b)) and bound(_max_abs(a), _max_abs(b)) >= _INT_SAFE:
+            return _as_float(a), _as_float(b)
+        return a, b
+
+    def add(self, a, b):
+        a, b = self.widen(a, b, lambda x, y: x + y)
+        return self.check(a + b)
+
+    def sub(self, a, b):
+        a, b = self.widen(a, b, lambda x, y: x + y)
+        return self.check(a - b)
+
+    def mul(self, a, b):
+        if _is_int(a) and _is_int(b):
+            self.check_bits(a.bit_length() + b.bit_length())
+        a, b = self.widen(a, b, lambda x, y: x * y)
+        return self.check(a * b)
+
+    def truediv(self, a, b):
+        return a / b
+
+    def floordiv(self, a, b):
+        return a // b
+
+    def mod(self, a, b):
+        return a % b
+
+    def pow(self, base, exponent, modulus=None):
+        if modulus is not None:
+            if not (_is_int(base) and _is_int(exponent) and _is_int(modulus)):
+                raise CalculatorError("pow() with a modulus needs integers")
+            return pow(base, exponent, modulus)
+        if _is_int(base) and _is_int(exponent) and exponent > 0 and abs(base) > 1:
+            self.check_bits(exponent * (abs(base).bit_length() - 1))
+        if _is_array(exponent) or _is_array(base):
+            # Integer powers must not overflow, and NumPy rejects negative integer exponents
+            if (_is_int_array(base) or _is_int_array(exponent)) and (
+                    _np().min(exponent) < 0 or math.log2(max(_max_abs(base), 1.0)) * _max_abs(exponent) >= 62):
+                base, exponent = _as_float(base), _as_float(exponent)
+            return self.check(_np().power(base, exponent))
+        return self.check(base ** exponent)
+
+    def array(self, *items):
+        # Items may be arrays themselves ([range(n), range(n)]): count the
+        # flattened size before concatenating, not just the number of items
+        if sum(item.size if _is_array(item) else 1 for item in items) > self.limits.max_elements:
+            raise CalculatorError(f"lists are limited to {self.limits.max_elements} elements")
+        np = _np()
+        # Integer lists stay integers (min([1, 2]) is 1, not 1.0)
+        integers = all((_is_int(item) or _is_int_array(item)) and _max_abs(item) < _INT_SAFE for item in items)
+        dtype = np.int64 if integers else float
+        if not items:
+            return np.zeros(0, dtype=dtype)
+        return self.check(np.concatenate([np.atleast_1d(np.asarray(item, dtype=dtype)) for item in items]))
+
+    def range(self, *args):
+        if not 1 <= len(args) <= 3 or not all(isinstance(a, (int, float)) for a in args):
+            raise CalculatorError("range() takes 1-3 numbers")
+        start, stop, step = (0, args[0], 1) if len(args) == 1 else (args[0], args[1], args[2] if len(args) == 3 else 1)
+        if step == 0:
+            raise CalculatorError("range() step must not be zero")
+        if math.ceil((stop - start) / step) > self.limits.max_elements:
+            raise CalculatorError(f"range() is limited to {self.limits.max_elements} elements")
+        integers = all(_is_int(a) for a in args) and max(abs(start), abs(stop)) < _INT_SAFE
+        return _np().arange(start, stop, step, dtype=_np().int64 if integers else float)
+
+    def factorial(self, n):
+        if not _is_int(n) or n < 0:
+            raise CalculatorError("factorial() needs a non-negative integer")
+        self.check_bits(math.lgamma(n + 1) / math.log(2))
+        return math.factorial(n)
+
+
+def _elementwise(scalar: Callable, vector_name: str) -> Callable:
+    def apply(*args):
+        if any(_is_array(a) for a in args):
+            return getattr(_np(), vector_name)(*args)
+        return scalar(*args)
+    apply.__name__ = vector_name
+    return apply
+
+
+def _reduction(builtin: Callable, vector_name: str) -> Callable:
+    def apply(*args):
+        if len(args) == 1 and _is_array(args[0]):
+            values = args[0]
+            if vector_name == "sum" and _is_int_array(values) and _max_abs(values) * values.size >= _INT_SAFE:
+                return sum(values.tolist())  # exact; the digit limit applies to the result
+            result = getattr(_np(), vector_name)(values)
+            # Python scalars from here on, so later arithmetic is exact and guarded
+            return result.item() if getattr(result, "ndim", None) == 0 else result
+        if len(args) == 1 and builtin is not None:
+            return builtin(args[0])
+        if builtin is None or any(_is_array(a) for a in args):
+            raise CalculatorError(f"{vector_name}() takes a single list")
+        return builtin(args)
+    apply.__name__ = vector_name
+    return apply
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    'abs': _elementwise(abs, "abs"),
+    'round': _elementwise(round, "round"),
+    'sqrt': _elementwise(math.sqrt, "sqrt"),
+    'sin': _elementwise(math.sin, "sin"),
+    'cos': _elementwise(math.cos, "cos"),
+    'tan': _elementwise(math.tan, "tan"),
+    'log': _elementwise(math.log, "log"),
+    'log10': _elementwise(math.log10, "log10"),
+    'exp': _elementwise(math.exp, "exp"),
+    'floor': _elementwise(math.floor, "floor"),
+    'ceil': _elementwise(math.ceil, "ceil"),
+    'min': _reduction(min, "min"),
+    'max': _reduction(max, "max"),
+    'sum': _reduction(sum, "sum"),
+    'mean': _reduction(None, "mean"),
+    'median': _reduction(None, "median"),
+    'std': _reduction(None, "std"),
+}
+GUARDED_FUNCTIONS = ("pow", "range", "factorial")
+CONSTANTS = {'pi': math.pi, 'e': math.e, 'tau': math.tau}
+
+_BINOPS = {
+    ast.Add: "add", ast.Sub: "sub", ast.Mult: "mul", ast.Div: "truediv",
+    ast.FloorDiv: "floordiv", ast.Mod: "mod", ast.Pow: "pow",
+}
+_OPS_NAME = "__ops"
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Compilation
+# ═══════════════════════════════════════════════════════════════════
+
+class _Guard(ast.NodeTransformer):
+    """Validate against the whitelist and route operators through _Ops."""
+
+    def __init__(self, max_bits: int):
+        self.max_bits = max_bits
+
+    def _ops_call(self, method: str, args) -> ast.Call:
+        func = ast.Attribute(value=ast.Name(id=_OPS_NAME, ctx=ast.Load()), attr=method, ctx=ast.Load())
+        return ast.Call(func=func, args=args, keywords=[])
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise CalculatorError(f"unsupported literal {node.value!r}")
+        if isinstance(node.value, int) and node.value.bit_length() > self.max_bits:
+            raise CalculatorError("number literal is too large")
+        return node
+
+    def visit_Name(self, node):
+        if node.id not in CONSTANTS:
+            raise CalculatorError(f"unknown name '{node.id}'")
+        return ast.Constant(value=CONSTANTS[node.id])
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, (ast.UAdd, ast.USub)):
+            raise CalculatorError("unsupported operator")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node):
+        method = _BINOPS.get(type(node.op))
+        if method is None:
+            raise CalculatorError("unsupported operator")
+        return self._ops_call(method, [self.visit(node.left), self.visit(node.right)])
+
+    def visit_List(self, node):
+        return self._ops_call("array", [self.visit(element) for element in node.elts])
+
+    visit_Tuple = visit_List
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise CalculatorError("only simple function calls are allowed")
+        name = node.func.id
+        args = [self.visit(arg) for arg in node.args]
+        if name in GUARDED_FUNCTIONS:
+            return self._ops_call(name, args)
+        if name not in FUNCTIONS:
+            raise CalculatorError(f"unknown function '{name}'")
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+    def generic_visit(self, node):
+        raise CalculatorError(f"unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str, max_bits: int):
+    """Parse, validate and compile an expression (cached per expression and limit)."""
+    if len(expression) > 2000:
+        raise CalculatorError("expression is too long")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"invalid expression: {e.msg}") from None
+    tree = ast.fix_missing_locations(_Guard(max_bits).visit(tree))
+    return compile(tree, "<calculator>", "eval")
+
+
+def evaluate(expression: str, limits: Optional[Limits] = None) -> Any:
+    """Evaluate in this process (static limits only, no time limit)."""
+    limits = limits or Limits()
+    code = compile_expression(expression, limits.max_bits)
+    namespace = {"__builtins__": {}, _OPS_NAME: _Ops(limits), **FUNCTIONS}
+    try:
+        return eval(code, namespace)
+    except CalculatorError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as e:
+        raise CalculatorError(str(e)) from None
+
+
+def format_result(value: Any, max_items: int = 20) -> str:
+    if _is_array(value):
+        items = value.tolist()
+        shown = ", ".join(f"{item:g}" if isinstance(item, float) else str(item) for item in items[:max_items])
+        more = f", ... ({len(items)} values)" if len(items) > max_items else ""
+        return f"[{shown}{more}]"
+    if hasattr(value, "item"):  # NumPy scalar
+        value = value.item()
+    return str(value)
+
+
+def evaluate_to_text(expression: str, limits: Optional[Limits] = None) -> Tuple[bool, str]:
+    """(ok, formatted result or error message); never raises."""
+    try:
+        return True, format_result(evaluate(expression, limits))
+    except CalculatorError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Out-of-process sandbox
+# ═══════════════════════════════════════════════════════════════════
+
+def _serve(connection, max_digits: int, max_elements: int, memory_mb: int):
+    """Worker process loop: receive expressions, send back (ok, text)."""
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    _np()  # import before the memory cap, so the first list expression is not slowed by it
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    # Keep start-up objects (NumPy's module graph) out of later collections
+    gc.freeze()
+    limits = Limits(max_digits, max_elements)
+    connection.send("ready")
+    while True:
+        try:
+            expression = connection.recv()
+        except EOFError:
+            return
+        if expression is None:
+            return
+        try:
+            connection.send(evaluate_to_text(expression, limits))
+        except MemoryError:
+            connection.send((False, "expression needs too much memory"))
+
+
+class _Worker:
+    def __init__(self, context, limits: Limits, memory_mb: int):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve,
+            args=(child, limits.max_digits, limits.max_elements, memory_mb),
+            name="calculator",
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def wait_ready(self, timeout: float):
+        """Process start-up (interpreter, imports) does not count against the expression timeout."""
+        if not self.connection.poll(timeout) or self.connection.recv() != "ready":
+            self.kill()
+            raise OSError(f"calculator worker did not start within {timeout:.0f}s")
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.connection.close()
+
+
+class CalculatorSandbox:
+    """
+    Small pool of evaluator processes with a hard per-expression timeout.
+
+    Workers are started in the background (warm()) and reused, so the compile
+    cache lives in them; a worker that times out or dies is killed and
+    replaced in the background.
+    """
+
+    STARTUP_TIMEOUT = 30.0
+
+    def __init__(self, workers: int = 2, timeout: float = 2.0, limits: Optional[Limits] = None, memory_mb: int = 1024):
+        self.timeout = timeout
+        self.limits = limits or Limits()
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.LifoQueue[Optional[_Worker]]" = queue.LifoQueue()  # reuse the most recently used (warm) worker
+        for _ in range(max(1, workers)):
+            self._idle.put(None)
+        self._size = max(1, workers)
+
+
+    def warm(self):
+        """Start every idle worker slot now, off the calling thread."""
+        for _ in range(self._size):
+            threading.Thread(target=self._replace, args=(self._idle.get(),), name="calculator-start", daemon=True).start()
+
+
+    def _replace(self, worker: Optional[_Worker]):
+        """Return a slot to the pool with a live worker in it (None if one cannot start)."""
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = self._start_worker()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not start a calculator worker: {e}")
+            worker = None
+        finally:
+            self._idle.put(worker)
+
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.limits, self.memory_mb)
+        worker.wait_ready(self.STARTUP_TIMEOUT)
+        return worker
+
+
+    def evaluate(self, expression: str) -> Tuple[bool, str]:
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = self._start_worker()
+            worker.connection.send(expression)
+            if worker.connection.poll(self.timeout):
+                return worker.connection.recv()
+            logger.warning(f"🧮 Calculator timed out after {self.timeout}s, restarting worker: {expression[:80]}")
+            worker.kill()
+            worker = None
+            return False, f"calculation took longer than {self.timeout:g}s"
+        except (EOFError, OSError) as e:
+            if worker is not None:
+                worker.kill()
+            worker = None
+            return False, f"calculator worker failed: {e}"
+        finally:
+            if worker is None:
+                # Start the replacement in the background; the next caller waits for the slot
+                threading.Thread(target=self._replace, args=(None,), name="calculator-start", daemon=True).start()
+            else:
+                self._idle.put(worker)
+
+
+    def close(self):
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            if worker is not None:
+                worker.kill()
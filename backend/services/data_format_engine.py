@@ -0,0 +1,304 @@
+from backend.services.token_counter import count_tokens
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import csv
+import io
+import json
+import re
+
+
+RULE = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+_DELIMITERS = ",\t;|"
+_NON_WHITESPACE = re.compile(r"\S")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Detection and streaming parsers
+# ═══════════════════════════════════════════════════════════════════
+
+def detect_format(data: str) -> str:
+    """'json', 'table' (CSV/TSV/... with a consistent column count) or 'list'."""
+    stripped = data.lstrip()
+    if stripped[:1] in ("[", "{"):
+        try:
+            next(iter_json_records(stripped), None)
+            return "json"
+        except ValueError:
+            pass
+    if table_dialect(data) is not None:
+        return "table"
+    return "list"
+
+
+def table_dialect(data: str) -> Optional[type]:
+    """
+    csv dialect if the first lines look like a table of at least 2 columns,
+    else None. Two lines only count when the first one reads as a header over
+    numeric data, so a comma-separated list ("milk, eggs\nbread, butter")
+    stays a list.
+    """
+    lines = [line for line in data[:8192].splitlines() if line.strip()][:6]
+    if len(lines) < 2:
+        return None
+    sample = "\n".join(lines)
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=_DELIMITERS)
+    except csv.Error:
+        return None
+    rows = list(csv.reader(lines, dialect))
+    widths = {len(row) for row in rows}
+    if len(widths) != 1 or widths.pop() < 2:
+        return None
+    if len(rows) < 3:
+        # With one data row has_header's length vote almost always says yes,
+        # so also require its type signal: a number under a non-numeric name
+        try:
+            if not sniffer.has_header(sample):
+                return None
+        except csv.Error:
+            return None
+        if not any(_is_number(value) and not _is_number(name) for name, value in zip(*rows)):
+            return None
+    return dialect
+
+
+def _is_number(cell: str) -> bool:
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def iter_json_records(text: str) -> Iterator[Any]:
+    """
+    Items of a JSON array one at a time (a single object or scalar yields
+    itself), decoding element by element instead of building the whole list.
+    Raises ValueError on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    match = _NON_WHITESPACE.search(text)
+    if match is None:
+        return
+    position = match.start()
+    if text[position] != "[":
+        value, _ = decoder.raw_decode(text, position)
+        yield value
+        return
+
+    position += 1
+    expect_item = True
+    while True:
+        match = _NON_WHITESPACE.search(text, position)
+        if match is None:
+            raise ValueError("unterminated JSON array")
+        position = match.start()
+        char = text[position]
+        if char == "]":
+            return
+        if char == "," and not expect_item:
+            position += 1
+            expect_item = True
+            continue
+        if not expect_item:
+            raise ValueError(f"expected ',' or ']' at position {position}")
+        value, position = decoder.raw_decode(text, position)
+        expect_item = False
+        yield value
+
+
+def iter_table_rows(data: str, dialect: type) -> Iterator[List[str]]:
+    return (row for row in csv.reader(io.StringIO(data), dialect) if any(cell.strip() for cell in row))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Budgeted rendering
+# ═══════════════════════════════════════════════════════════════════
+
+class _Budget:
+    """Collects output lines until the token budget is spent; counts what was dropped."""
+
+    def __init__(self, max_tokens: int):
+        self.remaining = max_tokens
+        self.lines: List[str] = []
+        self.omitted = 0
+
+    def add(self, line: str) -> bool:
+        if self.omitted:
+            self.omitted += 1
+            return False
+        cost = count_tokens(line) + 1
+        if cost > self.remaining:
+            self.omitted = 1
+            return False
+        self.remaining -= cost
+        self.lines.append(line)
+        return True
+
+
+class _ColumnSummary:
+    """Running min/max/mean for one column (reported only if every value is numeric)."""
+
+    __slots__ = ("count", "total", "low", "high", "non_numeric")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.low = float("inf")
+        self.high = float("-inf")
+        self.non_numeric = 0
+
+    def add(self, value: Any):
+        if value is None or value == "":
+            return
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            self.non_numeric += 1
+            return
+        if number != number:  # NaN
+            return
+        self.count += 1
+        self.total += number
+        self.low = min(self.low, number)
+        self.high = max(self.high, number)
+
+    def describe(self) -> Optional[str]:
+        if not self.count or self.non_numeric:
+            return None
+        return f"min {self.low:g}, max {self.high:g}, mean {self.total / self.count:g}"
+
+
+def _cell(value: Any, max_chars: int) -> str:
+    if value is None:
+        return ""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+    text = " ".join(text.split()).replace("|", "\\|")
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def render_table(
+    header: List[str],
+    rows: Iterable[List[Any]],
+    max_tokens: int,
+    max_cell_chars: int = 60,
+    title: str = "FORMATTED AS TABLE"
+) -> str:
+    """
+    Markdown table within max_tokens. Every row is still read (one pass, O(rows)),
+    so the footer reports the true row count and per-column numeric ranges.
+    """
+    budget = _Budget(max_tokens)
+    summaries = [_ColumnSummary() for _ in header]
+    budget.add("| " + " | ".join(_cell(name, max_cell_chars) for name in header) + " |")
+    budget.add("|" + "---|" * len(header))
+    total = shown = 0
+    for row in rows:
+        total += 1
+        for summary, value in zip(summaries, row):
+            summary.add(value)
+        if not budget.omitted:
+            cells = [_cell(value, max_cell_chars) for value in row[:len(header)]]
+            cells += [""] * (len(header) - len(cells))
+            shown += budget.add("| " + " | ".join(cells) + " |")
+
+    lines = [f"{title} ({total} rows × {len(header)} columns):", RULE, *budget.lines]
+    if shown < total:
+        lines.append(f"… {total - shown} more rows not shown ({shown} of {total} shown)")
+        ranges = [f"   • {name}: {text}" for name, summary in zip(header, summaries) if (text := summary.describe())]
+        if ranges:
+            lines.append("Numeric columns (all rows):")
+            lines.extend(ranges)
+    lines.append(RULE)
+    return "\n".join(lines)
+
+
+def render_bullets(items: Iterable[str], max_tokens: int, title: str = "FORMATTED AS BULLET POINTS") -> str:
+    budget = _Budget(max_tokens)
+    total = 0
+    for item in items:
+        total += 1
+        budget.add(f"• {item}")
+    lines = [f"{title}:", RULE, *budget.lines]
+    if budget.omitted:
+        lines.append(f"… {budget.omitted} more items not shown ({total} total)")
+    lines.append(RULE)
+    return "\n".join(lines)
+
+
+def truncate_lines(text: str, max_tokens: int) -> str:
+    """Whole lines of text up to max_tokens, with a note of how many were cut."""
+    budget = _Budget(max_tokens)
+    for line in text.splitlines():
+        budget.add(line)
+    if budget.omitted:
+        budget.lines.append(f"… {budget.omitted} more lines not shown")
+    return "\n".join(budget.lines)
+
+
+def format_table(data: str, max_tokens: int, max_cell_chars: int = 60) -> Optional[str]:
+    """CSV/TSV/semicolon/pipe-separated text as a markdown table (None if not tabular)."""
+    dialect = table_dialect(data)
+    if dialect is None:
+        return None
+    rows = iter_table_rows(data, dialect)
+    first = next(rows, None)
+    if first is None:
+        return None
+    try:
+        has_header = csv.Sniffer().has_header(data[:8192])
+    except csv.Error:
+        has_header = True
+    if has_header:
+        header = first
+    else:
+        header = [f"col{i + 1}" for i in range(len(first))]
+        rows = _prepend(first, rows)
+    return render_table(header, rows, max_tokens, max_cell_chars)
+
+
+def format_json(data: str, max_tokens: int, max_cell_chars: int = 60) -> Optional[str]:
+    """JSON array of objects as a table, array of scalars as bullets (None if not JSON)."""
+    try:
+        return _format_json(data, max_tokens, max_cell_chars)
+    except ValueError:
+        # Malformed JSON (possibly only found part-way through the stream)
+        return None
+
+
+def _format_json(data: str, max_tokens: int, max_cell_chars: int) -> str:
+    records = iter_json_records(data)
+    first = next(records, None)
+    if first is None:
+        return render_bullets([], max_tokens)
+
+    if isinstance(first, dict):
+        # Columns are the keys of the first object plus any new keys in the next 100
+        lookahead = [first]
+        for record in records:
+            lookahead.append(record)
+            if len(lookahead) > 100:
+                break
+        header: Dict[str, None] = {}
+        for record in lookahead:
+            if isinstance(record, dict):
+                header.update(dict.fromkeys(record))
+        columns = list(header)
+        rows = (
+            [record.get(column) for column in columns] if isinstance(record, dict) else [record]
+            for record in _chain(lookahead, records)
+        )
+        return render_table(columns, rows, max_tokens, max_cell_chars, title="FORMATTED JSON AS TABLE")
+
+    items = (_cell(record, max_cell_chars * 4) for record in _prepend(first, records))
+    return render_bullets(items, max_tokens)
+
+
+def _prepend(first: Any, rest: Iterator[Any]) -> Iterator[Any]:
+    yield first
+    yield from rest
+
+
+def _chain(head: List[Any], rest: Iterator[Any]) -> Iterator[Any]:
+    yield from head
+    yield from rest
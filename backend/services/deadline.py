@@ -0,0 +1,72 @@
+from typing import Optional, Any, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's overall time budget has run out."""
+
+
+class Deadline:
+    """Overall time budget for one request."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout_for(self, cap: Optional[float] = None) -> float:
+        """Timeout for the next call: the remaining budget, capped per call."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Request deadline of {self.budget:.0f}s exceeded")
+        return min(cap, remaining) if cap else remaining
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+# Shared pool for calls that need a hard timeout; the caller stops waiting, the thread finishes on its own
+_timeout_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="deadline")
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(budget_seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """Apply a time budget to everything called within the block (None/0 = no budget)."""
+    if not budget_seconds or budget_seconds <= 0:
+        yield None
+        return
+    deadline = Deadline(budget_seconds)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def submit_in_context(func: Callable[..., Any], *args, **kwargs):
+    """Run func on the timeout pool with the caller's context (deadline, trace)."""
+    return _timeout_pool.submit(copy_context().run, func, *args, **kwargs)
+
+
+def call_with_timeout(func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """Call func, giving up after timeout seconds (raises TimeoutError)."""
+    if timeout is None:
+        return func(*args, **kwargs)
+    future = submit_in_context(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"Call timed out after {timeout:.1f}s")
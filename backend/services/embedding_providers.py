@@ -0,0 +1,112 @@
+from backend.services.logger import logger
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import re
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    CPU-local embeddings with a sentence-transformers model (optional
+    dependency, loaded on first use). Vectors are L2-normalized; documents
+    are encoded in batches with torch using `threads` cores.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 64, threads: Optional[int] = None):
+        import sentence_transformers  # noqa: F401 - fail at construction if missing, not on the first query
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.threads = threads
+        self.namespace = f"local-{_slug(model_name.split('/')[-1])}"
+        self._model = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def _encode(self, texts: List[str]):
+        return self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                 convert_to_numpy=True, show_progress_bar=False)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    if self.threads:
+                        import torch
+                        torch.set_num_threads(self.threads)
+                    logger.info(f"🧠 Loading local embedding model {self.model_name} on {self.device}")
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+
+def _embed_batch(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Pool task (module-level so it pickles)."""
+    return embeddings.embed_documents(texts)
+
+
+class ParallelEmbeddings(Embeddings):
+    """
+    Splits large embed_documents calls into batches spread over a process
+    pool, for pure-Python embedders that would otherwise hold the GIL on one
+    core. Queries and small calls run in-process, so they stay in the
+    millisecond range. `inner` must be picklable.
+    """
+
+    def __init__(self, inner: Embeddings, workers: int, batch_size: int = 256):
+        self.inner = inner
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.namespace = embedding_namespace(inner)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.workers == 1 or len(texts) <= self.batch_size:
+            return self.inner.embed_documents(texts)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors: List[List[float]] = []
+        for batch_vectors in self._executor().map(_embed_batch, [self.inner] * len(batches), batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    logger.info(f"🧵 Starting {self.workers} embedding worker processes")
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def embedding_namespace(embeddings: Embeddings) -> str:
+    """
+    Stable name for the vector space an embedder produces (provider, model,
+    dimensions). Indexes live under INDEX_PATH/<namespace>, so vectors from
+    different models never end up in, or are searched against, the same index.
+    """
+    namespace = getattr(embeddings, "namespace", None)
+    if namespace:
+        return namespace
+    model = getattr(embeddings, "model", None)
+    if isinstance(model, str):
+        return f"openai-{_slug(model)}"
+    return _slug(type(embeddings).__name__)
@@ -0,0 +1,327 @@
+from backend.services.logger import logger
+from backend.services.token_counter import count_tokens
+from backend.services import metrics
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import deque
+from pathlib import Path
+import hashlib
+import random
+import shutil
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class TokenBucket:
+    """
+    Refills `rate_per_minute` units per minute, holding at most
+    `burst_seconds` worth (providers enforce per-minute limits over much
+    shorter windows). acquire() blocks until the units are available; a
+    request larger than the bucket waits for a full bucket and leaves it in
+    debt. pause() holds every caller back for a while (e.g. after a 429 with
+    Retry-After), even when rate_per_minute <= 0 disables the limit itself.
+    scale() slows the rate down below the configured limit and back up.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst_seconds: float = 1.0):
+        self.name = name
+        self.limit = rate_per_minute / 60.0
+        self.rate = self.limit
+        self.burst_seconds = burst_seconds
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` units, waiting as needed; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self.enabled:
+                    if now >= self._paused_until:
+                        return waited
+                    delay = self._paused_until - now
+                else:
+                    needed = min(amount, self.capacity)
+                    self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if now >= self._paused_until and self._available >= needed:
+                        self._available -= amount
+                        return waited
+                    delay = max(self._paused_until - now, (needed - self._available) / self.rate)
+            delay = min(delay, 5.0)
+            time.sleep(delay)
+            waited += delay
+
+
+    def scale(self, factor: float):
+        """Adjust the refill rate, between 10% and 100% of the configured limit."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rate = min(self.limit, max(self.limit * 0.1, self.rate * factor))
+            self.capacity = max(1.0, self.rate * self.burst_seconds)
+
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._available = min(self._available, 0.0)
+
+
+def exhausted_limits(error: Exception) -> List[str]:
+    """Which limits a 429 reports as used up ("requests", "tokens"), from the x-ratelimit-remaining-* headers; [] if unknown."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    exhausted = []
+    for limit in ("requests", "tokens"):
+        value = headers.get(f"x-ratelimit-remaining-{limit}")
+        try:
+            if value is not None and float(value) <= 0:
+                exhausted.append(limit)
+        except ValueError:
+            pass
+    return exhausted
+
+
+def rate_limit_delay(error: Exception) -> Optional[float]:
+    """Seconds to wait if error is a 429 (Retry-After when the server sent one, else 0); None otherwise."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status != 429 and type(error).__name__ != "RateLimitError":
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value:
+            try:
+                return float(value) / (1000.0 if header.endswith("-ms") else 1.0)
+            except ValueError:
+                pass
+    return 0.0
+
+
+class EmbeddingCheckpoint:
+    """
+    Completed batches of one embedding job, saved as .npy files named by the
+    text range they cover, so a failed ingest resumes where it stopped.
+    Jobs are keyed by a hash of the embedding namespace and every input text.
+    """
+
+    def __init__(self, root: str, namespace: str, texts: List[str]):
+        digest = hashlib.sha256(namespace.encode("utf-8"))
+        for text in texts:
+            digest.update(hashlib.sha256(text.encode("utf-8")).digest())
+        self.directory = Path(root) / digest.hexdigest()[:32]
+
+
+    def load(self) -> Dict[Tuple[int, int], np.ndarray]:
+        done: Dict[Tuple[int, int], np.ndarray] = {}
+        if not self.directory.exists():
+            return done
+        for path in self.directory.glob("*.npy"):
+            try:
+                start, end = (int(part) for part in path.stem.split("-"))
+                done[(start, end)] = np.load(path)
+            except (ValueError, OSError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable embedding checkpoint {path.name}: {e}")
+        return done
+
+
+    def save(self, start: int, end: int, vectors: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f"{start:08d}-{end:08d}.part"
+        with open(tmp_path, "wb") as f:
+            np.save(f, vectors)
+        tmp_path.replace(self.directory / f"{start:08d}-{end:08d}.npy")
+
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds a large list of texts at the provider's allowed throughput.
+
+    Up to `max_in_flight` batches run concurrently. Each batch first takes one
+    unit from the request bucket and its token count (tiktoken) from the token
+    bucket. A 429 means the configured limits are higher than what the
+    provider grants (or the quota is shared): both buckets pause for
+    Retry-After (or an exponential backoff with jitter), the exhausted limit
+    (both if the response doesn't say) slows down by 20%, batches larger
+    than the token bucket's burst are halved, and the batch is requeued.
+    Other errors back off without slowing down. Each run of successes grows
+    the batch size (up to `max_batch_size`) and the rates (up to the
+    configured limits) again. Completed batches are checkpointed, so calling
+    embed() again with the same texts after a failure only embeds what is
+    missing.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        max_in_flight: int = 4,
+        batch_size: int = 64,
+        max_batch_size: int = 512,
+        max_batch_tokens: int = 200_000,
+        max_retries: int = 6,
+        checkpoint_path: Optional[str] = None
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.requests = TokenBucket("requests", requests_per_minute)
+        self.tokens = TokenBucket("tokens", tokens_per_minute)
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.max_batch_size = max(self.batch_size, max_batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        self._successes = 0
+        self._throttled_until = 0.0
+        self._lock = threading.Lock()
+
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        checkpoint = EmbeddingCheckpoint(self.checkpoint_path, self.namespace, texts) if self.checkpoint_path else None
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        if checkpoint is not None:
+            for (start, end), block in checkpoint.load().items():
+                if end <= len(texts) and len(block) == end - start:
+                    vectors[start:end] = list(block)
+            resumed = sum(v is not None for v in vectors)
+            if resumed:
+                logger.info(f"⏯️ Resuming embedding job: {resumed}/{len(texts)} texts already embedded")
+
+        token_counts = [count_tokens(text) for text in texts]
+        # (start, end, attempt) ranges still to embed; batches are cut from them as the size adapts
+        pending: Deque[Tuple[int, int, int]] = deque(self._missing_ranges(vectors))
+        started = time.perf_counter()
+        batches = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed") as pool:
+            in_flight: Dict[Future, Tuple[int, int, int]] = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_in_flight:
+                    start, end, attempt = pending.popleft()
+                    cut = self._cut(start, end, token_counts)
+                    if cut < end:
+                        pending.appendleft((cut, end, attempt))
+                    in_flight[pool.submit(self._run_batch, texts[start:cut], sum(token_counts[start:cut]))] = (start, cut, attempt)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end, attempt = in_flight.pop(future)
+                    try:
+                        block = np.asarray(future.result(), dtype=np.float32)
+                    except Exception as e:
+                        if attempt >= self.max_retries:
+                            for other in in_flight:
+                                other.cancel()
+                            logger.error(f"Embedding batch {start}-{end} failed after {attempt + 1} attempts: {e}")
+                            raise
+                        self._on_failure(e, attempt, sum(token_counts[start:end]))
+                        pending.appendleft((start, end, attempt + 1))
+                        continue
+                    vectors[start:end] = list(block)
+                    batches += 1
+                    self._on_success()
+                    if checkpoint is not None:
+                        checkpoint.save(start, end, block)
+
+        if checkpoint is not None:
+            checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        logger.info(f"🧮 Embedded {len(texts)} texts in {batches} batches, {elapsed:.1f}s (batch size now {self.batch_size})")
+        return [vector.tolist() for vector in vectors]
+
+
+    def _run_batch(self, texts: List[str], tokens: int) -> List[List[float]]:
+        waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+        if waited:
+            metrics.EMBEDDING_THROTTLED_SECONDS.inc(waited)
+        metrics.EMBEDDING_BATCH_SIZE.observe(len(texts))
+        return self.embeddings.embed_documents(texts)
+
+
+    def _cut(self, start: int, end: int, token_counts: List[int]) -> int:
+        """End of the next batch: at most batch_size texts and max_batch_tokens tokens (at least one text)."""
+        limit = min(end, start + self.batch_size)
+        tokens = token_counts[start]
+        cut = start + 1
+        while cut < limit and tokens + token_counts[cut] <= self.max_batch_tokens:
+            tokens += token_counts[cut]
+            cut += 1
+        return cut
+
+
+    def _on_success(self):
+        with self._lock:
+            self._successes += 1
+            if self._successes < 4:
+                return
+            self._successes = 0
+            self.batch_size = min(self.max_batch_size, int(self.batch_size * 1.5) + 1)
+        self.requests.scale(1.1)
+        self.tokens.scale(1.1)
+
+
+    def _on_failure(self, error: Exception, attempt: int, tokens: int):
+        """Back off before the batch is retried: the pause applies to every batch, not just this one."""
+        delay = rate_limit_delay(error)
+        pause = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+        if delay is None:
+            metrics.EMBEDDING_RETRIES.labels(reason="error").inc()
+            logger.warning(f"⚠️ Embedding batch failed ({type(error).__name__}: {error}), retrying in {pause:.1f}s")
+            self.requests.pause(pause)
+            return
+
+        pause = delay or pause
+        metrics.EMBEDDING_RETRIES.labels(reason="rate_limited").inc()
+        with self._lock:
+            self._successes = 0
+            # Batches sent together get rejected together; slow down once per pause
+            now = time.monotonic()
+            if now < self._throttled_until:
+                return
+            self._throttled_until = now + pause
+            if tokens > self.tokens.capacity:
+                self.batch_size = max(1, self.batch_size // 2)
+        buckets = {"requests": self.requests, "tokens": self.tokens}
+        for name in exhausted_limits(error) or buckets:
+            buckets[name].scale(0.8)
+        self.requests.pause(pause)
+        self.tokens.pause(pause)
+        logger.warning(f"🚦 Embedding rate limited, pausing {pause:.1f}s "
+                       f"({self.requests.rate * 60:.0f} rpm, {self.tokens.rate * 60:.0f} tpm, batch size {self.batch_size})")
+
+
+    @staticmethod
+    def _missing_ranges(vectors: List[Any]) -> List[Tuple[int, int, int]]:
+        ranges, start = [], None
+        for i, vector in enumerate(vectors):
+            if vector is None and start is None:
+                start = i
+            elif vector is not None and start is not None:
+                ranges.append((start, i, 0))
+                start = None
+        if start is not None:
+            ranges.append((start, len(vectors), 0))
+        return ranges
@@ -0,0 +1,56 @@
+from backend.services.logger import logger
+from pathlib import Path
+from typing import Optional
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only serialize threads of this process
+    fcntl = None
+
+
+class FileLock:
+    """
+    Re-entrant advisory lock on a lock file, shared by every process that
+    opens the same path (flock on POSIX). Threads of one process are
+    serialized by an RLock; the file lock is held while any of them is inside.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+        if fcntl is None:
+            logger.warning(f"⚠️ fcntl unavailable: {self.path.name} only locks within this process")
+
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a+")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+
+    def __exit__(self, *exc_info) -> Optional[bool]:
+        self.release()
+        return None
@@ -0,0 +1,227 @@
+from backend.services.logger import logger
+from backend.models.schemas import InteractionLog
+from typing import List, Dict, Optional, Iterator, Tuple, Any
+from dataclasses import asdict
+from pathlib import Path
+from datetime import datetime, timedelta
+import io
+import json
+import os
+import orjson
+import zstandard
+
+
+class HistoryArchive:
+    """Cold tier of the interaction history: zstd-compressed, append-only JSONL segments."""
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, archive_path: str, compression_level: int = 10):
+
+        """Open (or create) an archive directory."""
+        self.archive_path = Path(archive_path)
+        self.archive_path.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.manifest_file = self.archive_path / self.MANIFEST_NAME
+
+        # Only the manifest is read on startup - segments stay on disk until queried
+        self.manifest: Dict[str, Any] = self._load_manifest()
+
+
+    @property
+    def total_archived(self) -> int:
+        """Number of interactions ever moved into the archive (including expired ones)."""
+        return self.manifest["total_archived"]
+
+
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        return self.manifest["segments"]
+
+
+    def append_segment(self, interactions: List[InteractionLog]) -> Dict[str, Any]:
+
+        """Compress a batch of interactions into a new segment file."""
+        if not interactions:
+            return {}
+
+        first_index = self.manifest["total_archived"]
+        segment_id = self.manifest["next_segment"]
+        segment_file = self.archive_path / f"segment_{segment_id:06d}.jsonl.zst"
+
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        tmp_file = segment_file.with_suffix(".tmp")
+        with open(tmp_file, 'wb') as raw:
+            with compressor.stream_writer(raw, closefd=False) as writer:
+                for interaction in interactions:
+                    writer.write(orjson.dumps(asdict(interaction)))
+                    writer.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_file, segment_file)
+
+        segment = {
+            "file": segment_file.name,
+            "first_index": first_index,
+            "count": len(interactions),
+            "first_timestamp": interactions[0].timestamp,
+            "last_timestamp": interactions[-1].timestamp,
+            "bytes": segment_file.stat().st_size
+        }
+        self.manifest["segments"].append(segment)
+        self.manifest["total_archived"] = first_index + len(interactions)
+        self.manifest["next_segment"] = segment_id + 1
+        self._save_manifest()
+
+        logger.info(f"🗜️ Archived {len(interactions)} interactions to {segment_file.name} ({segment['bytes']} bytes)")
+        return segment
+
+
+    def iter_interactions(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        tool: Optional[str] = None,
+        feedback: Optional[str] = None,
+        contains: Optional[str] = None,
+        segments: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[Tuple[int, InteractionLog]]:
+
+        """
+        Stream archived interactions (oldest first) with their global index.
+        Segments outside the [since, until] window are skipped without decompressing.
+        `segments` restricts the read to a snapshot of the manifest taken earlier.
+        """
+        needle = contains.lower() if contains else None
+
+        for segment in list(self.segments if segments is None else segments):
+            if since and segment["last_timestamp"] < since:
+                continue
+            if until and segment["first_timestamp"] > until:
+                continue
+
+            for index, interaction in self._read_segment(segment):
+                if since and interaction.timestamp < since:
+                    continue
+                if until and interaction.timestamp > until:
+                    continue
+                if tool and tool not in interaction.tools_used:
+                    continue
+                if feedback and interaction.feedback != feedback:
+                    continue
+                if needle and needle not in interaction.query.lower() and needle not in interaction.response.lower():
+                    continue
+                yield index, interaction
+
+
+    def query(self, limit: Optional[int] = None, **filters) -> List[Tuple[int, InteractionLog]]:
+        """Return archived interactions matching the filters (see iter_interactions)."""
+        results = []
+        for item in self.iter_interactions(**filters):
+            results.append(item)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+
+    def get(self, index: int) -> Optional[InteractionLog]:
+        """Fetch a single archived interaction by its global index."""
+        found = self.get_range(index, index + 1)
+        return found[0][1] if found else None
+
+
+    def get_range(self, start: int, stop: int) -> List[Tuple[int, InteractionLog]]:
+        """Archived interactions with start <= global index < stop, reading only overlapping segments."""
+        results = []
+        for segment in self.segments:
+            if segment["first_index"] + segment["count"] <= start or segment["first_index"] >= stop:
+                continue
+            for index, interaction in self._read_segment(segment):
+                if start <= index < stop:
+                    results.append((index, interaction))
+        return results
+
+
+    def apply_retention(self, max_age_days: int = 0, max_bytes: int = 0) -> int:
+
+        """
+        Drop whole segments that are older than max_age_days or that push the
+        archive over max_bytes (oldest first). A value of 0 disables a policy.
+        """
+        dropped = 0
+
+        if max_age_days > 0:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            while self.segments and self.segments[0]["last_timestamp"] < cutoff:
+                self._drop_oldest_segment()
+                dropped += 1
+
+        if max_bytes > 0:
+            while self.segments and self.size_bytes() > max_bytes:
+                self._drop_oldest_segment()
+                dropped += 1
+
+        if dropped:
+            self._save_manifest()
+            logger.info(f"🧹 Retention dropped {dropped} archive segment(s)")
+        return dropped
+
+
+    def size_bytes(self) -> int:
+        return sum(segment["bytes"] for segment in self.segments)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary of the archive for status displays."""
+        return {
+            "segments": len(self.segments),
+            "interactions": sum(segment["count"] for segment in self.segments),
+            "total_archived": self.total_archived,
+            "bytes": self.size_bytes(),
+            "oldest": self.segments[0]["first_timestamp"] if self.segments else None
+        }
+
+
+    def clear(self):
+
+        """Delete every segment. Global indexes keep counting from total_archived."""
+        while self.segments:
+            self._drop_oldest_segment()
+        self._save_manifest()
+
+
+    def _read_segment(self, segment: Dict[str, Any]) -> Iterator[Tuple[int, InteractionLog]]:
+        segment_file = self.archive_path / segment["file"]
+        if not segment_file.exists():
+            logger.warning(f"⚠️ Archive segment missing: {segment_file}")
+            return
+
+        decompressor = zstandard.ZstdDecompressor()
+        with open(segment_file, 'rb') as raw:
+            with decompressor.stream_reader(raw) as reader:
+                for offset, line in enumerate(io.BufferedReader(reader)):
+                    yield segment["first_index"] + offset, InteractionLog(**orjson.loads(line))
+
+
+    def _drop_oldest_segment(self):
+        segment = self.segments.pop(0)
+        (self.archive_path / segment["file"]).unlink(missing_ok=True)
+
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load archive manifest: {e}")
+        return {"total_archived": 0, "next_segment": 0, "segments": []}
+
+
+    def _save_manifest(self):
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.manifest_file)
@@ -0,0 +1,142 @@
+from backend.services.logger import logger
+from backend.services import metrics
+from typing import Any, Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+import functools
+import inspect
+import threading
+import time
+
+
+class LaneOverloaded(Exception):
+    """Raised when a lane's wait queue is full or a request waited too long."""
+
+    def __init__(self, lane: str, message: str):
+        super().__init__(message)
+        self.lane = lane
+
+
+class LaneGate:
+    """
+    Concurrency limit plus a bounded wait queue for one class of work (a lane).
+
+    At most `concurrency` requests run at once; up to `max_waiting` more wait
+    for a slot (at most max_wait seconds). Anything beyond is rejected
+    immediately with LaneOverloaded, so a burst of slow ingests or exports
+    queues behind its own lane instead of the chat workers. Queue wait time,
+    depth, running count and rejections are exported per lane.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_waiting: int, max_wait: Optional[float] = None):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_waiting = max(0, max_waiting)
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+
+    def acquire(self):
+        """Take a slot, waiting in the lane's queue if needed (raises LaneOverloaded)."""
+        with self._lock:
+            if self._running + self._waiting >= self.concurrency + self.max_waiting:
+                metrics.LANE_REJECTED.labels(lane=self.name, reason="queue_full").inc()
+                raise LaneOverloaded(self.name, f"The {self.name} queue is full ({self._waiting} waiting)")
+            self._waiting += 1
+            metrics.LANE_WAITING.labels(lane=self.name).set(self._waiting)
+
+        started = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.max_wait)
+        waited = time.perf_counter() - started
+        metrics.LANE_QUEUE_WAIT.labels(lane=self.name).observe(waited)
+
+        with self._lock:
+            self._waiting -= 1
+            metrics.LANE_WAITING.labels(lane=self.name).set(self._waiting)
+            if acquired:
+                self._running += 1
+                metrics.LANE_RUNNING.labels(lane=self.name).set(self._running)
+
+        if not acquired:
+            metrics.LANE_REJECTED.labels(lane=self.name, reason="wait_timeout").inc()
+            raise LaneOverloaded(self.name, f"Waited {waited:.0f}s for a {self.name} slot")
+        if waited > 1:
+            logger.info(f"🚦 {self.name} request waited {waited:.1f}s for a slot")
+
+
+    def release(self):
+        with self._lock:
+            self._running -= 1
+            metrics.LANE_RUNNING.labels(lane=self.name).set(self._running)
+        self._slots.release()
+
+
+    @contextmanager
+    def enter(self) -> Iterator[None]:
+        """Hold a slot for the duration of the block (raises LaneOverloaded)."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+    def wrap(
+        self,
+        func: Callable[..., Any],
+        on_overload: Optional[Callable[[LaneOverloaded], Any]] = None
+    ) -> Callable[..., Any]:
+        """
+        Run func (a plain function or a generator function) inside this lane.
+        on_overload turns a rejection into a result (or a UI error) instead of raising.
+        """
+        def rejected(error: LaneOverloaded):
+            if on_overload is None:
+                raise error
+            return on_overload(error)
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def gated_generator(*args, **kwargs):
+                try:
+                    self.acquire()
+                except LaneOverloaded as e:
+                    yield rejected(e)
+                    return
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    self.release()
+            return gated_generator
+
+        @functools.wraps(func)
+        def gated(*args, **kwargs):
+            try:
+                self.acquire()
+            except LaneOverloaded as e:
+                return rejected(e)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.release()
+        return gated
+
+
+def create_lanes(specs: Dict[str, Dict[str, int]], max_wait: Optional[float] = None) -> Dict[str, LaneGate]:
+    """LaneGates from {"chat": {"concurrency": 16, "queue": 64}, ...}."""
+    return {
+        name: LaneGate(name, spec["concurrency"], spec["queue"], max_wait)
+        for name, spec in specs.items()
+    }
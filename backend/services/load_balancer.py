@@ -0,0 +1,120 @@
+from backend.services.logger import logger
+from typing import List, Optional, Set
+import asyncio
+import hashlib
+
+
+UNAVAILABLE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\nRetry-After: 2\r\nConnection: close\r\nContent-Length: 32\r\n\r\n"
+    b"No worker is ready, retry soon.\n"
+)
+
+
+class Backend:
+    """One worker endpoint as seen by the load balancer."""
+
+    def __init__(self, name: str, host: str, port: int):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.ready = False       # passing readiness checks
+        self.draining = False    # finishing in-flight work, no new connections
+        self.connections = 0     # proxied connections currently open
+
+
+    @property
+    def routable(self) -> bool:
+        return self.ready and not self.draining
+
+
+    def __repr__(self) -> str:
+        return f"{self.name}@{self.host}:{self.port}"
+
+
+class StickyLoadBalancer:
+    """
+    TCP proxy that spreads clients over worker processes.
+
+    Each client IP is pinned to one routable backend by rendezvous hashing, so
+    all of a browser's connections (page, queue stream, uploads) reach the
+    worker that holds its session, and a worker leaving or rejoining rotation
+    only moves its own clients. Backends refusing connections are skipped.
+    """
+
+    def __init__(self, backends: List[Backend], host: str, port: int, connect_timeout: float = 5.0):
+        self.backends = backends
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+
+
+    def pick(self, client_ip: str, exclude: Set[str] = frozenset()) -> Optional[Backend]:
+        candidates = [b for b in self.backends if b.routable and b.name not in exclude]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda b: hashlib.blake2b(f"{client_ip}|{b.name}".encode(), digest_size=8).digest())
+
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"⚖️ Load balancer listening on {self.host}:{self.port} ({len(self.backends)} workers)")
+
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        client_ip = (client_writer.get_extra_info("peername") or ("unknown",))[0]
+        tried: Set[str] = set()
+
+        while True:
+            backend = self.pick(client_ip, tried)
+            if backend is None:
+                client_writer.write(UNAVAILABLE)
+                await self._close(client_writer)
+                return
+            try:
+                upstream_reader, upstream_writer = await asyncio.wait_for(
+                    asyncio.open_connection(backend.host, backend.port), self.connect_timeout
+                )
+                break
+            except (OSError, asyncio.TimeoutError) as e:
+                logger.warning(f"⚖️ {backend} refused a connection: {e}")
+                tried.add(backend.name)
+
+        backend.connections += 1
+        try:
+            await asyncio.gather(
+                self._pipe(client_reader, upstream_writer),
+                self._pipe(upstream_reader, client_writer)
+            )
+        finally:
+            backend.connections -= 1
+            await self._close(upstream_writer)
+            await self._close(client_writer)
+
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError):
+            writer.close()
+
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
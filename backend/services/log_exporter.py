@@ -0,0 +1,93 @@
+from backend.services.logger import logger
+from typing import Dict, Optional, Any, Callable, BinaryIO
+from pathlib import Path
+import os
+import time
+import orjson
+import zstandard
+
+
+class LogExporter:
+    """Streams interaction history to JSONL, one record at a time."""
+
+    def __init__(self, memory_manager, compression_level: int = 3, progress_every: int = 500):
+        self.memory_manager = memory_manager
+        self.compression_level = compression_level
+        self.progress_every = max(1, progress_every)
+
+
+    def export(
+        self,
+        filepath: str,
+        compress: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        feedback: Optional[str] = None,
+        include_archive: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Export interactions as JSONL (optionally zstd-compressed).
+
+        Args:
+            filepath: Target file; compression defaults to on for a ".zst" suffix
+            since/until: ISO timestamp bounds (inclusive)
+            feedback: Only export interactions with this feedback value
+            include_archive: Also stream archived segments
+            progress_callback: Called as (records_written, records_scanned_estimate)
+
+        Returns:
+            Dict with success flag, record count, bytes written and duration
+        """
+        target = Path(filepath)
+        if compress is None:
+            compress = target.suffix == ".zst"
+
+        estimate = len(self.memory_manager.interaction_history)
+        if include_archive:
+            estimate += self.memory_manager.archive.stats()["interactions"]
+
+        tmp_file = target.with_name(target.name + ".tmp")
+        started = time.perf_counter()
+        written = 0
+
+        try:
+            with open(tmp_file, 'wb') as raw:
+                out: BinaryIO = raw
+                writer = None
+                if compress:
+                    writer = zstandard.ZstdCompressor(level=self.compression_level).stream_writer(raw, closefd=False)
+                    out = writer
+
+                records = self.memory_manager.iter_history(
+                    include_archive=include_archive, since=since, until=until, feedback=feedback
+                )
+                for _, interaction in records:
+                    # orjson serializes dataclasses natively - no asdict() copy
+                    out.write(orjson.dumps(interaction, option=orjson.OPT_APPEND_NEWLINE))
+                    written += 1
+                    if progress_callback and written % self.progress_every == 0:
+                        progress_callback(written, estimate)
+
+                if writer is not None:
+                    writer.close()
+
+            os.replace(tmp_file, target)
+        except Exception as e:
+            tmp_file.unlink(missing_ok=True)
+            logger.error(f"Failed to export logs: {e}")
+            return {'success': False, 'error': str(e), 'records': written}
+
+        if progress_callback:
+            progress_callback(written, estimate)
+
+        result = {
+            'success': True,
+            'filepath': str(target),
+            'records': written,
+            'bytes': target.stat().st_size,
+            'compressed': compress,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        logger.info(f"Logs exported to {target} ({written} records, {result['bytes']} bytes)")
+        return result
@@ -1,82 +1,315 @@
 from backend.services.logger import logger
+from backend.services.file_lock import FileLock
+from backend.services.history_archive import HistoryArchive
+from backend.services.paged_history import PagedHistory
 from backend.models.schemas import InteractionLog
-from typing import List, Dict
+from backend.models.columnar import InteractionColumns
+from backend.config.settings import settings
+from typing import List, Dict, Optional, Iterator, Tuple
 from pathlib import Path
 from datetime import datetime
+import os
 import pickle
 
 
 class MemoryManager:
     """Manages conversation memory and interaction history."""
-    
-    def __init__(self, memory_path: str = "memory_store_old"):
+
+    def __init__(
+        self,
+        memory_path: str = "memory_store_old",
+        hot_limit: Optional[int] = None,
+        segment_size: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        archive_max_mb: Optional[int] = None
+    ):
 
         """Initialize memory management system."""
         self.memory_path = Path(memory_path)
         self.memory_path.mkdir(exist_ok=True)
-        
-        # Long-term interaction history
-        self.interaction_history: List[InteractionLog] = []
-        
-        # Load existing memory
-        self._load_memory()
-        
+
+        # Retention policy
+        self.hot_limit = hot_limit if hot_limit is not None else settings.history_hot_limit
+        self.segment_size = max(1, segment_size if segment_size is not None else settings.history_segment_size)
+        self.retention_days = retention_days if retention_days is not None else settings.history_retention_days
+        self.archive_max_bytes = (archive_max_mb if archive_max_mb is not None else settings.history_archive_max_mb) * 1024 * 1024
+
+        # Serializes writers (concurrent chats, feedback clicks) across threads
+        # and across worker processes sharing memory_path
+        self._lock = FileLock(self.memory_path / ".lock")
+
+        # Bumped on disk by every save; another process's bump means our tiers are stale
+        self._generation_file = self.memory_path / "generation"
+
+        with self._lock:
+            self._open_tiers()
+
+            # Load existing memory
+            self._load_memory()
+
         logger.info("Memory Manager initialized")
 
 
-    def add_interaction(self, query: str, response: str, agent_steps: List[Dict], tools_used: List[str]):
+    @property
+    def base_index(self) -> int:
+        """Global index of interaction_history[0]."""
+        return self.interaction_history.base_index
+
+
+    @property
+    def total_interactions(self) -> int:
+        """Number of interactions ever recorded (archived + hot), across all processes."""
+        with self._lock:
+            self._refresh()
+            return self.base_index + len(self.interaction_history)
 
-        """Add a new interaction to memory."""
+
+    def add_interaction(self, query: str, response: str, agent_steps: List[Dict], tools_used: List[str],
+                        trace: Optional[Dict] = None) -> int:
+
+        """Add a new interaction (with its finished request trace) to memory and return its global index."""
         interaction = InteractionLog(
             timestamp=datetime.now().isoformat(),
             query=query,
             response=response,
             agent_steps=agent_steps,
-            tools_used=tools_used
+            tools_used=tools_used,
+            trace=trace
         )
-        self.interaction_history.append(interaction)
-        
-        # Save after every interaction
-        self._save_memory()
-        
-        logger.info(f"Interaction saved (total: {len(self.interaction_history)})")
+        with self._lock:
+            self._refresh()
+            self.interaction_history.append(interaction)
+            interaction_index = self.base_index + len(self.interaction_history) - 1
+
+            # Move the oldest segments out of the hot tier when it grows too large.
+            # On failure everything stays hot and the next interaction retries.
+            if self.hot_limit > 0 and len(self.interaction_history) > self.hot_limit:
+                try:
+                    self._compact()
+                except Exception as e:
+                    logger.error(f"History compaction failed, keeping records in the hot tier: {e}")
+
+            # Save after every interaction
+            self._save_memory()
+
+        logger.info(f"Interaction saved (total: {interaction_index + 1})")
+        return interaction_index
 
 
     def add_feedback(self, interaction_index: int, feedback: str):
 
-        """Add user feedback to a specific interaction."""
-        if 0 <= interaction_index < len(self.interaction_history):
-            self.interaction_history[interaction_index].feedback = feedback
-            self.interaction_history[interaction_index].feedback_timestamp = datetime.now().isoformat()
-            self._save_memory()
-            logger.info(f"👍/👎 Feedback added to interaction {interaction_index}")
+        """Add user feedback to a specific interaction (global index)."""
+        with self._lock:
+            self._refresh()
+            local_index = interaction_index - self.base_index
+            if 0 <= local_index < len(self.interaction_history):
+                interaction = self.interaction_history[local_index]
+                interaction.feedback = feedback
+                interaction.feedback_timestamp = datetime.now().isoformat()
+                self.interaction_history.mark_dirty(local_index)
+                self._save_memory()
+                logger.info(f"👍/👎 Feedback added to interaction {interaction_index}")
+            elif 0 <= interaction_index < self.base_index:
+                logger.warning(f"⚠️ Interaction {interaction_index} is archived; feedback not recorded")
+
+
+    def get_recent(self, num_interactions: int = 10) -> List[InteractionLog]:
+        """Most recent interactions from the hot tier (served from the tail window)."""
+        if num_interactions <= 0:
+            return []
+        with self._lock:
+            self._refresh()
+            return self.interaction_history[-num_interactions:]
+
+
+    def get_history_page(self, before: Optional[int] = None, limit: int = 50) -> List[Tuple[int, InteractionLog]]:
+
+        """
+        Load one page of older history on demand: up to `limit` interactions
+        with a global index below `before` (defaults to the newest), oldest first.
+        """
+        with self._lock:
+            stop = self.total_interactions if before is None else min(before, self.total_interactions)
+            start = max(0, stop - limit)
+
+            page: List[Tuple[int, InteractionLog]] = []
+            if start < self.base_index:
+                page.extend(self.archive.get_range(start, min(stop, self.base_index)))
+
+            hot_start = max(start, self.base_index) - self.base_index
+            hot_stop = stop - self.base_index
+            if hot_stop > hot_start:
+                records = self.interaction_history[hot_start:hot_stop]
+                page.extend((self.base_index + hot_start + i, record) for i, record in enumerate(records))
+            return page
+
+
+    def search_history(self, limit: Optional[int] = None, **filters) -> List[Tuple[int, InteractionLog]]:
+
+        """
+        Query archived and hot interactions (oldest first).
+        Filters: since, until, tool, feedback, contains (see HistoryArchive.iter_interactions).
+        """
+        results = []
+        for item in self.iter_history(**filters):
+            results.append(item)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+
+    def iter_history(self, include_archive: bool = True, **filters) -> Iterator[Tuple[int, InteractionLog]]:
+
+        """Stream (global index, interaction) pairs across both tiers, oldest first."""
+        # Snapshot both tiers under the lock, then yield without it: a compaction
+        # in between moves hot pages into new segments, which would otherwise be
+        # skipped or read twice, and a paused consumer must not hold the lock
+        with self._lock:
+            self._refresh()
+            segments = list(self.archive.segments) if include_archive else []
+            base_index = self.base_index
+            hot_records = list(self.interaction_history)
+
+        if include_archive:
+            yield from self.archive.iter_interactions(segments=segments, **filters)
+
+        since, until = filters.get("since"), filters.get("until")
+        tool, feedback = filters.get("tool"), filters.get("feedback")
+        needle = filters["contains"].lower() if filters.get("contains") else None
+
+        for offset, interaction in enumerate(hot_records):
+            if since and interaction.timestamp < since:
+                continue
+            if until and interaction.timestamp > until:
+                continue
+            if tool and tool not in interaction.tools_used:
+                continue
+            if feedback and interaction.feedback != feedback:
+                continue
+            if needle and needle not in interaction.query.lower() and needle not in interaction.response.lower():
+                continue
+            yield base_index + offset, interaction
+
 
-    
-    def clear_memory(self):
+    def to_columns(self, include_archive: bool = False, keep_text: bool = True, **filters) -> InteractionColumns:
 
-        """Clear all interaction history."""
-        self.interaction_history = []
-        self._save_memory()
+        """Compact columnar snapshot of the history for vectorized stats."""
+        return InteractionColumns.from_history(self.iter_history(include_archive=include_archive, **filters), keep_text=keep_text)
+
+
+    def clear_memory(self, purge_archive: bool = False):
+
+        """
+        Clear the active conversation history. The hot tier is moved into the
+        archive (still subject to retention) unless purge_archive is set.
+        """
+        with self._lock:
+            self._refresh()
+            if purge_archive:
+                self.archive.clear()
+            else:
+                while len(self.interaction_history):
+                    self._archive_hot_records(self.segment_size)
+
+            self.interaction_history.clear(max(self.archive.total_archived, self.total_interactions))
+            self._save_memory()
         logger.info("🗑️ All conversation history cleared")
-    
-    
+
+
+    def _compact(self):
+
+        """Archive the oldest hot records, one segment at a time, then apply retention."""
+        while len(self.interaction_history) > self.hot_limit:
+            self._archive_hot_records(min(self.segment_size, len(self.interaction_history) - self.hot_limit))
+
+        self.archive.apply_retention(self.retention_days, self.archive_max_bytes)
+
+
+    def _archive_hot_records(self, max_records: int):
+        # Whole pages only, so the hot tier always starts on a page boundary.
+        # The segment is durable before its pages are deleted; a failure in
+        # between leaves them in both tiers and _load_memory drops the copies.
+        self.archive.append_segment(self.interaction_history.peek_oldest(max_records))
+        self.interaction_history.drop_before(self.archive.total_archived)
+
+
     def _save_memory(self):
 
-        """Save interaction history to disk."""
-        history_file = self.memory_path / "interaction_history.pkl"
-        with open(history_file, 'wb') as f:
-            pickle.dump(self.interaction_history, f)
-        logger.info(f"💾 Memory saved to {history_file}")
-    
+        """Save modified hot-tier pages to disk and tell other processes (call with the lock held)."""
+        self.interaction_history.flush()
+        # Only read under the lock, so an in-place write is safe
+        self._generation += 1
+        self._generation_file.write_text(str(self._generation))
+        logger.info(f"💾 Memory saved to {self.interaction_history.pages_path}")
+
+
+    def _open_tiers(self):
+
+        """(Re)open both tiers from disk at the current generation."""
+        self._generation = self._read_generation()
+
+        # Cold tier: compressed segments of older interactions
+        self.archive = HistoryArchive(self.memory_path / "archive", settings.history_compression_level)
+
+        # Hot tier: recent interaction history (uncompressed pages, only the tail is loaded)
+        self.interaction_history = PagedHistory(
+            self.memory_path / "pages",
+            page_size=settings.history_page_size,
+            tail_window=settings.history_tail_window,
+            cache_pages=settings.history_page_cache
+        )
+
+
+    def _refresh(self):
+
+        """Reopen the tiers if another process saved since we last did (call with the lock held)."""
+        if self._read_generation() != self._generation:
+            self._open_tiers()
+            logger.info(f"🔄 History reloaded (generation {self._generation}, changed by another process)")
+
+
+    def _read_generation(self) -> int:
+        try:
+            return int(self._generation_file.read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
 
     def _load_memory(self):
 
-        """Load interaction history from disk."""
-        history_file = self.memory_path / "interaction_history.pkl"
-        if history_file.exists():
-            try:
-                with open(history_file, 'rb') as f:
-                    self.interaction_history = pickle.load(f)
-                logger.info(f"📂 Loaded {len(self.interaction_history)} past interactions")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not load memory: {e}")
+        """Open the hot tier; only the tail window is read from disk."""
+        legacy_file = self.memory_path / "interaction_history.pkl"
+        if legacy_file.exists() and not len(self.interaction_history):
+            self._migrate_legacy_history(legacy_file)
+
+        # A crash between archiving and saving leaves archived pages in the hot tier
+        dropped = self.interaction_history.drop_before(self.archive.total_archived)
+        if dropped:
+            logger.info(f"♻️ Dropped {dropped} hot interactions that were already archived")
+
+        logger.info(
+            f"📂 Opened {len(self.interaction_history)} past interactions "
+            f"({self.interaction_history.loaded_pages} page(s) loaded, {self.archive.total_archived} archived)"
+        )
+
+
+    def _migrate_legacy_history(self, legacy_file: Path):
+
+        """One-time conversion of a single-pickle history file into pages."""
+        try:
+            with open(legacy_file, 'rb') as f:
+                data = pickle.load(f)
+            if isinstance(data, list):
+                data = {"base_index": 0, "interactions": data}
+
+            interactions = data["interactions"]
+            already_archived = max(0, self.archive.total_archived - data["base_index"])
+            self.interaction_history.clear(data["base_index"] + already_archived)
+            for interaction in interactions[already_archived:]:
+                self.interaction_history.append(interaction)
+            self.interaction_history.flush()
+
+            os.replace(legacy_file, legacy_file.with_suffix(".pkl.migrated"))
+            logger.info(f"📦 Migrated {len(interactions)} interactions from {legacy_file.name} to paged storage")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load memory: {e}")
@@ -0,0 +1,119 @@
+from backend.services.logger import logger
+from typing import Any, Callable, Iterator
+from contextlib import contextmanager
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+
+# Latency buckets (seconds): agent turns take seconds, local tools milliseconds
+CHAT_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+QUEUE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CHAT_LATENCY = Histogram("chatbot_chat_latency_seconds", "End-to-end AgenticRAG.chat latency", buckets=CHAT_BUCKETS)
+TOOL_LATENCY = Histogram("chatbot_tool_latency_seconds", "Tool call latency", ["tool"], buckets=FAST_BUCKETS)
+EMBEDDING_LATENCY = Histogram("chatbot_embedding_latency_seconds", "Embedding request latency", ["operation"], buckets=FAST_BUCKETS)
+PDF_LATENCY = Histogram("chatbot_process_pdf_latency_seconds", "process_pdf latency", buckets=CHAT_BUCKETS)
+
+ERRORS = Counter("chatbot_errors_total", "Errors by component", ["component"])
+PARSING_RETRIES = Counter("chatbot_parsing_error_retries_total", "Agent output parsing errors that cost another iteration")
+CACHE_LOOKUPS = Counter("chatbot_tool_cache_lookups_total", "Tool result cache lookups", ["tool", "result"])
+LLM_RETRIES = Counter("chatbot_llm_retries_total", "LLM calls retried after a transient error")
+LLM_HEDGES = Counter("chatbot_llm_hedged_requests_total", "Duplicate LLM requests sent after the hedge delay")
+DEADLINE_EXCEEDED = Counter("chatbot_deadline_exceeded_total", "Requests that ran out of time budget")
+COALESCED_REQUESTS = Counter("chatbot_coalesced_requests_total", "Chat requests served by another identical in-flight request")
+SPECULATIVE_RETRIEVALS = Counter("chatbot_speculative_retrievals_total", "Speculative document searches by outcome (hit, miss, discarded)", ["result"])
+TOOL_REJECTED = Counter("chatbot_tool_rejected_total", "Tool calls answered with an unavailable observation (timeout, circuit_open, busy)", ["tool", "reason"])
+LANE_REJECTED = Counter("chatbot_lane_rejected_total", "UI requests rejected by their lane (queue_full, wait_timeout)", ["lane", "reason"])
+LANE_QUEUE_WAIT = Histogram("chatbot_lane_queue_wait_seconds", "Time UI requests waited for a slot in their lane", ["lane"], buckets=QUEUE_BUCKETS)
+EMBEDDING_RETRIES = Counter("chatbot_embedding_retries_total", "Ingest embedding batches retried (rate_limited, error)", ["reason"])
+EMBEDDING_THROTTLED_SECONDS = Counter("chatbot_embedding_throttled_seconds_total", "Time ingest embedding batches waited for the rate limiter")
+EMBEDDING_BATCH_SIZE = Histogram("chatbot_embedding_batch_size", "Texts per ingest embedding request", buckets=(1, 8, 16, 32, 64, 128, 256, 512, 1024, 2048))
+
+INDEX_SIZE = Gauge("chatbot_vector_index_size", "Vectors in the active FAISS index")
+SESSIONS = Gauge("chatbot_active_sessions", "Open UI sessions")
+HISTORY_SIZE = Gauge("chatbot_history_interactions", "Interactions in history by tier", ["tier"])
+LANE_WAITING = Gauge("chatbot_lane_waiting", "UI requests waiting for a slot, by lane", ["lane"])
+LANE_RUNNING = Gauge("chatbot_lane_running", "UI requests running, by lane", ["lane"])
+TOOL_CIRCUIT_OPEN = Gauge("chatbot_tool_circuit_open", "1 while a tool's circuit breaker is open or half-open", ["tool"])
+IN_FLIGHT = Gauge("chatbot_requests_in_flight", "Chat and ingest requests being processed")
+
+
+_server_lock = threading.Lock()
+_server_started = False
+_sessions = 0
+_in_flight = 0
+
+
+def start_metrics_server(port: int) -> bool:
+    """Expose /metrics on a side port (idempotent; port 0 disables)."""
+    global _server_started
+    if port <= 0:
+        return False
+    with _server_lock:
+        if _server_started:
+            return True
+        try:
+            start_http_server(port)
+            _server_started = True
+            logger.info(f"📈 Prometheus metrics on http://0.0.0.0:{port}/metrics")
+        except OSError as e:
+            logger.warning(f"⚠️ Metrics server not started on port {port}: {e}")
+        return _server_started
+
+
+def session_started():
+    global _sessions
+    with _server_lock:
+        _sessions += 1
+        SESSIONS.set(_sessions)
+
+
+def session_ended():
+    global _sessions
+    with _server_lock:
+        _sessions = max(0, _sessions - 1)
+        SESSIONS.set(_sessions)
+
+
+def active_sessions() -> int:
+    return _sessions
+
+
+@contextmanager
+def in_flight() -> Iterator[None]:
+    """Count a chat/ingest request while it runs (the launcher drains workers on this)."""
+    global _in_flight
+    with _server_lock:
+        _in_flight += 1
+        IN_FLIGHT.set(_in_flight)
+    try:
+        yield
+    finally:
+        with _server_lock:
+            _in_flight -= 1
+            IN_FLIGHT.set(_in_flight)
+
+
+def requests_in_flight() -> int:
+    return _in_flight
+
+
+def observe_tool(tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a tool function with latency and error metrics."""
+    histogram = TOOL_LATENCY.labels(tool=tool_name)
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            ERRORS.labels(component="tool").inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    timed.__name__ = getattr(func, "__name__", tool_name)
+    return timed
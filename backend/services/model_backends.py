@@ -0,0 +1,449 @@
+from backend.services.logger import logger
+from backend.config.settings import settings
+from backend.services import metrics
+from backend.services.embedding_providers import ParallelEmbeddings, SentenceTransformerEmbeddings, embedding_namespace
+from typing import List, Dict, Optional, Any
+from pathlib import Path
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+import numpy as np
+from pydantic import PrivateAttr
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class LatencyModel:
+    """
+    Simulated latency distribution, parsed from a spec string:
+    "none", "fixed:0.2", "uniform:0.1,0.5", "normal:0.8,0.2" or "lognormal:0.8,0.5"
+    (lognormal takes the median and sigma). Values are seconds.
+    """
+
+    def __init__(self, spec: str = "none", seed: Optional[int] = None):
+        self.spec = spec or "none"
+        kind, _, params = self.spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Picklable for embedding worker processes (the lock is recreated there)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._random.uniform(self.params[0], self.params[1])
+            if self.kind == "normal":
+                return max(0.0, self._random.gauss(self.params[0], self.params[1]))
+            if self.kind == "lognormal":
+                return self._random.lognormvariate(math.log(self.params[0]), self.params[1])
+            return 0.0
+
+    def sleep(self) -> float:
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+# Arithmetic in a prompt, e.g. "17*23 + 4"
+_ARITHMETIC = re.compile(r"[\d\.\s\+\-\*/\(\)]*\d\s*[\+\-\*/]\s*[\d\.\s\+\-\*/\(\)]+")
+
+
+def _messages_key(messages: List[BaseMessage], stop: Optional[List[str]], tools: Optional[List[Dict[str, Any]]] = None) -> str:
+    items: List[Any] = [[m.type, m.content, getattr(m, "tool_calls", None) or []] if getattr(m, "tool_calls", None) else [m.type, m.content] for m in messages]
+    items.append(stop or [])
+    if tools:
+        items.append(sorted(tool["function"]["name"] for tool in tools))
+    payload = json.dumps(items, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _Cassette:
+    """Append-only JSONL file of recorded interactions, indexed by key."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, List[Any]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.entries.setdefault(record["key"], []).append(record["value"])
+            logger.info(f"📼 Loaded {sum(len(v) for v in self.entries.values())} recordings from {self.path}")
+
+    def record(self, key: str, value: Any):
+        with self._lock:
+            self.entries.setdefault(key, []).append(value)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({"key": key, "value": value}) + "\n")
+
+    def replay(self, key: str) -> Optional[Any]:
+        """Next recording for a key; repeated keys cycle through their recordings in order."""
+        with self._lock:
+            values = self.entries.get(key)
+            if not values:
+                return None
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+            return values[cursor % len(values)]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with deterministic output. It speaks the conversational
+    ReAct format well enough to drive the agent: document questions trigger one
+    DocumentSearch step, arithmetic triggers Calculator, then it answers.
+    """
+
+    latency: str = "none"
+    _latency_model: LatencyModel = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._latency_model = LatencyModel(self.latency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> ChatResult:
+        self._latency_model.sleep()
+        if kwargs.get("tools"):
+            message = self._respond_with_tools(messages, [tool["function"]["name"] for tool in kwargs["tools"]])
+        else:
+            message = AIMessage(content=self._respond(str(messages[-1].content) if messages else ""))
+        input_tokens = sum(len(str(m.content)) // 4 for m in messages)
+        output_tokens = (len(str(message.content)) + len(json.dumps(message.tool_calls))) // 4
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _plan(question: str) -> str:
+        """Query-planner reply: one sub-query per "and"/comma-separated part."""
+        parts = [p.strip(" ?.") for p in re.split(r",|;|\band\b", question) if p.strip(" ?.")]
+        if len(parts) < 2:
+            return "[]"
+        document = any(word in question.lower() for word in ("document", "pdf", "file"))
+        plan = []
+        for part in parts:
+            expression = _ARITHMETIC.search(part)
+            if expression:
+                plan.append({"tool": "Calculator", "input": expression.group(0).strip()})
+            else:
+                plan.append({"tool": "DocumentSearch" if document else "DirectAnswer", "input": part})
+        return json.dumps(plan)
+
+    @staticmethod
+    def _respond_with_tools(messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+        """Native tool-calling turn: request every matching tool at once, then answer from their results."""
+        observations = []
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            observations.insert(0, str(message.content))
+        if observations:
+            return AIMessage(content=f"Based on the tools: {' | '.join(o[:300] for o in observations)}")
+
+        user_input = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        lowered = user_input.lower()
+        calls = []
+        if "DocumentSearch" in tool_names and any(word in lowered for word in ("document", "pdf", "file")):
+            calls.append(("DocumentSearch", user_input))
+        expression = _ARITHMETIC.search(user_input)
+        if "Calculator" in tool_names and expression:
+            calls.append(("Calculator", expression.group(0).strip()))
+        if not calls:
+            return AIMessage(content=f"Fake answer to: {user_input}")
+
+        tool_calls = [
+            {"name": name, "args": {"__arg1": argument}, "id": f"call_{hashlib.md5(f'{i}{argument}'.encode()).hexdigest()[:12]}", "type": "tool_call"}
+            for i, (name, argument) in enumerate(calls)
+        ]
+        return AIMessage(content="", tool_calls=tool_calls)
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        if "independent sub-questions" in prompt:
+            return FakeChatModel._plan(prompt.rsplit("Question:", 1)[1].strip())
+        if "New input:" not in prompt:
+            return f"Fake answer: {prompt.strip()[:200]}"
+
+        turn = prompt.rsplit("New input:", 1)[1]
+        user_input = turn.split("\n", 1)[0].strip()
+        if "Observation:" in turn:
+            observation = turn.rsplit("Observation:", 1)[1].split("\nThought:", 1)[0].strip()
+            return f"Thought: Do I need to use a tool? No\nAI: Based on the tools: {observation[:300]}"
+
+        lowered = user_input.lower()
+        if any(word in lowered for word in ("document", "pdf", "file")):
+            return f"Thought: Do I need to use a tool? Yes\nAction: DocumentSearch\nAction Input: {user_input}"
+        expression = _ARITHMETIC.search(user_input)
+        if expression:
+            return f"Thought: Do I need to use a tool? Yes\nAction: Calculator\nAction Input: {expression.group(0).strip()}"
+        return f"Thought: Do I need to use a tool? No\nAI: Fake answer to: {user_input}"
+
+
+class RecordingChatModel(BaseChatModel):
+    """Passes calls to a real model and appends every exchange to a cassette file."""
+
+    inner: BaseChatModel
+    cassette_path: str
+    _cassette: _Cassette = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._cassette = _Cassette(Path(self.cassette_path))
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> ChatResult:
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+        self._cassette.record(_messages_key(messages, stop, kwargs.get("tools")), {
+            "content": message.content,
+            "tool_calls": list(getattr(message, "tool_calls", None) or []),
+            "usage": dict(getattr(message, "usage_metadata", None) or {}),
+            "llm_output": result.llm_output or {}
+        })
+        return result
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded exchanges with simulated latency; unknown prompts fall back to FakeChatModel."""
+
+    cassette_path: str
+    latency: str = "none"
+    strict: bool = False
+    _cassette: _Cassette = PrivateAttr()
+    _latency_model: LatencyModel = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._cassette = _Cassette(Path(self.cassette_path))
+        self._latency_model = LatencyModel(self.latency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> ChatResult:
+        self._latency_model.sleep()
+        recorded = self._cassette.replay(_messages_key(messages, stop, kwargs.get("tools")))
+        if recorded is None:
+            if self.strict:
+                raise KeyError("No recording for this prompt")
+            if kwargs.get("tools"):
+                fallback = FakeChatModel._respond_with_tools(messages, [tool["function"]["name"] for tool in kwargs["tools"]])
+            else:
+                fallback = AIMessage(content=FakeChatModel._respond(str(messages[-1].content) if messages else ""))
+            recorded = {"content": fallback.content, "tool_calls": fallback.tool_calls, "usage": {}, "llm_output": {}}
+
+        message = AIMessage(content=recorded["content"], tool_calls=recorded.get("tool_calls", []), usage_metadata=recorded["usage"] or None)
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output=recorded["llm_output"])
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings: signed feature hashing of lowercase word
+    tokens, L2-normalized, so texts sharing words land close together.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: str = "none"):
+        self.dimensions = dimensions
+        self.latency_model = LatencyModel(latency)
+        self.namespace = f"hash-{dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.latency_model.sleep()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency_model.sleep()
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if (digest >> 63) & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+
+class RecordingEmbeddings(Embeddings):
+    """Passes calls to real embeddings and records every vector by text hash."""
+
+    def __init__(self, inner: Embeddings, cassette_path: str):
+        self.inner = inner
+        self.cassette = _Cassette(Path(cassette_path))
+        self.namespace = embedding_namespace(inner)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.inner.embed_documents(texts)
+        for text, vector in zip(texts, vectors):
+            self.cassette.record(_text_key(text), vector)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.inner.embed_query(text)
+        self.cassette.record(_text_key(text), vector)
+        return vector
+
+
+class ReplayEmbeddings(Embeddings):
+    """Serves recorded vectors with simulated latency; unknown texts fall back to HashEmbeddings."""
+
+    def __init__(self, cassette_path: str, latency: str = "none", dimensions: int = 1536):
+        self.cassette = _Cassette(Path(cassette_path))
+        self.latency_model = LatencyModel(latency)
+        recorded = next(iter(self.cassette.entries.values()), None)
+        self.fallback = HashEmbeddings(len(recorded[0]) if recorded else dimensions)
+        # Recorded vectors mixed with hash fallbacks: never share an index with the live provider
+        self.namespace = f"replay-{self.fallback.dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.latency_model.sleep()
+        return [self._lookup(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency_model.sleep()
+        return self._lookup(text)
+
+    def _lookup(self, text: str) -> List[float]:
+        vector = self.cassette.replay(_text_key(text))
+        return vector if vector is not None else self.fallback._embed(text)
+
+
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper that records request latency."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.namespace = embedding_namespace(embeddings)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with metrics.EMBEDDING_LATENCY.labels(operation="documents").time():
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with metrics.EMBEDDING_LATENCY.labels(operation="query").time():
+            return self.embeddings.embed_query(text)
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def shared_http_client():
+    """One keep-alive connection pool for every OpenAI request in the process."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            import httpx
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_keepalive
+                ),
+                timeout=settings.llm_call_timeout
+            )
+        return _http_client
+
+
+def create_chat_model(backend: Optional[str] = None) -> BaseChatModel:
+    """Build the chat model for LLM_BACKEND: openai, record, replay or fake."""
+    backend = (backend or settings.llm_backend).lower()
+    cassette = str(Path(settings.recording_path) / "llm.jsonl")
+
+    if backend == "fake":
+        return FakeChatModel(latency=settings.fake_llm_latency)
+    if backend == "replay":
+        return ReplayChatModel(cassette_path=cassette, latency=settings.fake_llm_latency)
+
+    from langchain_openai import ChatOpenAI
+    # Retries are handled by ResilientChatModel, bounded by each request's deadline
+    model = ChatOpenAI(model=settings.model_name, temperature=settings.temperature, api_key=settings.openai_api_key,
+                       base_url=settings.openai_base_url, timeout=settings.llm_call_timeout, max_retries=0,
+                       http_client=shared_http_client())
+    if backend == "record":
+        return RecordingChatModel(inner=model, cassette_path=cassette)
+    return model
+
+
+def create_local_embeddings() -> Embeddings:
+    """
+    CPU-local embeddings: the LOCAL_EMBEDDING_MODEL sentence-transformers model,
+    or feature hashing spread over EMBEDDING_WORKERS processes ("hash").
+    Raises at startup if the model is set but sentence-transformers is missing,
+    rather than quietly indexing with a much weaker embedder.
+    """
+    model = settings.local_embedding_model
+    if model.lower() != "hash":
+        try:
+            return SentenceTransformerEmbeddings(
+                model,
+                device=settings.local_embedding_device,
+                batch_size=settings.local_embedding_batch_size,
+                threads=settings.embedding_workers
+            )
+        except ImportError as e:
+            raise RuntimeError(
+                f"LOCAL_EMBEDDING_MODEL={model} needs sentence-transformers (pip install sentence-transformers); "
+                f"set LOCAL_EMBEDDING_MODEL=hash to use hashing embeddings instead"
+            ) from e
+    return ParallelEmbeddings(
+        HashEmbeddings(settings.local_embedding_dimensions),
+        workers=settings.embedding_workers,
+        batch_size=settings.local_embedding_batch_size
+    )
+
+
+def create_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """Build the embeddings for EMBEDDING_BACKEND: openai, local, record, replay or fake."""
+    backend = (backend or settings.embedding_backend).lower()
+    cassette = str(Path(settings.recording_path) / "embeddings.jsonl")
+
+    if backend == "fake":
+        return HashEmbeddings(latency=settings.fake_embedding_latency)
+    if backend == "replay":
+        return ReplayEmbeddings(cassette, latency=settings.fake_embedding_latency)
+    if backend == "local":
+        return create_local_embeddings()
+
+    from langchain_openai import OpenAIEmbeddings
+    # Retries are handled by EmbeddingScheduler (Retry-After, adaptive limits); SDK
+    # retries would hide the 429s from it. Only EMBEDDING_SCHEDULER=off keeps them.
+    retries = {} if settings.embedding_scheduler == "off" else {"max_retries": 0}
+    embeddings = OpenAIEmbeddings(model=settings.openai_embedding_model, base_url=settings.openai_base_url,
+                                  http_client=shared_http_client(), **retries)
+    if backend == "record":
+        return RecordingEmbeddings(embeddings, cassette)
+    return embeddings
@@ -0,0 +1,237 @@
+from backend.services.logger import logger
+from backend.models.schemas import InteractionLog
+from typing import List, Dict, Any, Iterator, Union
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+import json
+import os
+import pickle
+import threading
+
+
+class PagedHistory(Sequence):
+    """
+    Hot-tier interaction history stored as fixed-size pickle pages.
+
+    Only a small manifest and the pages covering the tail window are read on
+    startup; older pages are loaded on demand and kept in a bounded LRU cache.
+    Indexing and slicing are local (0 == oldest hot record); `base_index` maps
+    them to global interaction indexes.
+    """
+
+    MANIFEST_NAME = "pages.json"
+
+    def __init__(self, pages_path: str, page_size: int = 50, tail_window: int = 50, cache_pages: int = 8):
+        self.pages_path = Path(pages_path)
+        self.pages_path.mkdir(parents=True, exist_ok=True)
+        self.page_size = max(1, page_size)
+        self.manifest_file = self.pages_path / self.MANIFEST_NAME
+
+        manifest = self._load_manifest()
+        self.base_index: int = manifest["base_index"]
+        self._pages: List[Dict[str, Any]] = manifest["pages"]
+        self._length = sum(page["count"] for page in self._pages)
+
+        # The tail window must always fit in the cache
+        tail_pages = -(-max(tail_window, 1) // self.page_size) + 1
+        self.cache_pages = max(cache_pages, tail_pages)
+        self._cache: "OrderedDict[int, List[InteractionLog]]" = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+        self._load_tail(tail_window)
+
+
+    def __len__(self) -> int:
+        return self._length
+
+
+    def __getitem__(self, index: Union[int, slice]):
+        with self._lock:
+            if isinstance(index, slice):
+                return [self._get(i) for i in range(*index.indices(self._length))]
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError("history index out of range")
+            return self._get(index)
+
+
+    def __iter__(self) -> Iterator[InteractionLog]:
+        for position in range(len(self._pages)):
+            with self._lock:
+                if position >= len(self._pages):
+                    return
+                records = list(self._page_records(self._pages[position]))
+            yield from records
+
+
+    @property
+    def loaded_pages(self) -> int:
+        return len(self._cache)
+
+
+    def append(self, interaction: InteractionLog):
+        """Append to the last page, starting a new page when it is full."""
+        with self._lock:
+            if not self._pages or self._pages[-1]["count"] >= self.page_size:
+                first_index = self.base_index + self._length
+                self._pages.append({"first_index": first_index, "count": 0, "file": f"page_{first_index:09d}.pkl"})
+                self._cache[first_index] = []
+
+            page = self._pages[-1]
+            self._page_records(page).append(interaction)
+            page["count"] += 1
+            self._length += 1
+            self._dirty.add(page["first_index"])
+
+
+    def mark_dirty(self, index: int):
+        """Flag the page holding a (local) index as modified."""
+        with self._lock:
+            page, _ = self._locate(index)
+            self._dirty.add(page["first_index"])
+
+
+    def peek_oldest(self, max_records: int) -> List[InteractionLog]:
+        """
+        Records of whole pages from the front, up to max_records (always at
+        least one page while the history is not empty). Nothing is removed:
+        archive them first, then drop_before() the archive's new total.
+        """
+        with self._lock:
+            taken: List[InteractionLog] = []
+            for page in self._pages:
+                if taken and len(taken) + page["count"] > max_records:
+                    break
+                taken.extend(self._page_records(page))
+            return taken
+
+
+    def drop_before(self, global_index: int) -> int:
+        """Discard whole pages that end before global_index (already archived)."""
+        with self._lock:
+            dropped = 0
+            while self._pages and self._pages[0]["first_index"] + self._pages[0]["count"] <= global_index:
+                page = self._pages.pop(0)
+                self._forget_page(page)
+                self._length -= page["count"]
+                self.base_index += page["count"]
+                dropped += page["count"]
+            if dropped:
+                self._save_manifest()
+            return dropped
+
+
+    def clear(self, base_index: int):
+        """Delete every page; the next record gets global index base_index."""
+        with self._lock:
+            for page in self._pages:
+                self._forget_page(page)
+            self._pages = []
+            self._length = 0
+            self.base_index = base_index
+            self._save_manifest()
+
+
+    def flush(self):
+        """Write modified pages and the manifest to disk."""
+        with self._lock:
+            for page in self._pages:
+                if page["first_index"] in self._dirty:
+                    self._write_page(page, self._cache[page["first_index"]])
+            self._dirty.clear()
+            self._save_manifest()
+            self._evict()
+
+
+    def _get(self, index: int) -> InteractionLog:
+        page, offset = self._locate(index)
+        return self._page_records(page)[offset]
+
+
+    def _locate(self, index: int):
+        # Every page except the last is full unless page_size changed between runs
+        remaining = index
+        for page in self._pages:
+            if remaining < page["count"]:
+                return page, remaining
+            remaining -= page["count"]
+        raise IndexError("history index out of range")
+
+
+    def _page_records(self, page: Dict[str, Any]) -> List[InteractionLog]:
+        key = page["first_index"]
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        # A page that fails to load raises: caching it as empty would leave
+        # page["count"] pointing past its records and archive it as if it held them
+        page_file = self.pages_path / page["file"]
+        try:
+            with open(page_file, 'rb') as f:
+                records = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Could not load history page {page_file.name}: {e}")
+            raise
+        if len(records) != page["count"]:
+            raise ValueError(f"History page {page_file.name} holds {len(records)} records, manifest expects {page['count']}")
+        self._cache[key] = records
+        self._evict()
+        return records
+
+
+    def _evict(self):
+        while len(self._cache) > self.cache_pages:
+            for key in self._cache:
+                # Keep dirty pages and the current (last) page resident
+                if key not in self._dirty and (not self._pages or key != self._pages[-1]["first_index"]):
+                    del self._cache[key]
+                    break
+            else:
+                return
+
+
+    def _forget_page(self, page: Dict[str, Any]):
+        self._cache.pop(page["first_index"], None)
+        self._dirty.discard(page["first_index"])
+        (self.pages_path / page["file"]).unlink(missing_ok=True)
+
+
+    def _load_tail(self, tail_window: int):
+        covered = 0
+        for page in reversed(self._pages):
+            if covered >= tail_window:
+                break
+            self._page_records(page)
+            covered += page["count"]
+        # Pages were loaded newest first; restore oldest-to-newest LRU order
+        for key in sorted(self._cache):
+            self._cache.move_to_end(key)
+
+
+    def _write_page(self, page: Dict[str, Any], records: List[InteractionLog]):
+        page_file = self.pages_path / page["file"]
+        tmp_file = page_file.with_suffix(".tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(records, f)
+        os.replace(tmp_file, page_file)
+
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load history page manifest: {e}")
+        return {"base_index": 0, "pages": []}
+
+
+    def _save_manifest(self):
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump({"base_index": self.base_index, "pages": self._pages}, f)
+        os.replace(tmp_file, self.manifest_file)
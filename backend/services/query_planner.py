@@ -0,0 +1,189 @@
+from backend.services.logger import logger
+from backend.services.deadline import current_deadline
+from backend.services.tracing import span, emit_event
+from typing import List, Dict, Optional, Any, Callable, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+import json
+import re
+
+from langchain_core.agents import AgentAction
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.tools import Tool
+
+
+# Cheap gate so single-part questions skip the planning call: a question is
+# planned only if it uses comparison wording or asks at least two questions
+# ("What is 25*4 and what does the report say about pricing?")
+COMPARISON = re.compile(r"\b(versus|vs\.?|compare[sd]?|comparison|difference between)\b", re.IGNORECASE)
+CLAUSE_SPLIT = re.compile(r"[?;,]|\b(?:and|also|then)\b", re.IGNORECASE)
+QUESTION_START = re.compile(
+    r"^\s*(what|how|who|whom|whose|when|where|which|why|is|are|was|were|does|do|did|can|could|should|will|would)\b",
+    re.IGNORECASE
+)
+
+
+def is_multi_part(query: str) -> bool:
+    if COMPARISON.search(query) or query.count("?") >= 2:
+        return True
+    return sum(1 for clause in CLAUSE_SPLIT.split(query) if QUESTION_START.match(clause)) >= 2
+
+PLAN_PROMPT = """Split the question below into independent sub-questions that can be answered in parallel.
+For each sub-question pick one tool and write its input:
+{tools}
+
+Reply with a JSON list only, e.g. [{{"tool": "DocumentSearch", "input": "pricing"}}, {{"tool": "Calculator", "input": "25*4"}}].
+Reply with [] if the question has a single part or the parts depend on each other.
+Write each input so it stands on its own, resolving references to the conversation (e.g. "it", "that report").
+
+Conversation so far:
+{history}
+
+Question: {query}"""
+
+SYNTHESIS_PROMPT = """Answer the user's question using the evidence gathered for each part.
+Cite the document pages where the evidence comes from DocumentSearch. Say so if a part could not be answered.
+
+Conversation so far:
+{history}
+
+Question: {query}
+
+Evidence:
+{evidence}
+
+Answer:"""
+
+
+class QueryPlanner:
+    """
+    Answers multi-part questions in three stages instead of one agent step per
+    part: one LLM call splits the question into independent sub-queries, the
+    sub-queries run concurrently (DocumentSearch ones as a single batched
+    search), and one LLM call synthesizes the answer from the combined evidence.
+
+    Sub-queries run on the planner's own pool: DirectAnswer calls the LLM,
+    which waits on the shared deadline pool, so running them there could fill
+    it with tasks waiting on tasks queued behind them.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        tools: Dict[str, Tool],
+        search_batch: Callable[[List[str]], List[str]],
+        max_parts: int = 5,
+        workers: int = 16
+    ):
+        self.llm = llm
+        self.tools = tools
+        self.search_batch = search_batch
+        self.max_parts = max_parts
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="planner")
+
+
+    def plan(self, query: str, chat_history: Optional[List[BaseMessage]] = None) -> Optional[List[Tuple[str, str]]]:
+        """(tool, input) pairs for a multi-part question, or None to use the agent."""
+        if not is_multi_part(query):
+            return None
+
+        tools = "\n".join(f"- {name}: {tool.description.splitlines()[0]}" for name, tool in self.tools.items())
+        reply = self.llm.invoke(PLAN_PROMPT.format(tools=tools, history=self._history(chat_history), query=query)).content
+
+        parts = []
+        try:
+            start, end = reply.index("["), reply.rindex("]") + 1
+            for item in json.loads(reply[start:end]):
+                name, tool_input = item.get("tool"), str(item.get("input", "")).strip()
+                if name in self.tools and tool_input:
+                    parts.append((name, tool_input))
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"🗺️ Unusable plan, falling back to the agent: {e}")
+            return None
+
+        if len(parts) < 2:
+            return None
+        logger.info(f"🗺️ Planned {len(parts)} sub-queries: {parts}")
+        return parts[:self.max_parts]
+
+
+    def run(self, query: str, parts: List[Tuple[str, str]], chat_history: Optional[List[BaseMessage]] = None) -> Dict[str, Any]:
+        """Execute the sub-queries concurrently and synthesize one answer (agent-style result)."""
+        observations = self._execute(parts)
+        steps = [
+            (AgentAction(tool=name, tool_input=tool_input, log=""), observation)
+            for (name, tool_input), observation in zip(parts, observations)
+        ]
+
+        evidence = "\n\n".join(
+            f"[{i}] {action.tool}({action.tool_input}):\n{observation}"
+            for i, (action, observation) in enumerate(steps, 1)
+        )
+        output = self.llm.invoke(SYNTHESIS_PROMPT.format(
+            history=self._history(chat_history), query=query, evidence=evidence
+        )).content
+        return {"output": output, "intermediate_steps": steps, "planned": True}
+
+
+    @staticmethod
+    def _history(chat_history: Optional[List[BaseMessage]]) -> str:
+        """The agent memory's messages as the transcript the agent itself would see."""
+        if not chat_history:
+            return "(none)"
+        return get_buffer_string(chat_history, human_prefix="User", ai_prefix="Assistant")
+
+
+    def _execute(self, parts: List[Tuple[str, str]]) -> List[str]:
+        observations: List[Optional[str]] = [None] * len(parts)
+        futures = {}
+
+        searches = [i for i, (name, _) in enumerate(parts) if name == "DocumentSearch"]
+        if searches:
+            futures[self._submit(self._search, [parts[i][1] for i in searches])] = searches
+        for i, (name, tool_input) in enumerate(parts):
+            if name != "DocumentSearch":
+                futures[self._submit(lambda n=name, t=tool_input: [self._run_tool(n, t)])] = [i]
+
+        deadline = current_deadline()
+        done, pending = wait(futures, timeout=deadline.remaining() if deadline else None)
+        for future in pending:
+            future.cancel()
+
+        for future in done:
+            indexes = futures[future]
+            if future.exception() is None:
+                for i, value in zip(indexes, future.result()):
+                    observations[i] = value
+            else:
+                for i in indexes:
+                    observations[i] = f"Error: {future.exception()}"
+        return [obs if obs is not None else "Did not finish within the time budget." for obs in observations]
+
+
+    def _submit(self, func: Callable[..., Any], *args) -> Future:
+        """Run func on the planner pool with the caller's context (deadline, trace)."""
+        return self._pool.submit(copy_context().run, func, *args)
+
+
+    def _search(self, queries: List[str]) -> List[str]:
+        for query in queries:
+            emit_event("tool_start", tool="DocumentSearch", input=query[:200])
+        with span("DocumentSearch", kind="tool", batch=len(queries)):
+            results = self.search_batch(queries)
+        if isinstance(results, str):
+            # Refused by the DocumentSearch runner (timeout, open breaker, busy)
+            results = [results] * len(queries)
+        for result in results:
+            emit_event("tool_end", tool="DocumentSearch", output=result[:500])
+        return results
+
+
+    def _run_tool(self, name: str, tool_input: str) -> str:
+        emit_event("tool_start", tool=name, input=tool_input[:200])
+        with span(name, kind="tool", input=tool_input[:100]) as tool_span:
+            output = str(self.tools[name].func(tool_input))
+            if tool_span is not None:
+                tool_span.attributes["output"] = output[:500]
+        emit_event("tool_end", tool=name, output=output[:500])
+        return output
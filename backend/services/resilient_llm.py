@@ -0,0 +1,150 @@
+from backend.services.logger import logger
+from backend.services.deadline import DeadlineExceeded, current_deadline, submit_in_context
+from backend.services import metrics
+from typing import List, Optional, Any, Tuple, Sequence, Union, Dict, Callable
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+from functools import lru_cache
+import random
+import threading
+import time
+
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+@lru_cache(maxsize=1)
+def transient_errors() -> Tuple[type, ...]:
+    """Errors worth retrying: timeouts, dropped connections, 429s and 5xx (openai is imported on first use)."""
+    try:
+        import openai
+    except ImportError:
+        return (TimeoutError,)
+    return (
+        TimeoutError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Chat model wrapper that bounds every call by the request deadline.
+
+    Each call gets min(call_timeout, remaining budget), transient errors are
+    retried with jittered exponential backoff while budget remains, and
+    optionally a duplicate (hedged) request is sent when the first one is
+    slower than the observed latency quantile.
+    """
+
+    inner: BaseChatModel
+    call_timeout: float = 30.0
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    hedge_quantile: float = 0.0
+    hedge_min_samples: int = 20
+
+    _latencies: deque = PrivateAttr(default_factory=lambda: deque(maxlen=200))
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.inner._llm_type}"
+
+    def bind_tools(
+        self,
+        tools: Sequence[Union[Dict[str, Any], type, Callable, BaseTool]],
+        *,
+        tool_choice: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        """Bind tools in OpenAI format; they reach the inner model as a tools= kwarg on every call."""
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice and tool_choice not in ("auto", "none", "required", "any"):
+            tool_choice = {"type": "function", "function": {"name": tool_choice}}
+        if tool_choice:
+            kwargs["tool_choice"] = "required" if tool_choice == "any" else tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = current_deadline()
+        retryable = transient_errors()
+        attempt = 0
+        while True:
+            timeout = deadline.timeout_for(self.call_timeout) if deadline else self.call_timeout
+            try:
+                return self._call_once(messages, stop, timeout, **kwargs)
+            except retryable as e:
+                if deadline and deadline.expired:
+                    metrics.DEADLINE_EXCEEDED.inc()
+                    raise DeadlineExceeded("Request deadline exceeded during LLM call") from e
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                if deadline and delay >= deadline.remaining():
+                    metrics.DEADLINE_EXCEEDED.inc()
+                    raise DeadlineExceeded("Not enough time left to retry the LLM call") from e
+                logger.warning(f"🔁 LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                metrics.LLM_RETRIES.inc()
+                time.sleep(delay)
+
+    def _call_once(self, messages, stop, timeout: float, **kwargs) -> ChatResult:
+        started = time.monotonic()
+        primary = submit_in_context(self.inner._generate, messages, stop=stop, **kwargs)
+        pending = {primary}
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and hedge_delay < timeout:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done:
+                logger.info(f"🪁 Hedging LLM call after {hedge_delay:.2f}s")
+                metrics.LLM_HEDGES.inc()
+                pending.add(submit_in_context(self.inner._generate, messages, stop=stop, **kwargs))
+
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._record_latency(time.monotonic() - started)
+                    return future.result()
+                last_error = future.exception()
+            if not done:
+                break
+
+        for future in pending:
+            future.cancel()
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(f"LLM call timed out after {timeout:.1f}s")
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_quantile <= 0:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_quantile))]
+
+    def _record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
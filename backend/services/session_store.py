@@ -0,0 +1,123 @@
+from backend.services.logger import logger
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+
+Turn = Tuple[str, str]
+
+# (global history index or None, (query, response))
+Entry = Tuple[Optional[int], Turn]
+
+
+class ChatSession:
+    """
+    Conversation shown to one browser session.
+
+    `turns` holds everything loaded so far, oldest first; only the newest
+    `visible` of them are sent to the browser. `history_before` is the global
+    history index of turns[0], used to page older turns in from storage.
+    """
+
+    __slots__ = ("turns", "visible", "history_before", "last_seen", "lock")
+
+    def __init__(self, turns: List[Entry], history_before: Optional[int], visible: int):
+        self.turns = turns
+        self.visible = visible
+        self.history_before = history_before
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    @property
+    def has_older(self) -> bool:
+        return self.visible < len(self.turns) or bool(self.history_before)
+
+
+    def window(self) -> List[Turn]:
+        return [turn for _, turn in self.turns[-self.visible:]] if self.visible else []
+
+
+class SessionStore:
+    """
+    Server-side chat state keyed by Gradio's session hash.
+
+    Handlers receive only the new message and return a bounded window of the
+    conversation, so the payload per turn no longer grows with the session.
+    Sessions idle for longer than idle_ttl, or beyond max_sessions (least
+    recently used first), are dropped; the history itself stays in MemoryManager.
+    """
+
+    def __init__(self, window: int = 20, max_turns: int = 500, max_sessions: int = 1000, idle_ttl: float = 3600):
+        self.window = max(1, window)
+        self.max_turns = max(self.window, max_turns)
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_seen = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+
+    def open(self, session_id: str, turns: List[Entry], history_before: Optional[int]) -> ChatSession:
+        """Start (or restart) a session from the newest persisted turns."""
+        session = ChatSession(list(turns), history_before, min(self.window, len(turns)))
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict()
+        return session
+
+
+    def append(self, session_id: str, turn: Turn, conversation_id: Optional[int] = None) -> ChatSession:
+        session = self.get(session_id) or self.open(session_id, [], None)
+        with session.lock:
+            session.turns.append((conversation_id, turn))
+            session.visible = min(session.visible + 1, max(self.window, session.visible))
+            if len(session.turns) > self.max_turns:
+                # Oldest turns are still in MemoryManager; page them back in on demand
+                del session.turns[:len(session.turns) - self.max_turns]
+                session.visible = min(session.visible, len(session.turns))
+                first_id = session.turns[0][0]
+                if first_id is not None:
+                    session.history_before = first_id
+        return session
+
+
+    def show_older(self, session_id: str, page: int, older: List[Entry], history_before: Optional[int]) -> ChatSession:
+        """Reveal up to `page` more turns, prepending `older` (fetched from storage) when needed."""
+        session = self.get(session_id) or self.open(session_id, [], None)
+        with session.lock:
+            if older:
+                session.turns[:0] = older
+                session.history_before = history_before
+            session.visible = min(len(session.turns), session.visible + page)
+        return session
+
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, session in self._sessions.items() if now - session.last_seen > self.idle_ttl]
+        for key in expired:
+            del self._sessions[key]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        if expired:
+            logger.info(f"🧹 Dropped {len(expired)} idle chat session(s)")
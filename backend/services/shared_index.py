@@ -0,0 +1,117 @@
+from backend.services.logger import logger
+from backend.services.file_lock import FileLock
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import pickle
+import shutil
+
+from langchain_core.embeddings import Embeddings
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+
+class SharedIndex:
+    """
+    Versioned FAISS index on disk, shared by every worker process.
+
+    Each ingest publishes a new immutable version directory (LangChain
+    save_local layout) and then atomically swaps `current.json` to point at
+    it. Workers poll the pointer (one stat per request) and open a changed
+    version memory-mapped and read-only, so N workers share one copy of the
+    vectors in the page cache. Older versions are pruned; a worker still
+    searching one keeps its mapping alive until it reloads.
+    """
+
+    POINTER_NAME = "current.json"
+
+    def __init__(self, path: str = "faiss_index", keep_versions: int = 2):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.keep_versions = max(1, keep_versions)
+        self.pointer_file = self.path / self.POINTER_NAME
+        self._lock = FileLock(self.path / ".lock")
+        self._pointer_stamp: Optional[Tuple[int, int]] = None
+        self._pointer: Optional[Dict[str, Any]] = None
+
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """The published pointer ({version, directory, metadata}), re-read only when the file changed."""
+        try:
+            stat = self.pointer_file.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        if stamp != self._pointer_stamp:
+            try:
+                self._pointer = json.loads(self.pointer_file.read_text())
+                self._pointer_stamp = stamp
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Could not read index pointer: {e}")
+                return self._pointer
+        return self._pointer
+
+
+    def current_version(self) -> int:
+        pointer = self.current()
+        return pointer["version"] if pointer else 0
+
+
+    def publish(self, vectorstore: "FAISS", metadata: Dict[str, Any]) -> int:
+        """Write a new version and make it current; returns its version number."""
+        with self._lock:
+            version = self.current_version() + 1
+            directory = f"v{version:06d}"
+            staging = self.path / f".{directory}.tmp"
+            shutil.rmtree(staging, ignore_errors=True)
+            vectorstore.save_local(str(staging))
+            os.replace(staging, self.path / directory)
+
+            pointer = {
+                "version": version,
+                "directory": directory,
+                "metadata": metadata,
+                "published": datetime.now().isoformat()
+            }
+            tmp_file = self.pointer_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(pointer, indent=2))
+            os.replace(tmp_file, self.pointer_file)
+
+            self._prune(version)
+        logger.info(f"📤 Published index version {version} ({vectorstore.index.ntotal} vectors)")
+        return version
+
+
+    def load(self, embeddings: Embeddings) -> Optional[Tuple["FAISS", Dict[str, Any], int]]:
+        """Open the current version memory-mapped and read-only: (vectorstore, metadata, version)."""
+        import faiss
+        from langchain_community.vectorstores import FAISS
+
+        pointer = self.current()
+        if pointer is None:
+            return None
+
+        directory = self.path / pointer["directory"]
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        index = faiss.read_index(str(directory / "index.faiss"), flags)
+        with open(directory / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        vectorstore = FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
+        )
+        logger.info(f"📥 Loaded index version {pointer['version']} ({index.ntotal} vectors, memory-mapped)")
+        return vectorstore, pointer.get("metadata", {}), pointer["version"]
+
+
+    def _prune(self, current_version: int):
+        for child in self.path.iterdir():
+            if child.is_dir() and child.name.startswith("v") and child.name[1:].isdigit():
+                if int(child.name[1:]) <= current_version - self.keep_versions:
+                    shutil.rmtree(child, ignore_errors=True)
@@ -0,0 +1,105 @@
+from backend.services.logger import logger
+from backend.services.deadline import current_deadline, submit_in_context
+from backend.services.tracing import span
+from backend.services import metrics
+from typing import Optional, Callable, FrozenSet, Iterator
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import threading
+
+
+# Words that say nothing about what to retrieve
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from how i in is it its me my of on or please
+say says tell that the their there these this to was what when where which who why will with
+would you your about document documents pdf file uploaded
+""".split())
+
+
+def content_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS)
+
+
+class _Prefetch:
+    """Document search started for one chat turn before the agent asked for it."""
+
+    __slots__ = ("query", "tokens", "index_version", "future", "used", "lock")
+
+    def __init__(self, query: str, index_version: int, future: Future):
+        self.query = query
+        self.tokens = content_tokens(query)
+        self.index_version = index_version
+        self.future = future
+        self.used = False
+        self.lock = threading.Lock()
+
+
+_current_prefetch: ContextVar[Optional[_Prefetch]] = ContextVar("current_prefetch", default=None)
+
+
+class SpeculativeRetrieval:
+    """
+    Runs DocumentSearch for the user's question in parallel with the agent's
+    first LLM call, and serves the agent's DocumentSearch action from that
+    result when its input is covered by the question.
+
+    An input matches when at least `threshold` of its content words appear in
+    the question. Outcomes are counted as hit (served), miss (searched again
+    with a different input) or discarded (the agent never searched).
+    """
+
+    def __init__(self, search: Callable[[str], str], threshold: float = 0.6):
+        self.search = search
+        self.threshold = threshold
+
+
+    @contextmanager
+    def scope(self, query: str, index_version: int) -> Iterator[None]:
+        """Prefetch for the duration of one chat turn."""
+        def prefetch() -> str:
+            with span("speculative_retrieval", kind="retrieval"):
+                return self.search(query)
+
+        entry = _Prefetch(query, index_version, submit_in_context(prefetch))
+        token = _current_prefetch.set(entry)
+        try:
+            yield
+        finally:
+            _current_prefetch.reset(token)
+            if not entry.used:
+                entry.future.cancel()
+                metrics.SPECULATIVE_RETRIEVALS.labels(result="discarded").inc()
+
+
+    def serve(self, tool_input: str, index_version: int) -> Optional[str]:
+        """The prefetched result for a DocumentSearch input, or None to search normally."""
+        entry = _current_prefetch.get()
+        if entry is None:
+            return None
+
+        with entry.lock:
+            if entry.used:
+                return None
+            entry.used = True
+
+        wanted = content_tokens(tool_input)
+        overlap = len(wanted & entry.tokens) / len(wanted) if wanted else 0.0
+        if entry.index_version != index_version or overlap < self.threshold:
+            logger.info(f"🎯 Speculative retrieval miss (overlap {overlap:.2f}): {tool_input[:50]}")
+            entry.future.cancel()
+            metrics.SPECULATIVE_RETRIEVALS.labels(result="miss").inc()
+            return None
+
+        deadline = current_deadline()
+        try:
+            result = entry.future.result(timeout=deadline.remaining() if deadline else None)
+        except (FutureTimeoutError, Exception) as e:
+            logger.warning(f"Speculative retrieval failed, searching normally: {e}")
+            metrics.SPECULATIVE_RETRIEVALS.labels(result="miss").inc()
+            return None
+
+        logger.info(f"🎯 Speculative retrieval hit (overlap {overlap:.2f})")
+        metrics.SPECULATIVE_RETRIEVALS.labels(result="hit").inc()
+        return result
@@ -0,0 +1,154 @@
+from backend.services.logger import logger
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import Counter, deque
+import multiprocessing
+import threading
+import re
+
+
+# Keywords are lowercased alphanumeric words of at least this many characters
+KEYWORD_MIN_LENGTH = 5
+
+_WHITESPACE = re.compile(r"\s")
+
+
+class TermStats:
+    """
+    Word/character counts and keyword frequencies for a body of text.
+
+    Stats from separate blocks merge exactly (words never straddle a block
+    boundary, see iter_blocks), so counting can be sharded and streamed.
+    """
+
+    __slots__ = ("words", "characters", "terms", "head", "tail")
+
+    def __init__(self, words: int = 0, characters: int = 0, terms: Optional[Counter] = None, head: str = "", tail: str = ""):
+        self.words = words
+        self.characters = characters
+        self.terms = terms if terms is not None else Counter()
+        self.head = head      # first 100 characters, for the summary
+        self.tail = tail      # last 50 characters
+
+
+    def merge(self, other: "TermStats") -> "TermStats":
+        """Append `other` (the text that follows this one)."""
+        self.words += other.words
+        self.characters += other.characters
+        self.terms.update(other.terms)
+        if len(self.head) < 100:
+            self.head = (self.head + other.head)[:100]
+        self.tail = (self.tail + other.tail)[-50:]
+        return self
+
+
+    def top_keywords(self, n: int = 5) -> List[str]:
+        return [term for term, _ in self.terms.most_common(n)]
+
+
+    def summary(self) -> str:
+        if self.characters > 150:
+            return self.head + "..." + self.tail
+        return self.head
+
+
+    def to_dict(self, top_terms: int = 200) -> Dict[str, Any]:
+        """Compact form stored with the index metadata (only the top terms are kept)."""
+        return {
+            "words": self.words,
+            "characters": self.characters,
+            "terms": dict(self.terms.most_common(top_terms)),
+            "head": self.head,
+            "tail": self.tail
+        }
+
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TermStats":
+        return cls(data["words"], data["characters"], Counter(data["terms"]), data.get("head", ""), data.get("tail", ""))
+
+
+def count_text(text: str) -> TermStats:
+    """Stats for one block of text (runs in pool workers, so module-level)."""
+    words = text.split()
+    terms = Counter(w.lower() for w in words if len(w) >= KEYWORD_MIN_LENGTH and w.isalnum())
+    return TermStats(len(words), len(text), terms, text[:100], text[-50:])
+
+
+def iter_blocks(parts: Iterable[str], block_chars: int) -> Iterator[str]:
+    """
+    Re-cut a stream of text into blocks of about block_chars, splitting only
+    at whitespace so every word lands in exactly one block.
+    """
+    pending = ""
+    for part in parts:
+        pending = pending + part if pending else part
+        start = 0
+        # Walk an offset instead of re-slicing, so one huge part is not copied per block
+        while len(pending) - start >= block_chars:
+            limit = start + block_chars
+            cut = max(pending.rfind(" ", start, limit), pending.rfind("\n", start, limit))
+            if cut < start:
+                # One very long token: cut at the next whitespace instead
+                match = _WHITESPACE.search(pending, limit)
+                if match is None:
+                    break
+                cut = match.start()
+            yield pending[start:cut + 1]
+            start = cut + 1
+        pending = pending[start:]
+    if pending:
+        yield pending
+
+
+class TextStatsEngine:
+    """
+    Streams text through count_text, sharding blocks across a process pool
+    once a stream passes `parallel_min_chars` (small inputs stay in-process,
+    where starting workers would cost more than it saves). At most
+    2 x workers blocks are in flight, so memory stays bounded for any input size.
+    """
+
+    def __init__(self, workers: int = 4, block_chars: int = 256 * 1024, parallel_min_chars: int = 1_000_000):
+        self.workers = max(1, workers)
+        self.block_chars = max(1024, block_chars)
+        self.parallel_min_chars = parallel_min_chars
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+
+    def analyze(self, parts: Iterable[str]) -> TermStats:
+        """Stats over the concatenation of `parts` (a string, list of chunks, or any iterator)."""
+        if isinstance(parts, str):
+            parts = (parts,)
+        stats = TermStats()
+        in_flight: "deque[Future]" = deque()
+        seen = 0
+
+        for block in iter_blocks(parts, self.block_chars):
+            seen += len(block)
+            if self.workers == 1 or (seen < self.parallel_min_chars and not in_flight):
+                stats.merge(count_text(block))
+                continue
+            in_flight.append(self._executor().submit(count_text, block))
+            if len(in_flight) >= 2 * self.workers:
+                stats.merge(in_flight.popleft().result())
+
+        while in_flight:
+            stats.merge(in_flight.popleft().result())
+        return stats
+
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    logger.info(f"🧵 Starting {self.workers} text analysis worker processes")
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,39 @@
+from backend.services.logger import logger
+from backend.config.settings import settings
+from typing import Callable, Optional
+import threading
+
+
+# Fallback when no tiktoken encoding is available (English text averages ~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+_encode: Optional[Callable[[str], list]] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _encoder() -> Optional[Callable[[str], list]]:
+    """Load the TOKEN_ENCODING tiktoken encoding once; None if disabled or unavailable (e.g. offline)."""
+    global _encode, _loaded
+    if _loaded:
+        return _encode
+    with _lock:
+        if not _loaded:
+            if settings.token_encoding:
+                try:
+                    import tiktoken
+                    _encode = tiktoken.get_encoding(settings.token_encoding).encode_ordinary
+                except Exception as e:
+                    logger.warning(f"⚠️ tiktoken encoding '{settings.token_encoding}' unavailable ({type(e).__name__}), estimating tokens from length")
+            _loaded = True
+    return _encode
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text under TOKEN_ENCODING, or a length-based estimate."""
+    encode = _encoder()
+    return len(encode(text)) if encode else estimate_tokens(text)
@@ -0,0 +1,174 @@
+from backend.services.logger import logger
+from backend.services import metrics
+from backend.services.tool_executor import ToolUnavailable
+from typing import Dict, Optional, Any, Callable, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class ToolResultCache:
+    """
+    Shared TTL + LRU cache for tool results, keyed by tool name and normalized input.
+
+    Only tools with a configured TTL are cached. When persist_path is set, entries
+    are also written to a small SQLite file so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1000,
+        persist_path: Optional[str] = None
+    ):
+        self.ttls: Dict[str, float] = dict(ttls or {})
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._open_store(Path(persist_path))
+
+
+    @staticmethod
+    def normalize(tool_input: Any) -> str:
+        """Case- and whitespace-insensitive cache key for a tool input."""
+        return " ".join(str(tool_input).lower().split())
+
+
+    def is_cached(self, tool_name: str) -> bool:
+        return self.ttls.get(tool_name, 0) > 0
+
+
+    def get(self, tool_name: str, tool_input: Any) -> Tuple[bool, Any]:
+        """Return (hit, value) for a tool input."""
+        key = (tool_name, self.normalize(tool_input))
+        now = time.time()
+
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load_entry(key)
+                if entry is not None:
+                    self._entries[key] = entry
+
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                metrics.CACHE_LOOKUPS.labels(tool=tool_name, result="hit").inc()
+                return True, entry[1]
+
+            if entry is not None:
+                self._delete(key)
+            stats["misses"] += 1
+            metrics.CACHE_LOOKUPS.labels(tool=tool_name, result="miss").inc()
+            return False, None
+
+
+    def put(self, tool_name: str, tool_input: Any, value: Any):
+        """Store a tool result for its configured TTL."""
+        ttl = self.ttls.get(tool_name, 0)
+        if ttl <= 0:
+            return
+
+        key = (tool_name, self.normalize(tool_input))
+        expires = time.time() + ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._delete(oldest)
+            if self._db is not None:
+                self._store_entry(key, expires, value)
+
+
+    def wrap(self, tool_name: str, func: Callable[[Any], Any], is_error: Optional[Callable[[Any], bool]] = None) -> Callable[[Any], Any]:
+        """
+        Wrap a tool function so repeated inputs are served from the cache.
+        Only successful results are stored: not ToolUnavailable observations
+        (timeouts, open circuits, missing tools) nor results is_error flags.
+        """
+        def cached(tool_input, *args, **kwargs):
+            hit, value = self.get(tool_name, tool_input)
+            if hit:
+                logger.info(f"⚡ Cache hit for {tool_name}: {str(tool_input)[:50]}")
+                return value
+            value = func(tool_input, *args, **kwargs)
+            if not isinstance(value, ToolUnavailable) and not (is_error is not None and is_error(value)):
+                self.put(tool_name, tool_input, value)
+            return value
+
+        cached.__name__ = getattr(func, "__name__", tool_name)
+        return cached
+
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool hits, misses and hit rate."""
+        with self._lock:
+            result = {}
+            for tool_name, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                result[tool_name] = {
+                    **counts,
+                    "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+                    "entries": sum(1 for name, _ in self._entries if name == tool_name)
+                }
+            return result
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache")
+                self._db.commit()
+
+
+    def _delete(self, key: Tuple[str, str]):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM tool_cache WHERE tool = ? AND input = ?", key)
+            self._db.commit()
+
+
+    def _open_store(self, path: Path):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "tool TEXT, input TEXT, expires REAL, value BLOB, PRIMARY KEY (tool, input))"
+            )
+            self._db.execute("DELETE FROM tool_cache WHERE expires <= ?", (time.time(),))
+            self._db.commit()
+            logger.info(f"🗄️ Tool cache persisted to {path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Tool cache persistence disabled: {e}")
+            self._db = None
+
+
+    def _load_entry(self, key: Tuple[str, str]) -> Optional[Tuple[float, Any]]:
+        row = self._db.execute(
+            "SELECT expires, value FROM tool_cache WHERE tool = ? AND input = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], pickle.loads(row[1])
+
+
+    def _store_entry(self, key: Tuple[str, str], expires: float, value: Any):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache (tool, input, expires, value) VALUES (?, ?, ?, ?)",
+                (key[0], key[1], expires, pickle.dumps(value))
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist tool cache entry: {e}")
@@ -1,25 +1,44 @@
+from backend.config.settings import settings
+from backend.services.data_format_engine import detect_format, format_json, format_table, render_bullets, truncate_lines
+from typing import Optional
 
 
 class DataFormatterTool:
     """Custom tool for data formatting and conversion."""
-    
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cell_chars: Optional[int] = None):
+        self.max_tokens = max_tokens or settings.data_formatter_token_budget
+        self.max_cell_chars = max_cell_chars or settings.data_formatter_max_cell_chars
+
     def format(self, data: str) -> str:
         """
-        Format data as bullet points. Useful for lists or multiple items.
-        Input: Text with items separated by commas, newlines, or semicolons
-        Output: Nicely formatted bullet point list
+        Format data as bullet points or a markdown table.
+        Input: Text with items separated by commas, newlines, or semicolons,
+               CSV/TSV rows, or a JSON array
+        Output: Bullet point list or table, truncated to the token budget
         """
         try:
             if not data or len(data.strip()) < 2:
                 return "No data provided to format."
-            
+
+            # Tabular input first: CSV rows contain commas and dashes too
+            kind = detect_format(data)
+            if kind == "json":
+                formatted = format_json(data, self.max_tokens, self.max_cell_chars)
+                if formatted is not None:
+                    return formatted
+            elif kind == "table":
+                formatted = format_table(data, self.max_tokens, self.max_cell_chars)
+                if formatted is not None:
+                    return formatted
+
             # Try different separators
             items = []
-            
+
             # Check if it's already bullet points or numbered
             if '•' in data or '- ' in data or data.strip().startswith(('1.', '2.', '3.')):
-                return f"Already formatted:\n{data}"
-            
+                return f"Already formatted:\n{truncate_lines(data, self.max_tokens)}"
+
             # Try comma separation first
             if ',' in data:
                 items = [item.strip() for item in data.split(',') if item.strip()]
@@ -33,19 +52,15 @@ class DataFormatterTool:
             else:
                 # If it's a long sentence, keep as is
                 if len(data.split()) > 10:
-                    return f"FORMATTED TEXT:\n━━━━━━━━━━━━━━━━━━━━━━\n{data}\n━━━━━━━━━━━━━━━━━━━━━━"
+                    return f"FORMATTED TEXT:\n━━━━━━━━━━━━━━━━━━━━━━\n{truncate_lines(data, self.max_tokens)}\n━━━━━━━━━━━━━━━━━━━━━━"
                 # Otherwise treat as list
                 items = data.split()
-            
-            # Format as bullet points
+
+            # Format as bullet points (joined once, truncated to the token budget)
             if items:
-                result = "FORMATTED AS BULLET POINTS:\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                for item in items:
-                    result += f"• {item}\n"
-                result += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
-                return result
+                return render_bullets(items, self.max_tokens)
             else:
-                return f"Could not parse data: {data}"
-        
+                return f"Could not parse data: {data[:500]}"
+
         except Exception as e:
-            return f"Error formatting data: {str(e)}\nOriginal data: {data}"
+            return f"Error formatting data: {str(e)}\nOriginal data: {data[:500]}"
@@ -1,13 +1,18 @@
 from backend.services.logger import logger
-from langchain_community.vectorstores import FAISS
-from typing import Optional
+from backend.services.tracing import span
+from typing import List, Optional, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
 
 
 class DocumentSearchTool:
 
     """Custom tool for searching uploaded documents."""
     
-    def __init__(self, vectorstore: Optional[FAISS] = None):
+    def __init__(self, vectorstore: Optional["FAISS"] = None):
         self.vectorstore = vectorstore
 
 
@@ -18,27 +23,66 @@ class DocumentSearchTool:
             return "No document has been uploaded yet. Please upload a PDF first."
         
         try:
-            # Search for relevant documents
-            docs = self.vectorstore.similarity_search(query, k=4)
-            
-            if not docs:
-                return "No relevant information found in the document."
+            # Search for relevant documents (embedding and FAISS timed separately)
+            with span("embed_query", kind="embedding"):
+                embedding = self.vectorstore.embeddings.embed_query(query)
+            with span("faiss_search", kind="retrieval", k=4):
+                docs = self.vectorstore.similarity_search_by_vector(embedding, k=4)
             
-            # Format results
-            results = []
-            for i, doc in enumerate(docs, 1):
-                page = doc.metadata.get('page', 'N/A')
-                content = doc.page_content[:300]  # First 300 chars
-                results.append(f"[Source {i} - Page {page}]\n{content}...")
-            
-            return "\n\n".join(results)
+            return self._format(docs)
         
         except Exception as e:
             logger.error(f"Error in document search: {e}")
             return f"Error searching document: {str(e)}"
+
+
+    def search_batch(self, queries: List[str], k: int = 4) -> List[str]:
+        """Search several queries at once: concurrent query embeddings, then one FAISS call."""
+
+        if not self.vectorstore:
+            return ["No document has been uploaded yet. Please upload a PDF first."] * len(queries)
+        if not queries:
+            return []
+
+        try:
+            # embed_query, not embed_documents: models with query/document
+            # instructions embed questions differently from passages
+            embed_query = self.vectorstore.embeddings.embed_query
+            with span("embed_queries", kind="embedding", batch=len(queries)):
+                if len(queries) == 1:
+                    vectors = [embed_query(queries[0])]
+                else:
+                    with ThreadPoolExecutor(max_workers=min(len(queries), 8), thread_name_prefix="embed-query") as pool:
+                        vectors = list(pool.map(embed_query, queries))
+            with span("faiss_search", kind="retrieval", k=k, batch=len(queries)):
+                # The app's stores are built without normalize_L2, so this is
+                # what similarity_search_by_vector runs per query
+                _, indices = self.vectorstore.index.search(np.vstack(vectors).astype(np.float32), k)
+
+            docstore, ids = self.vectorstore.docstore, self.vectorstore.index_to_docstore_id
+            return [self._format([docstore.search(ids[i]) for i in row if i != -1]) for row in indices]
+
+        except Exception as e:
+            logger.error(f"Error in batched document search: {e}")
+            return [f"Error searching document: {str(e)}"] * len(queries)
+
+
+    @staticmethod
+    def _format(docs) -> str:
+        if not docs:
+            return "No relevant information found in the document."
+        
+        # Format results
+        results = []
+        for i, doc in enumerate(docs, 1):
+            page = doc.metadata.get('page', 'N/A')
+            content = doc.page_content[:300]  # First 300 chars
+            results.append(f"[Source {i} - Page {page}]\n{content}...")
+        
+        return "\n\n".join(results)
     
 
-    def update_vectorstore(self, vectorstore: FAISS):
+    def update_vectorstore(self, vectorstore: "FAISS"):
         """Update the vectorstore when a new document is uploaded."""
         self.vectorstore = vectorstore
     
\ No newline at end of file
@@ -0,0 +1,201 @@
+from backend.services.logger import logger
+from backend.services.deadline import DeadlineExceeded, current_deadline
+from backend.services import metrics
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+import threading
+import time
+
+
+class ToolUnavailable(str):
+    """Observation returned instead of a tool result (timeout, open circuit, busy); never cached."""
+
+
+class CircuitBreaker:
+    """
+    closed → open after `failure_threshold` consecutive failures; open →
+    half-open once `reset_timeout` has passed, letting a single probe call
+    through; the probe's outcome closes the breaker or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+    def release_probe(self):
+        """The allowed call never ran; let the next one probe instead."""
+        with self._lock:
+            self._probing = False
+
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                logger.info(f"🔌 {self.name} recovered, circuit closed")
+                self._set_state(self.CLOSED)
+
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                logger.warning(f"🔌 {self.name} circuit open after {self.failures} failure(s), retry in {self.reset_timeout:.0f}s")
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+
+    def _set_state(self, state: str):
+        self.state = state
+        metrics.TOOL_CIRCUIT_OPEN.labels(tool=self.name).set(0 if state == self.CLOSED else 1)
+
+
+class ToolPolicy:
+    """Timeout, concurrency limit and breaker settings for one tool."""
+
+    def __init__(self, timeout: float = 20.0, concurrency: int = 8, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+
+class ToolRunner:
+    """
+    One tool's thread pool. A slot is held until the underlying call really
+    finishes, so calls that hang past their timeout keep occupying it: once
+    every slot is stuck, further calls fail fast instead of piling up threads.
+    is_error flags results that are failures in disguise (tools that catch
+    their own exceptions and return the message); they count against the
+    breaker like raised exceptions.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], policy: ToolPolicy,
+                 is_error: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        self.func = func
+        self.policy = policy
+        self.is_error = is_error
+        self.breaker = CircuitBreaker(name, policy.failure_threshold, policy.reset_timeout)
+        self._pool = ThreadPoolExecutor(max_workers=policy.concurrency, thread_name_prefix=f"tool-{name}")
+        self._slots = threading.BoundedSemaphore(policy.concurrency)
+
+
+    def __call__(self, *args, **kwargs) -> str:
+        return self.call(self.func, *args, **kwargs)
+
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func (e.g. a batched variant of the tool) under this tool's slots, timeout and breaker."""
+        deadline = current_deadline()
+        timeout = deadline.timeout_for(self.policy.timeout) if deadline else self.policy.timeout
+
+        if not self.breaker.allow():
+            metrics.TOOL_REJECTED.labels(tool=self.name, reason="circuit_open").inc()
+            return ToolUnavailable(f"{self.name} is temporarily unavailable (recent failures; retrying in {self.breaker.retry_in():.0f}s). Try another tool or answer with what you have.")
+        if not self._slots.acquire(blocking=False):
+            self.breaker.release_probe()
+            metrics.TOOL_REJECTED.labels(tool=self.name, reason="busy").inc()
+            return ToolUnavailable(f"{self.name} is busy ({self.policy.concurrency} calls already running). Try another tool or answer with what you have.")
+
+        try:
+            future = self._pool.submit(copy_context().run, func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._finished)
+
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.breaker.record_failure()
+            if deadline and deadline.expired:
+                raise DeadlineExceeded(f"Request deadline exceeded while running {self.name}")
+            metrics.TOOL_REJECTED.labels(tool=self.name, reason="timeout").inc()
+            logger.warning(f"⏱️ Tool {self.name} timed out after {timeout:.1f}s")
+            return ToolUnavailable(f"{self.name} did not respond within {timeout:.1f} seconds. Try another tool or answer with what you have.")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Tool {self.name} failed: {e}")
+            metrics.ERRORS.labels(component="tool").inc()
+            return ToolUnavailable(f"{self.name} failed: {e}. Try another tool or answer with what you have.")
+
+        if isinstance(result, ToolUnavailable):
+            # The tool declined to run (e.g. not installed); says nothing about its health
+            self.breaker.release_probe()
+            return result
+        if self.is_error is not None and self.is_error(result):
+            self.breaker.record_failure()
+            logger.error(f"Tool {self.name} returned an error: {str(result)[:200]}")
+            metrics.ERRORS.labels(component="tool").inc()
+            return ToolUnavailable(f"{self.name} failed: {result}. Try another tool or answer with what you have.")
+
+        self.breaker.record_success()
+        return result
+
+
+    def _finished(self, future: Future):
+        self._slots.release()
+
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ToolExecutor:
+    """Per-tool runners built from a default policy plus per-tool overrides."""
+
+    def __init__(self, default: ToolPolicy, overrides: Optional[Dict[str, ToolPolicy]] = None):
+        self.default = default
+        self.overrides = overrides or {}
+        self.runners: Dict[str, ToolRunner] = {}
+
+
+    def wrap(self, name: str, func: Callable[..., Any], is_error: Optional[Callable[[Any], bool]] = None) -> ToolRunner:
+        runner = ToolRunner(name, func, self.overrides.get(name, self.default), is_error)
+        metrics.TOOL_CIRCUIT_OPEN.labels(tool=name).set(0)
+        self.runners[name] = runner
+        return runner
+
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Breaker state per tool, for the status views."""
+        return {
+            name: {"state": runner.breaker.state, "failures": runner.breaker.failures}
+            for name, runner in self.runners.items()
+        }
+
+
+    def shutdown(self):
+        for runner in self.runners.values():
+            runner.shutdown()
@@ -1,29 +1,38 @@
+from backend.services.logger import logger
+from backend.config.settings import settings
+from backend.services.calculator_engine import CalculatorSandbox, Limits, evaluate_to_text
+from typing import Optional
 
 
 class PythonCalculatorTool:
     """Custom tool for mathematical calculations."""
-    
+
+    def __init__(self, isolation: Optional[str] = None):
+        self.limits = Limits(settings.calculator_max_digits, settings.calculator_max_elements)
+        self.isolation = (isolation or settings.calculator_isolation).lower()
+        self.sandbox: Optional[CalculatorSandbox] = None
+        if self.isolation == "process":
+            self.sandbox = CalculatorSandbox(
+                workers=settings.calculator_workers,
+                timeout=settings.calculator_timeout,
+                limits=self.limits,
+                memory_mb=settings.calculator_memory_mb
+            )
+            self.sandbox.warm()
+        elif self.isolation != "inline":
+            logger.warning(f"⚠️ Unknown CALCULATOR_ISOLATION '{self.isolation}', evaluating inline")
+            self.isolation = "inline"
+
     def calculate(self, expression: str) -> str:
         """
         Safely evaluate mathematical expressions.
-        Examples: "2+2", "sqrt(16)", "sin(pi/2)"
+        Examples: "2+2", "sqrt(16)", "sin(pi/2)", "sqrt([1, 4, 9])", "sum(range(1, 101))"
         """
-        try:
-            # Import math functions
-            import math
-            
-            # Safe namespace with math functions
-            safe_dict = {
-                'abs': abs, 'round': round, 'min': min, 'max': max,
-                'sum': sum, 'pow': pow,
-                'sqrt': math.sqrt, 'sin': math.sin, 'cos': math.cos,
-                'tan': math.tan, 'log': math.log, 'exp': math.exp,
-                'pi': math.pi, 'e': math.e
-            }
-            
-            # Evaluate expression
-            result = eval(expression, {"__builtins__": {}}, safe_dict)
-            return f"Result: {result}"
-        
-        except Exception as e:
-            return f"Error calculating '{expression}': {str(e)}"
+        expression = expression.strip().strip('"\'`')
+        if self.sandbox is not None:
+            ok, text = self.sandbox.evaluate(expression)
+        else:
+            ok, text = evaluate_to_text(expression, self.limits)
+        if ok:
+            return f"Result: {text}"
+        return f"Error calculating '{expression}': {text}"
@@ -1,51 +1,103 @@
+from backend.services.logger import logger
+from backend.config.settings import settings
+from backend.services.text_stats import TermStats, TextStatsEngine
+from typing import Any, Dict, Optional, TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+
+# Tool inputs that mean "the uploaded document" rather than literal text
+DOCUMENT_REFERENCES = {
+    "document", "the document", "uploaded document", "the uploaded document",
+    "pdf", "the pdf", "uploaded pdf", "the uploaded pdf", "file", "the file"
+}
 
 
 class TextAnalysisTool:
     """Custom tool for text analysis tasks."""
-    
+
+    def __init__(self, engine: Optional[TextStatsEngine] = None):
+        self.engine = engine or TextStatsEngine(
+            workers=settings.text_analysis_workers,
+            block_chars=settings.text_analysis_block_chars,
+            parallel_min_chars=settings.text_analysis_parallel_min_chars
+        )
+        self.vectorstore: Optional["FAISS"] = None
+        self.document_metadata: Dict[str, Any] = {}
+        self._document_stats: Optional[TermStats] = None
+        self._lock = threading.Lock()
+
+
+    def update_document(self, vectorstore: Optional["FAISS"], metadata: Dict[str, Any]):
+        """Point document analysis at the loaded index (stats precomputed at ingest when present)."""
+        with self._lock:
+            self.vectorstore = vectorstore
+            self.document_metadata = metadata
+            stats = metadata.get('text_stats')
+            self._document_stats = TermStats.from_dict(stats) if stats else None
+
+
     def analyze(self, text: str) -> str:
         """
         Analyze text: counts words, extracts keywords, and provides summary.
-        Input: Any text string to analyze
+        Input: Any text string to analyze, or "document" for the uploaded document
         """
         try:
+            if text and text.strip().strip('"\'').lower() in DOCUMENT_REFERENCES:
+                return self.analyze_document()
+
             if not text or len(text.strip()) < 3:
                 return "Text too short to analyze. Please provide more text."
-            
-            # Word and character count
-            words = text.split()
-            word_count = len(words)
-            char_count = len(text)
-            
-            # Extract keywords (frequency-based)
-            from collections import Counter
-            meaningful_words = [w.lower() for w in words if len(w) > 4 and w.isalnum()]
-            if meaningful_words:
-                common = Counter(meaningful_words).most_common(5)
-                keywords = [word for word, count in common]
-                keywords_str = ', '.join(keywords)
-            else:
-                keywords_str = "None found"
-            
-            # Simple summary (first 100 chars + last 50 chars if long enough)
-            if len(text) > 150:
-                summary = text[:100] + "..." + text[-50:]
-            else:
-                summary = text
-            
-            result = f"""TEXT ANALYSIS RESULTS:
+
+            return self._format(self.engine.analyze(text))
+
+        except Exception as e:
+            return f"Error analyzing text: {str(e)}"
+
+
+    def analyze_document(self) -> str:
+        """Analysis of the whole uploaded document."""
+        stats = self.document_stats()
+        if stats is None:
+            return "No document has been uploaded yet. Please upload a PDF first."
+        filename = self.document_metadata.get('filename', 'document')
+        return self._format(stats, title=f"DOCUMENT ANALYSIS: {filename}")
+
+
+    def document_stats(self) -> Optional[TermStats]:
+        """
+        Precomputed stats for the loaded document. Indexes published without
+        them are analyzed once by streaming the indexed chunks (overlapping
+        chunks make those counts slightly high).
+        """
+        with self._lock:
+            if self._document_stats is not None or self.vectorstore is None:
+                return self._document_stats
+            vectorstore = self.vectorstore
+
+        logger.info("📊 No precomputed text stats for this document, streaming its chunks")
+        docs = vectorstore.docstore._dict.values()
+        stats = self.engine.analyze(doc.page_content + "\n" for doc in docs)
+        with self._lock:
+            if self.vectorstore is vectorstore:
+                self._document_stats = stats
+        return stats
+
+
+    def _format(self, stats: TermStats, title: str = "TEXT ANALYSIS RESULTS") -> str:
+        keywords = stats.top_keywords(5)
+        keywords_str = ', '.join(keywords) if keywords else "None found"
+
+        return f"""{title}:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Statistics:
-   • Words: {word_count}
-   • Characters: {char_count}
-   • Average word length: {char_count/word_count if word_count > 0 else 0:.1f}
+   • Words: {stats.words}
+   • Characters: {stats.characters}
+   • Average word length: {stats.characters/stats.words if stats.words > 0 else 0:.1f}
 
 Top Keywords: {keywords_str}
 
-Summary: {summary}
+Summary: {stats.summary()}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-            
-            return result
-        
-        except Exception as e:
-            return f"Error analyzing text: {str(e)}"
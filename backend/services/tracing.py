@@ -0,0 +1,280 @@
+from backend.services.logger import logger
+from typing import List, Dict, Optional, Any, Iterator, Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from uuid import UUID, uuid4
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class Span:
+    """One timed operation in a trace (LLM call, tool call, retrieval, persistence...)."""
+
+    __slots__ = ("name", "kind", "start", "end", "attributes", "children", "error")
+
+    def __init__(self, name: str, kind: str = "internal", **attributes):
+        self.name = name
+        self.kind = kind
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.end is None:
+            self.end = time.perf_counter()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children]
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class Trace:
+    """Span tree for one request."""
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid4().hex
+        self.timestamp = datetime.now().isoformat()
+        self.root = Span(name, kind="request", **attributes)
+        self._lock = threading.Lock()
+
+    def add_child(self, parent: Span, span: Span):
+        with self._lock:
+            parent.children.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate timings and token counts for display."""
+        breakdown: Dict[str, float] = {}
+        llm_calls = tool_calls = prompt_tokens = completion_tokens = 0
+        for span in self.root.walk():
+            if span is self.root:
+                continue
+            breakdown[span.kind] = breakdown.get(span.kind, 0.0) + span.duration_ms
+            if span.kind == "llm":
+                llm_calls += 1
+                prompt_tokens += span.attributes.get("prompt_tokens", 0)
+                completion_tokens += span.attributes.get("completion_tokens", 0)
+            elif span.kind == "tool":
+                tool_calls += 1
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": round(self.root.duration_ms, 1),
+            "llm_calls": llm_calls,
+            "tool_calls": tool_calls,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "breakdown_ms": {kind: round(ms, 1) for kind, ms in breakdown.items()}
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": self.timestamp,
+            "summary": self.summary(),
+            "root": self.root.to_dict(self.root.start)
+        }
+
+
+# Active trace and span for the current request (propagated with the context)
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# Optional progress listener for the current request, e.g. a streaming API response
+_event_listener: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar("event_listener", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def event_listener(listener: Optional[Callable[[str, Dict[str, Any]], None]]) -> Iterator[None]:
+    """Send agent progress events (llm_start, llm_end, tool_start, tool_end) to listener."""
+    token = _event_listener.set(listener)
+    try:
+        yield
+    finally:
+        _event_listener.reset(token)
+
+
+def emit_event(event: str, **data):
+    listener = _event_listener.get()
+    if listener is None:
+        return
+    try:
+        listener(event, data)
+    except Exception as e:
+        logger.warning(f"Event listener failed on {event}: {e}")
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Open a new trace for the current request."""
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.finish(e)
+        raise
+    finally:
+        trace.root.finish()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span; a no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    new_span = Span(name, kind=kind, **attributes)
+    trace.add_child(_current_span.get() or trace.root, new_span)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.finish(e)
+        raise
+    finally:
+        new_span.finish()
+        _current_span.reset(token)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns LLM, tool and retriever runs into
+    spans on the active trace. One shared instance serves every request; the
+    trace is taken from the context at run start.
+    """
+
+    def __init__(self):
+        self._runs: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._model_name(serialized, kwargs), "llm")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._model_name(serialized, kwargs), "llm")
+        emit_event("llm_start")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        entry = self._pop(run_id)
+        if entry is None:
+            return
+        entry[0].attributes.update(self._token_usage(response))
+        entry[0].finish()
+        emit_event("llm_end", duration_ms=round(entry[0].duration_ms, 1), **self._token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        # Tools run inline, so spans opened inside the tool nest under it
+        self._start(run_id, parent_run_id, name, "tool", activate=True, input=str(input_str)[:100])
+        emit_event("tool_start", tool=name, input=str(input_str)[:200])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._runs.get(run_id)
+        if entry is not None:
+            entry[0].attributes["output"] = str(output)[:200]
+            emit_event("tool_end", tool=entry[0].name, output=str(output)[:500])
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "retriever", "retrieval", query=str(query)[:100])
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, activate: bool = False, **attributes):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        with self._lock:
+            parent_entry = self._runs.get(parent_run_id) if parent_run_id else None
+        parent = parent_entry[0] if parent_entry else (_current_span.get() or trace.root)
+        new_span = Span(name, kind=kind, **attributes)
+        trace.add_child(parent, new_span)
+        token = _current_span.set(new_span) if activate else None
+        with self._lock:
+            self._runs[run_id] = (new_span, token)
+
+    def _pop(self, run_id: UUID):
+        with self._lock:
+            return self._runs.pop(run_id, None)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None):
+        entry = self._pop(run_id)
+        if entry is None:
+            return
+        new_span, token = entry
+        new_span.finish(error)
+        if token is not None:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Finished from a different context; nothing to restore there
+                pass
+
+    @staticmethod
+    def _model_name(serialized, kwargs) -> str:
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model_name") or params.get("model") or (serialized or {}).get("name") or "llm"
+
+    @staticmethod
+    def _token_usage(response) -> Dict[str, int]:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            # Some models only report usage on the message
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+
+# Shared handler instance registered on the LLM and passed to agent runs
+trace_callback_handler = TraceCallbackHandler()
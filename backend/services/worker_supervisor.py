@@ -0,0 +1,216 @@
+from backend.services.logger import logger
+from backend.services.load_balancer import Backend
+from typing import List, Dict, Optional, Any, Tuple
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+
+async def http_get(host: str, port: int, path: str, timeout: float = 2.0) -> Tuple[int, Dict[str, Any]]:
+    """Minimal HTTP/1.0 GET for health probes: (status, JSON body or {})."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}\r\n\r\n".encode())
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split(None, 2)[1])
+    try:
+        return status, json.loads(body or b"{}")
+    except ValueError:
+        return status, {}
+
+
+class Worker:
+    """One app process on a private port."""
+
+    def __init__(self, index: int, command: List[str], env: Dict[str, str], port: int):
+        self.index = index
+        self.command = command
+        self.env = env
+        self.backend = Backend(f"worker-{index}", "127.0.0.1", port)
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.health_failures = 0
+        self.in_flight = 0
+        self.restarts = 0
+        self.restart_at = 0.0
+
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        self.started_at = time.monotonic()
+        self.health_failures = 0
+        self.backend.ready = False
+        self.backend.draining = False
+        logger.info(f"👷 Started {self.backend} (pid {self.process.pid})")
+
+
+    async def stop(self, timeout: float = 15.0):
+        """SIGTERM, then SIGKILL if the process does not exit in time."""
+        self.backend.ready = False
+        if not self.alive:
+            return
+        self.process.terminate()
+        deadline = time.monotonic() + timeout
+        while self.alive and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.alive:
+            logger.warning(f"👷 {self.backend} did not stop in {timeout:.0f}s, killing it")
+            self.process.kill()
+            await asyncio.sleep(0.1)
+
+
+class WorkerSupervisor:
+    """
+    Runs N copies of an app behind the load balancer.
+
+    A monitor loop probes every worker: /ready decides whether it is in rotation
+    (and reports its in-flight requests), /health failing repeatedly after the
+    startup grace period gets it killed. Exited workers are restarted with
+    exponential backoff. A rolling restart drains one worker at a time: it
+    leaves rotation, finishes its in-flight chats (up to drain_timeout), and
+    is replaced before the next one goes.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        port_env: Tuple[str, str],
+        workers: int,
+        base_port: int,
+        health_interval: float = 2.0,
+        drain_timeout: float = 120.0,
+        startup_grace: float = 120.0,
+        max_health_failures: int = 3,
+        extra_env: Optional[Dict[str, str]] = None
+    ):
+        host_var, port_var = port_env
+        self.workers: List[Worker] = []
+        for index in range(workers):
+            env = dict(os.environ, **(extra_env or {}))
+            env.update({host_var: "127.0.0.1", port_var: str(base_port + index), "WORKER_INDEX": str(index)})
+            self.workers.append(Worker(index, command, env, base_port + index))
+
+        self.health_interval = health_interval
+        self.drain_timeout = drain_timeout
+        self.startup_grace = startup_grace
+        self.max_health_failures = max_health_failures
+        self._stopping = False
+        self._restarting = asyncio.Lock()
+
+
+    @property
+    def backends(self) -> List[Backend]:
+        return [worker.backend for worker in self.workers]
+
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+
+    async def monitor(self):
+        """Probe, restart crashed workers; runs until shutdown()."""
+        while not self._stopping:
+            await asyncio.gather(*(self._check(worker) for worker in self.workers))
+            await asyncio.sleep(self.health_interval)
+
+
+    async def rolling_restart(self):
+        """Replace every worker, one at a time, without dropping in-flight requests."""
+        async with self._restarting:
+            logger.info("🔁 Rolling restart started")
+            for worker in self.workers:
+                if self._stopping:
+                    return
+                await self._drain(worker)
+                await worker.stop()
+                worker.start()
+                await self._wait_ready(worker)
+            logger.info("🔁 Rolling restart finished")
+
+
+    async def shutdown(self):
+        self._stopping = True
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+
+    async def _check(self, worker: Worker):
+        if self._stopping:
+            return
+        if worker.process is None:
+            if worker.restart_at and time.monotonic() >= worker.restart_at:
+                worker.start()
+            return
+        if not worker.alive:
+            if self._restarting.locked() and worker.backend.draining:
+                return  # being replaced by the rolling restart
+            worker.backend.ready = False
+            worker.restarts += 1
+            backoff = min(30.0, 2.0 ** min(worker.restarts, 5))
+            logger.error(f"💥 {worker.backend} exited with code {worker.process.returncode}; restarting in {backoff:.0f}s")
+            worker.process = None
+            worker.restart_at = time.monotonic() + backoff
+            return
+
+        await self._probe(worker)
+        if worker.backend.ready and time.monotonic() - worker.started_at > 300:
+            worker.restarts = 0  # stable again, reset the backoff
+
+        if worker.health_failures >= self.max_health_failures and time.monotonic() - worker.started_at > self.startup_grace:
+            logger.error(f"💥 {worker.backend} failed {worker.health_failures} health checks; restarting it")
+            await worker.stop(timeout=5.0)
+
+
+    async def _probe(self, worker: Worker):
+        backend = worker.backend
+        try:
+            status, body = await http_get(backend.host, backend.port, "/ready")
+            worker.health_failures = 0
+            worker.in_flight = int(body.get("in_flight", 0))
+            if status == 200 and not backend.ready:
+                logger.info(f"✅ {backend} is ready")
+            backend.ready = status == 200
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            worker.health_failures += 1
+            backend.ready = False
+            try:
+                # Still answering liveness while the readiness probe fails
+                await http_get(backend.host, backend.port, "/health")
+                worker.health_failures = 0
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                pass
+
+
+    async def _drain(self, worker: Worker):
+        worker.backend.draining = True
+        logger.info(f"🚰 Draining {worker.backend}")
+        deadline = time.monotonic() + self.drain_timeout
+        while worker.alive and time.monotonic() < deadline:
+            # Let requests already routed to it get counted before checking
+            await asyncio.sleep(0.5)
+            await self._probe(worker)
+            if worker.in_flight == 0:
+                return
+        if worker.alive:
+            logger.warning(f"🚰 {worker.backend} still had {worker.in_flight} request(s) after {self.drain_timeout:.0f}s")
+
+
+    async def _wait_ready(self, worker: Worker):
+        deadline = time.monotonic() + self.startup_grace
+        while not self._stopping and time.monotonic() < deadline:
+            await self._probe(worker)
+            if worker.backend.ready:
+                return
+            await asyncio.sleep(0.5)
+        logger.warning(f"⚠️ {worker.backend} not ready after {self.startup_grace:.0f}s, continuing")
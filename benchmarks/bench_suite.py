@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite, runnable offline with fake model backends.
+
+Measures import and warm-up time, process_pdf throughput and peak RSS, DocumentSearchTool.search
+latency against corpus size, per-step framework overhead of AgenticRAG.chat
+and MemoryManager write latency against history size. Results are written as
+JSON and compared with a stored baseline; the exit code is 1 when a metric
+regressed beyond the threshold.
+
+    python -m benchmarks.bench_suite                      # run, compare with benchmarks/baseline.json
+    python -m benchmarks.bench_suite --quick --only search
+    python -m benchmarks.bench_suite --update-baseline    # record a new baseline
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stand-in models and no side effects; must be set before backend settings are imported
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("TAVILY_API_KEY", "")
+os.environ.setdefault("METRICS_PORT", "0")
+
+from benchmarks import synthetic  # noqa: E402
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+
+FULL = {
+    "pdf_pages": [10, 50, 200],
+    "corpus_sizes": [1000, 5000, 20000],
+    "search_queries": 200,
+    "chat_requests": 30,
+    "history_sizes": [0, 1000, 5000],
+    "history_writes": 200,
+}
+QUICK = {
+    "pdf_pages": [10, 50],
+    "corpus_sizes": [500, 2000],
+    "search_queries": 50,
+    "chat_requests": 10,
+    "history_sizes": [0, 500],
+    "history_writes": 50,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _quiet_logging():
+    import logging
+    from backend.services.logger import logger
+    logger.setLevel(logging.WARNING)
+
+
+def _in_workdir(func: Callable[[str], Any]) -> Any:
+    """Run func(workdir) inside a scratch directory (process_pdf saves faiss_index to the cwd)."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            return func(workdir)
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------- startup
+
+def _warm_up_child() -> float:
+    """Seconds to import and build AgenticRAG in a fresh process (the UI's background warm-up)."""
+    _quiet_logging()
+    started = time.perf_counter()
+    from backend.services.agentic_rag import AgenticRAG
+    _in_workdir(lambda workdir: AgenticRAG(memory_path=os.path.join(workdir, "memory_store")))
+    return time.perf_counter() - started
+
+
+def bench_startup(config: Dict[str, Any]) -> Dict[str, Any]:
+    from benchmarks.import_profile import DEFAULT_MODULES, profile_import
+
+    metrics, details = {}, {}
+    for module in DEFAULT_MODULES:
+        profile = profile_import(module, top=10)
+        details[module] = profile
+        metrics[f"startup.import_ms.{module}"] = metric(profile["total_ms"], "ms")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        warm_up = pool.apply(_warm_up_child)
+    metrics["startup.warm_up_ms"] = metric(warm_up * 1000, "ms")
+    return {"metrics": metrics, "details": details}
+
+
+# ---------------------------------------------------------------- ingestion
+
+def _ingest_child(pages: int) -> Dict[str, float]:
+    """Runs in a fresh process so peak RSS reflects one ingestion only."""
+    _quiet_logging()
+    from backend.services.agentic_rag import AgenticRAG
+
+    def run(workdir: str) -> Dict[str, float]:
+        pdf_path = synthetic.write_pdf(os.path.join(workdir, f"synthetic_{pages}.pdf"), pages)
+        rag = AgenticRAG(memory_path=os.path.join(workdir, "memory_store"))
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        result = rag.process_pdf(pdf_path)
+        elapsed = time.perf_counter() - started
+        if not result.get("success"):
+            raise RuntimeError(f"process_pdf failed: {result.get('error')}")
+        return {
+            "seconds": elapsed,
+            "pages": result["pages"],
+            "chunks": result["chunks"],
+            "rss_before_mb": rss_before,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    return _in_workdir(run)
+
+
+def bench_ingest(config: Dict[str, Any]) -> Dict[str, Any]:
+    metrics, details = {}, []
+    context = multiprocessing.get_context("spawn")
+    for pages in config["pdf_pages"]:
+        with context.Pool(1) as pool:
+            run = pool.apply(_ingest_child, (pages,))
+        details.append(run)
+        metrics[f"ingest.pages_per_sec.{pages}p"] = metric(run["pages"] / run["seconds"], "pages/s", "higher")
+        metrics[f"ingest.peak_rss_mb.{pages}p"] = metric(run["peak_rss_mb"], "MB")
+    return {"metrics": metrics, "details": details}
+
+
+# ---------------------------------------------------------------- retrieval
+
+def bench_search(config: Dict[str, Any]) -> Dict[str, Any]:
+    from langchain_community.vectorstores import FAISS
+    from backend.services.model_backends import HashEmbeddings
+    from backend.services.tool_document_search import DocumentSearchTool
+
+    embeddings = HashEmbeddings()
+    queries = synthetic.make_queries(config["search_queries"])
+    metrics, details = {}, []
+    for size in config["corpus_sizes"]:
+        vectorstore = FAISS.from_documents(synthetic.make_chunks(size), embeddings)
+        tool = DocumentSearchTool(vectorstore)
+        tool.search(queries[0])  # warm-up
+
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            tool.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        p50, p99 = percentile(samples, 0.50), percentile(samples, 0.99)
+        details.append({"corpus_size": size, "queries": len(samples), "p50_ms": p50, "p99_ms": p99})
+        metrics[f"search.p50_ms.{size}"] = metric(p50, "ms")
+        metrics[f"search.p99_ms.{size}"] = metric(p99, "ms")
+    return {"metrics": metrics, "details": details}
+
+
+# ---------------------------------------------------------------- chat
+
+def bench_chat(config: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.agentic_rag import AgenticRAG
+
+    queries = [
+        "What does the document say about vector indexes?",
+        "Calculate 17*23 + 4",
+        "Hello, how are you?",
+        "Summarize the pdf section on latency",
+    ]
+
+    def run(workdir: str) -> Dict[str, Any]:
+        rag = AgenticRAG(memory_path=os.path.join(workdir, "memory_store"))
+        rag.process_pdf(synthetic.write_pdf(os.path.join(workdir, "chat.pdf"), 5))
+        rag.chat("warm-up")
+
+        per_chat, per_step, steps = [], [], []
+        for i in range(config["chat_requests"]):
+            # Unique suffix so single-flight and caches never short-circuit a run
+            result = rag.chat(f"{queries[i % len(queries)]} ({i})")
+            trace = result["metadata"]["trace"]
+            breakdown = trace.get("breakdown_ms", {})
+            overhead = trace["duration_ms"] - breakdown.get("llm", 0.0) - breakdown.get("embedding", 0.0)
+            llm_calls = max(1, trace.get("llm_calls", 0))
+            per_chat.append(overhead)
+            per_step.append(overhead / llm_calls)
+            steps.append(llm_calls)
+        return {"per_chat": per_chat, "per_step": per_step, "steps": steps}
+
+    run_result = _in_workdir(run)
+    per_step = run_result["per_step"]
+    return {
+        "metrics": {
+            "chat.overhead_per_step_p50_ms": metric(percentile(per_step, 0.50), "ms"),
+            "chat.overhead_per_step_p99_ms": metric(percentile(per_step, 0.99), "ms"),
+            "chat.overhead_per_chat_mean_ms": metric(statistics.fmean(run_result["per_chat"]), "ms"),
+        },
+        "details": {"requests": len(per_step), "mean_llm_steps": statistics.fmean(run_result["steps"])},
+    }
+
+
+# ---------------------------------------------------------------- persistence
+
+def bench_history(config: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.memory_manager import MemoryManager
+
+    rng = random.Random(7)
+    metrics, details = {}, []
+    for size in config["history_sizes"]:
+        def run(workdir: str) -> Dict[str, Any]:
+            manager = MemoryManager(memory_path=os.path.join(workdir, "memory_store"))
+            for _ in range(size):
+                manager.add_interaction(**synthetic.make_interaction(rng))
+
+            samples = []
+            for _ in range(config["history_writes"]):
+                interaction = synthetic.make_interaction(rng)
+                started = time.perf_counter()
+                manager.add_interaction(**interaction)
+                samples.append((time.perf_counter() - started) * 1000)
+            return {"history_size": size, "writes": len(samples),
+                    "p50_ms": percentile(samples, 0.50), "p99_ms": percentile(samples, 0.99)}
+
+        run_result = _in_workdir(run)
+        details.append(run_result)
+        metrics[f"history.write_p50_ms.{size}"] = metric(run_result["p50_ms"], "ms")
+        metrics[f"history.write_p99_ms.{size}"] = metric(run_result["p99_ms"], "ms")
+    return {"metrics": metrics, "details": details}
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "startup": bench_startup,
+    "ingest": bench_ingest,
+    "search": bench_search,
+    "chat": bench_chat,
+    "history": bench_history,
+}
+
+
+# ---------------------------------------------------------------- baseline
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Compare metrics present in both runs. A metric regresses when it is worse
+    than the baseline by more than threshold (0.2 = 20% slower/larger/fewer);
+    latencies must also be at least min_delta_ms worse, so sub-millisecond
+    jitter is not reported.
+    """
+    rows = []
+    for name, current in sorted(results["metrics"].items()):
+        previous = baseline.get("metrics", {}).get(name)
+        if not previous or not previous["value"]:
+            continue
+        if current["better"] == "higher":
+            change = previous["value"] / current["value"] - 1 if current["value"] else float("inf")
+        else:
+            change = current["value"] / previous["value"] - 1
+        rows.append({
+            "metric": name,
+            "baseline": previous["value"],
+            "current": current["value"],
+            "unit": current["unit"],
+            "slowdown": round(change, 4),
+            "regressed": change > threshold and not (
+                current["unit"] == "ms" and abs(current["value"] - previous["value"]) < min_delta_ms
+            ),
+        })
+    return rows
+
+
+def print_report(results: Dict[str, Any], rows: List[Dict[str, Any]], threshold: float):
+    compared = {row["metric"]: row for row in rows}
+    print(f"\n{'metric':<48} {'current':>12} {'baseline':>12} {'change':>9}")
+    for name, current in sorted(results["metrics"].items()):
+        row = compared.get(name)
+        baseline = f"{row['baseline']:.3f}" if row else "-"
+        change = f"{row['slowdown'] * 100:+.1f}%" if row else ""
+        flag = "  REGRESSED" if row and row["regressed"] else ""
+        print(f"{name:<48} {current['value']:>12.3f} {baseline:>12} {change:>9}{flag}")
+    regressions = [row for row in rows if row["regressed"]]
+    if rows:
+        print(f"\n{len(regressions)} of {len(rows)} metrics regressed beyond {threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the ChatBot backend")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs for a fast smoke run")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore latency changes smaller than this")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    args = parser.parse_args()
+
+    _quiet_logging()
+    config = QUICK if args.quick else FULL
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(),
+        "quick": args.quick,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "metrics": {},
+        "details": {},
+    }
+
+    for name in args.only or BENCHMARKS:
+        print(f"▶ {name} ...", flush=True)
+        started = time.perf_counter()
+        outcome = BENCHMARKS[name](config)
+        results["metrics"].update(outcome["metrics"])
+        results["details"][name] = outcome["details"]
+        print(f"  done in {time.perf_counter() - started:.1f}s", flush=True)
+
+    rows: List[Dict[str, Any]] = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.update_baseline:
+        rows = compare(results, json.loads(baseline_path.read_text()), args.threshold, args.min_delta_ms)
+        results["comparison"] = {"baseline": str(baseline_path), "threshold": args.threshold, "rows": rows}
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"📌 Baseline written to {baseline_path}")
+
+    print_report(results, rows, args.threshold)
+    print(f"Results written to {output}")
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
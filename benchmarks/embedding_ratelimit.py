@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Rate-limited stand-in for the OpenAI embeddings API, and a driver that runs
+the ingest embedding scheduler against it.
+
+The server speaks POST /v1/embeddings (float or base64 encoding), enforces
+requests- and tokens-per-minute limits with 429 + Retry-After and
+x-ratelimit-remaining-* headers like the real API, and can fail a fraction
+of requests with 500s.
+
+    python -m benchmarks.embedding_ratelimit                       # sequential vs scheduler, then resume after a failure
+    python -m benchmarks.embedding_ratelimit --texts 5000 --rpm 1200 --tpm 400000
+    python -m benchmarks.embedding_ratelimit --serve --port 8001   # only the server (OPENAI_BASE_URL=http://127.0.0.1:8001/v1)
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Limit:
+    """Per-minute limit refilled continuously, holding at most `burst_seconds` worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_second = per_minute / 60.0
+        self.capacity = max(1.0, self.per_second * burst_seconds)
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def check(self, amount: float, now: float) -> float:
+        """0 if `amount` fits (a request larger than the bucket needs a full one), else seconds until it does."""
+        if self.per_second <= 0:
+            return 0.0
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.per_second)
+        self.updated = now
+        needed = min(amount, self.capacity)
+        return max(0.0, (needed - self.available) / self.per_second)
+
+    def take(self, amount: float):
+        if self.per_second > 0:
+            self.available -= amount
+
+
+class RateLimitedEmbeddingServer:
+    """OpenAI-compatible /v1/embeddings on 127.0.0.1 with RPM/TPM limits, latency and injected errors."""
+
+    def __init__(self, rpm: float, tpm: float, dimensions: int = 256, latency: float = 0.05,
+                 error_rate: float = 0.0, burst_seconds: float = 5.0, port: int = 0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_after = None  # serve this many more requests, then fail every request with 500
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "inputs": 0}
+        self._requests = _Limit(rpm, burst_seconds)
+        self._tokens = _Limit(tpm, burst_seconds)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> "RateLimitedEmbeddingServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _admit(self, inputs: List[Any]) -> Any:
+        """None if the request may run, ("429", retry_after, headers) or ("500", message) otherwise."""
+        tokens = sum(len(item) if isinstance(item, list) else max(1, len(item) // 4) for item in inputs)
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.fail_after is not None:
+                if self.fail_after <= 0:
+                    self.stats["errors"] += 1
+                    return ("500", "injected outage")
+                self.fail_after -= 1
+            now = time.monotonic()
+            request_wait, token_wait = self._requests.check(1, now), self._tokens.check(tokens, now)
+            if request_wait or token_wait:
+                self.stats["rate_limited"] += 1
+                return ("429", max(request_wait, token_wait), {
+                    "x-ratelimit-remaining-requests": "0" if request_wait else str(int(self._requests.available)),
+                    "x-ratelimit-remaining-tokens": "0" if token_wait else str(int(self._tokens.available)),
+                })
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return ("500", "injected error")
+            self.stats["ok"] += 1
+            self.stats["inputs"] += len(inputs)
+            return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/embeddings":
+                    return self._reply(404, {"error": {"message": "not found"}})
+                request = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+                inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+                if inputs and isinstance(inputs[0], int):
+                    inputs = [inputs]
+
+                refused = server._admit(inputs)
+                if refused and refused[0] == "429":
+                    return self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                                       {"retry-after-ms": str(int(refused[1] * 1000) + 1), **refused[2]})
+                if refused:
+                    return self._reply(500, {"error": {"message": refused[1], "type": "server_error"}})
+
+                time.sleep(server.latency)
+                data = []
+                for i, item in enumerate(inputs):
+                    vector = server.embed(item if isinstance(item, str) else " ".join(map(str, item)))
+                    if request.get("encoding_format") == "base64":
+                        embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+                    else:
+                        embedding = vector.tolist()
+                    data.append({"object": "embedding", "index": i, "embedding": embedding})
+                self._reply(200, {"object": "list", "data": data, "model": request.get("model", "stand-in"),
+                                  "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+        return Handler
+
+
+def synthetic_chunks(count: int, words: int = 180) -> List[str]:
+    rng = random.Random(7)
+    vocabulary = [f"term{i}" for i in range(2000)]
+    return [f"chunk {i}: " + " ".join(rng.choice(vocabulary) for _ in range(words)) for i in range(count)]
+
+
+def client(server: RateLimitedEmbeddingServer):
+    from langchain_openai import OpenAIEmbeddings
+    # The scheduler owns retries; the stand-in takes raw strings (no local tiktoken pass)
+    return OpenAIEmbeddings(model="stand-in", base_url=server.base_url, api_key="stand-in",
+                            max_retries=0, check_embedding_ctx_length=False, chunk_size=2048)
+
+
+def run_sequential(server: RateLimitedEmbeddingServer, texts: List[str]) -> Dict[str, Any]:
+    """The old ingest path: one embed_documents call, batches sent one at a time, client-side retries only."""
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(model="stand-in", base_url=server.base_url, api_key="stand-in",
+                                  max_retries=6, check_embedding_ctx_length=False, chunk_size=64)
+    started = time.perf_counter()
+    try:
+        embeddings.embed_documents(texts)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"seconds": round(time.perf_counter() - started, 2), "error": error}
+
+
+def run_scheduler(server: RateLimitedEmbeddingServer, texts: List[str], args: argparse.Namespace, checkpoint_path: str) -> Dict[str, Any]:
+    from backend.services.embedding_scheduler import EmbeddingScheduler
+    scheduler = EmbeddingScheduler(client(server), namespace="stand-in", requests_per_minute=args.client_rpm,
+                                   tokens_per_minute=args.client_tpm, max_in_flight=args.in_flight,
+                                   max_retries=args.retries, checkpoint_path=checkpoint_path)
+    started = time.perf_counter()
+    try:
+        vectors = scheduler.embed(texts)
+        error = None
+    except Exception as e:
+        vectors, error = None, f"{type(e).__name__}: {e}"
+    result = {"seconds": round(time.perf_counter() - started, 2), "error": error, "final_batch_size": scheduler.batch_size}
+    if vectors is not None:
+        expected = server.embed(texts[-1])
+        result["correct"] = len(vectors) == len(texts) and bool(np.allclose(vectors[-1], expected, atol=1e-6))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding scheduler against a rate-limited stand-in API")
+    parser.add_argument("--texts", type=int, default=3000)
+    parser.add_argument("--rpm", type=float, default=300, help="server requests per minute")
+    parser.add_argument("--tpm", type=float, default=6000000, help="server tokens per minute")
+    parser.add_argument("--latency", type=float, default=0.5, help="server seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--client-rpm", type=float, help="scheduler requests per minute (default: --rpm; set higher to provoke 429s)")
+    parser.add_argument("--client-tpm", type=float, help="scheduler tokens per minute (default: --tpm)")
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--serve", action="store_true", help="only run the server")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    args.client_rpm = args.client_rpm or args.rpm
+    args.client_tpm = args.client_tpm or args.tpm
+    os.environ.setdefault("METRICS_PORT", "0")
+
+    server = RateLimitedEmbeddingServer(args.rpm, args.tpm, latency=args.latency, error_rate=args.error_rate, port=args.port).start()
+    if args.serve:
+        print(f"Stand-in embeddings API on {server.base_url} ({args.rpm:.0f} rpm, {args.tpm:.0f} tpm)")
+        threading.Event().wait()
+        return
+
+    texts = synthetic_chunks(args.texts)
+    report: Dict[str, Any] = {"texts": len(texts), "server": {"rpm": args.rpm, "tpm": args.tpm, "latency": args.latency}}
+
+    report["sequential"] = run_sequential(server, texts)
+    report["sequential"]["server"] = dict(server.stats)
+
+    with tempfile.TemporaryDirectory() as checkpoint_path:
+        server.stats = dict.fromkeys(server.stats, 0)
+        report["scheduler"] = run_scheduler(server, texts, args, checkpoint_path)
+        report["scheduler"]["server"] = dict(server.stats)
+
+        # Outage partway through, then a second run picks up from the checkpoint
+        server.stats = dict.fromkeys(server.stats, 0)
+        server.fail_after = max(1, args.texts // 128)
+        args.retries = 2
+        report["interrupted"] = run_scheduler(server, texts, args, checkpoint_path)
+        server.fail_after = None
+        args.retries = 6
+        before = server.stats["inputs"]
+        report["resumed"] = run_scheduler(server, texts, args, checkpoint_path)
+        report["resumed"]["inputs_embedded"] = server.stats["inputs"] - before
+
+    server.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
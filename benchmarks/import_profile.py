@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the application entry points.
+
+Runs `python -X importtime -c "import <module>"` in a clean interpreter for
+each target and reports total import time, the slowest modules (cumulative)
+and time per top-level package (self time), as text and JSON.
+
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile --module frontend.app --top 30 --output import_profile.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["frontend.app", "backend.services.agentic_rag"]
+
+
+def profile_import(module: str, top: int = 20) -> Dict[str, Any]:
+    """Import module in a fresh interpreter and summarize -X importtime output."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us), int(cumulative_us)))
+
+    total_us = next((cumulative for name, _, cumulative in entries if name.strip() == module), 0)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_package[name.strip().split(".")[0]] += self_us
+
+    slowest = sorted(entries, key=lambda e: e[2], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(entries),
+        "slowest_cumulative_ms": [{"module": name.strip(), "ms": round(cum / 1000, 1)} for name, _, cum in slowest],
+        "packages_self_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+    }
+
+
+def print_profile(profile: Dict[str, Any]):
+    print(f"\n📦 import {profile['module']}: {profile['total_ms']:.0f} ms ({profile['modules_imported']} modules)")
+    print("  by package (self time):")
+    for package, ms in profile["packages_self_ms"].items():
+        print(f"    {package:<36} {ms:>8.1f} ms")
+    print("  slowest modules (cumulative):")
+    for entry in profile["slowest_cumulative_ms"]:
+        print(f"    {entry['module']:<36} {entry['ms']:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the app entry points")
+    parser.add_argument("--module", action="append", help="Module to profile (repeatable)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    profiles: List[Dict[str, Any]] = [profile_import(module, args.top) for module in args.module or DEFAULT_MODULES]
+    for profile in profiles:
+        print_profile(profile)
+    if args.output:
+        Path(args.output).write_text(json.dumps(profiles, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Offline load generator for the Agentic RAG framework.
+
+Runs chat() and/or process_pdf() against fake or replayed model backends and
+reports how much time the framework itself spends per call, i.e. wall time
+minus the simulated LLM and embedding latency.
+
+    python -m benchmarks.loadgen --mode chat --requests 200 --concurrency 8 --llm-latency lognormal:0.5,0.3
+    python -m benchmarks.loadgen --mode pdf --pdf docs/sample.pdf --requests 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+DEFAULT_QUERIES = [
+    "What does the document say about databases?",
+    "Calculate 25*4 + 10",
+    "Explain cloud computing",
+    "Summarize the PDF",
+    "What is 100/12?",
+    "Compare Azure and AWS",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p90_ms": round(percentile(samples, 0.90), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "max_ms": round(max(samples), 3) if samples else 0.0,
+    }
+
+
+def configure_backends(args: argparse.Namespace):
+    """Select offline backends before the settings module is imported."""
+    os.environ["LLM_BACKEND"] = args.llm_backend
+    os.environ["EMBEDDING_BACKEND"] = args.embedding_backend
+    os.environ["FAKE_LLM_LATENCY"] = args.llm_latency
+    os.environ["FAKE_EMBEDDING_LATENCY"] = args.embedding_latency
+    os.environ["AGENT_MODE"] = args.agent_mode
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    os.environ.setdefault("TAVILY_API_KEY", "")
+    os.environ.setdefault("METRICS_PORT", "0")
+    if args.recordings:
+        os.environ["RECORDING_PATH"] = args.recordings
+
+
+def run_chat(rag, queries: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    wall, overhead = [], []
+
+    def one(i: int):
+        started = time.perf_counter()
+        result = rag.chat(queries[i % len(queries)])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        breakdown = result.get("metadata", {}).get("trace", {}).get("breakdown_ms", {})
+        simulated_ms = breakdown.get("llm", 0.0) + breakdown.get("embedding", 0.0)
+        return elapsed_ms, max(0.0, elapsed_ms - simulated_ms)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed_ms, overhead_ms in pool.map(one, range(requests)):
+            wall.append(elapsed_ms)
+            overhead.append(overhead_ms)
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / duration, 2) if duration else 0.0,
+        "wall": summarize(wall),
+        "framework_overhead": summarize(overhead),
+    }
+
+
+def run_pdf(rag, pdf_path: str, requests: int) -> Dict[str, Any]:
+    wall, pages_per_sec = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        result = rag.process_pdf(pdf_path)
+        elapsed = time.perf_counter() - started
+        if not result.get("success"):
+            raise RuntimeError(f"process_pdf failed: {result.get('error')}")
+        wall.append(elapsed * 1000)
+        pages_per_sec.append(result["pages"] / elapsed if elapsed else 0.0)
+    return {
+        "requests": requests,
+        "wall": summarize(wall),
+        "pages_per_sec": round(statistics.fmean(pages_per_sec), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load generator for AgenticRAG")
+    parser.add_argument("--mode", choices=["chat", "pdf", "both"], default="chat")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pdf", help="PDF to ingest (required for pdf mode; indexed first in chat mode if given)")
+    parser.add_argument("--queries", help="File with one query per line")
+    parser.add_argument("--llm-backend", default="fake", choices=["fake", "replay"])
+    parser.add_argument("--embedding-backend", default="fake", choices=["fake", "replay"])
+    parser.add_argument("--agent-mode", default="react", choices=["react", "tools"])
+    parser.add_argument("--llm-latency", default="none", help="e.g. lognormal:0.8,0.4")
+    parser.add_argument("--embedding-latency", default="none", help="e.g. fixed:0.05")
+    parser.add_argument("--recordings", help="Directory with llm.jsonl / embeddings.jsonl for replay")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    configure_backends(args)
+    from backend.services.agentic_rag import AgenticRAG
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        queries = [line.strip() for line in Path(args.queries).read_text().splitlines() if line.strip()]
+
+    report: Dict[str, Any] = {
+        "backends": {"llm": args.llm_backend, "embeddings": args.embedding_backend},
+        "agent_mode": args.agent_mode
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        pdf_path = os.path.abspath(args.pdf) if args.pdf else None
+        os.chdir(workdir)  # keep the FAISS index and history out of the repo
+        try:
+            rag = AgenticRAG(memory_path=os.path.join(workdir, "memory_store"))
+            if args.mode in ("pdf", "both"):
+                if not pdf_path:
+                    parser.error("--pdf is required for pdf mode")
+                report["process_pdf"] = run_pdf(rag, pdf_path, args.requests)
+            elif pdf_path:
+                rag.process_pdf(pdf_path)
+            if args.mode in ("chat", "both"):
+                report["chat"] = run_chat(rag, queries, args.requests, args.concurrency)
+        finally:
+            os.chdir(cwd)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Synthetic inputs for benchmarks: multi-page text PDFs, document chunks and
+chat interactions, generated deterministically from a seed.
+"""
+
+from typing import List
+import random
+
+from langchain_core.documents import Document
+
+
+WORDS = (
+    "agent retrieval vector index embedding document query answer model latency cloud "
+    "database storage network compute memory cache stream batch request response token "
+    "python search summary analysis report revenue customer product service platform "
+    "security policy region cluster replica backup schedule pipeline metric dashboard"
+).split()
+
+
+def sentence(rng: random.Random, min_words: int = 8, max_words: int = 18) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 45, seed: int = 0) -> str:
+    """Write a plain-text PDF with the given number of pages (Helvetica, no compression)."""
+    rng = random.Random(seed)
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        lines = [_escape(sentence(rng, 10, 14)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        content = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+def make_chunks(count: int, seed: int = 0) -> List[Document]:
+    """Chunk-sized documents (~1000 chars) as the text splitter would produce."""
+    rng = random.Random(seed)
+    return [
+        Document(page_content=paragraph(rng, 8)[:1000], metadata={"page": i // 4, "source": "synthetic.pdf"})
+        for i in range(count)
+    ]
+
+
+def make_queries(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [sentence(rng, 4, 8) for _ in range(count)]
+
+
+def make_interaction(rng: random.Random) -> dict:
+    tool = rng.choice(["DocumentSearch", "Calculator", "Wikipedia", "TextAnalysis"])
+    return {
+        "query": sentence(rng),
+        "response": paragraph(rng, 4),
+        "agent_steps": [{"tool": tool, "input": sentence(rng, 3, 6), "output": paragraph(rng, 2)[:200]}],
+        "tools_used": [tool],
+    }
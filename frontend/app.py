@@ -15,11 +15,19 @@ Version: 3.0 - Enhanced Dynamic UI
 """
 import os
 import sys
+import threading
 import gradio as gr
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, TYPE_CHECKING
 from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from backend.services.agentic_rag import AgenticRAG
+from backend.services.logger import logger
+from backend.services import metrics
+from backend.services.session_store import SessionStore
+from backend.services.lane_gate import LaneOverloaded, create_lanes
+from backend.config.settings import settings
+
+if TYPE_CHECKING:
+    from backend.services.agentic_rag import AgenticRAG
 
 
 CUSTOM_CSS = """
@@ -263,44 +271,115 @@ CUSTOM_CSS = """
 # Global System Instance
 # ═══════════════════════════════════════════════════════════════════
 
-rag_system = AgenticRAG()
+# Built in a background thread so the UI binds its port immediately;
+# handlers wait for warm-up to finish on first use.
+_rag_system: Optional["AgenticRAG"] = None
+_rag_error: Optional[BaseException] = None
+_rag_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def _warm_up():
+    global _rag_system, _rag_error
+    started = datetime.now()
+    try:
+        from backend.services.agentic_rag import AgenticRAG
+        _rag_system = AgenticRAG()
+        logger.info(f"🔥 Warm-up finished in {(datetime.now() - started).total_seconds():.1f}s")
+    except BaseException as e:
+        _rag_error = e
+        logger.error(f"Warm-up failed: {e}")
+    finally:
+        _rag_ready.set()
+
+
+def start_warm_up():
+    """Start building the RAG system in the background (idempotent)."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+
+
+def get_rag_system() -> "AgenticRAG":
+    """The shared RAG system, waiting for warm-up if it is still running."""
+    start_warm_up()
+    _rag_ready.wait()
+    if _rag_error is not None:
+        raise RuntimeError(f"System failed to start: {_rag_error}")
+    return _rag_system
 
 # ═══════════════════════════════════════════════════════════════════
 # UI Handler Functions
 # ═══════════════════════════════════════════════════════════════════
 
-def load_conversation_history() -> Tuple[List[Tuple[str, str]], str]:
-    """Load past conversation history when UI starts."""
+# Conversation per browser session, kept server-side: handlers get only the new
+# message and send back a bounded window instead of round-tripping the chatbot
+sessions = SessionStore(
+    window=settings.chat_window_turns,
+    max_turns=settings.chat_session_max_turns,
+    max_sessions=settings.chat_max_sessions,
+    idle_ttl=settings.chat_session_ttl
+)
+
+
+# Queue lanes: chat, ingestion and admin/analytics each get their own slots and
+# wait queue, so one large ingest or export cannot stall chat for everyone
+lanes = create_lanes(settings.ui_lanes, max_wait=settings.ui_queue_max_wait)
+LANE_LABELS = {"chat": "Chat", "ingest": "Document processing", "admin": "Admin tools"}
+
+
+def in_lane(lane: str, func):
+    """Run a UI handler in its lane; a full lane shows a clear "busy" message instead of queueing."""
+    gate = lanes.get(lane)
+    if gate is None:
+        return func
+
+    def overloaded(error: LaneOverloaded):
+        raise gr.Error(
+            f"⏳ {LANE_LABELS.get(lane, lane)} is at capacity right now. {error}. Please try again in a moment.",
+            title="Server busy",
+            print_exception=False
+        )
+
+    return gate.wrap(func, on_overload=overloaded)
+
+
+def load_conversation_history(request: gr.Request) -> Tuple[List[Tuple[str, str]], str, Dict]:
+    """Load the most recent conversations into this session when the UI starts."""
     try:
-        history = rag_system.get_conversation_history(num_interactions=50)
-        
-        if not history:
+        page = get_rag_system().get_history_page(limit=settings.chat_window_turns)
+        session = sessions.open(
+            request.session_hash,
+            [(index, (interaction.query, interaction.response)) for index, interaction in page],
+            page[0][0] if page else None
+        )
+        older_btn = gr.update(interactive=session.has_older)
+
+        if not page:
             return [], """
             <div class="status-card status-info">
                 <h3>💬 New Session</h3>
                 <p>No previous conversations found. Start a new conversation!</p>
             </div>
-            """
-        
-        # Convert to Gradio chatbot format
-        chat_history = []
-        for interaction in history:
-            chat_history.append((interaction.query, interaction.response))
+            """, older_btn
         
         status_msg = f"""
         <div class="status-card status-success">
             <h3>📂 Conversation History Loaded</h3>
-            <p>✅ Restored <strong>{len(history)}</strong> previous conversations</p>
+            <p>✅ Restored <strong>{len(page)}</strong> previous conversations</p>
             <p style="font-size: 0.9em; opacity: 0.8; margin-top: 0.5rem;">
-                Last conversation: {history[-1].timestamp if history else 'N/A'}
+                Last conversation: {page[-1][1].timestamp}
             </p>
             <p style="font-size: 0.85em; margin-top: 1rem;">
-                💡 <strong>Tip:</strong> Your conversations are automatically saved. You can continue where you left off!
+                💡 <strong>Tip:</strong> Your conversations are automatically saved. Use "⬆️ Load Older" to page back further.
             </p>
         </div>
         """
         
-        return chat_history, status_msg
+        return session.window(), status_msg, older_btn
         
     except Exception as e:
         return [], f"""
@@ -309,7 +388,27 @@ def load_conversation_history() -> Tuple[List[Tuple[str, str]], str]:
             <p>Error: {str(e)}</p>
             <p>Starting fresh session...</p>
         </div>
-        """
+        """, gr.update()
+
+
+def load_older_turns(request: gr.Request) -> Tuple[List[Tuple[str, str]], Dict]:
+    """Show one more page of older turns, fetching them from history when needed."""
+    session = sessions.get(request.session_hash)
+    if session is None:
+        chat_history, _, older_btn = load_conversation_history(request)
+        return chat_history, older_btn
+
+    page_size = settings.chat_history_page
+    older, history_before = [], session.history_before
+    hidden = len(session.turns) - session.visible
+    if hidden < page_size and session.history_before:
+        page = get_rag_system().get_history_page(before=session.history_before, limit=page_size - hidden)
+        older = [(index, (interaction.query, interaction.response)) for index, interaction in page]
+        history_before = page[0][0] if page else 0
+
+    session = sessions.show_older(request.session_hash, page_size, older, history_before)
+    return session.window(), gr.update(interactive=session.has_older)
+
 
 def process_pdf_ui(pdf_file) -> str:
     """Process uploaded PDF file with enhanced visual feedback."""
@@ -321,7 +420,7 @@ def process_pdf_ui(pdf_file) -> str:
         </div>
         """
     
-    result = rag_system.process_pdf(pdf_file.name)
+    result = get_rag_system().process_pdf(pdf_file.name)
     
     if result['success']:
         return f"""
@@ -353,13 +452,14 @@ def process_pdf_ui(pdf_file) -> str:
         """
 
 
-def chat_ui(message: str, history: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], Dict]:
-    """Handle chat interaction."""
+def chat_ui(message: str, session_id: str) -> Tuple[List[Tuple[str, str]], Dict]:
+    """Handle chat interaction; returns the session's visible window and the turn's metadata."""
     if not message.strip():
-        return history, {}
+        session = sessions.get(session_id)
+        return (session.window() if session else []), {}
     
     # Get response from system
-    result = rag_system.chat(message)
+    result = get_rag_system().chat(message)
     
     # Extract response and metadata
     response = result.get('response', 'No response generated')
@@ -369,10 +469,10 @@ def chat_ui(message: str, history: List[Tuple[str, str]]) -> Tuple[List[Tuple[st
     if 'conversation_id' in result:
         metadata['conversation_id'] = result['conversation_id']
     
-    # Add to history
-    history.append((message, response))
+    # Add to the server-side session
+    session = sessions.append(session_id, (message, response), metadata.get('conversation_id'))
     
-    return history, metadata
+    return session.window(), metadata
 
 
 def display_agent_reasoning(metadata: Dict) -> str:
@@ -412,6 +512,16 @@ def display_agent_reasoning(metadata: Dict) -> str:
             icon = tool_icons.get(tool, '🔧')
             output += f'<span class="badge" style="background: #667eea; color: white; margin: 0.25rem;">{icon} {tool}</span> '
         output += '</p>'
+
+    # Timing and token usage from the request trace
+    trace = metadata.get('trace')
+    if trace:
+        output += f'<p><span class="badge badge-info">⏱️ {trace["duration_ms"] / 1000:.2f}s total</span> '
+        output += f'<span class="badge badge-info">🧠 {trace["llm_calls"]} LLM calls</span> '
+        output += f'<span class="badge badge-info">🔤 {trace["prompt_tokens"]} + {trace["completion_tokens"]} tokens</span></p>'
+        breakdown = ', '.join(f'{kind}: {ms / 1000:.2f}s' for kind, ms in trace.get('breakdown_ms', {}).items())
+        if breakdown:
+            output += f'<p style="font-size: 0.85rem; opacity: 0.8;">{breakdown}</p>'
     output += '</div>'
     
     # Agent Steps (Thought → Action → Observation)
@@ -489,7 +599,7 @@ def display_sources(metadata: Dict) -> str:
 def handle_feedback(conversation_id: int, feedback_type: str):
     """Handle user feedback with visual confirmation."""
     if conversation_id is not None and conversation_id >= 0:
-        rag_system.add_feedback(conversation_id, feedback_type)
+        get_rag_system().add_feedback(conversation_id, feedback_type)
         emoji = "👍" if feedback_type == "positive" else "👎"
         color = "#10b981" if feedback_type == "positive" else "#ef4444"
         return f"""
@@ -507,18 +617,39 @@ def handle_feedback(conversation_id: int, feedback_type: str):
 
 
 def export_logs_ui():
-    """Export interaction logs with confirmation."""
-    success = rag_system.export_logs("interaction_logs.json")
+    """Export interaction logs in the background, streaming progress to the UI."""
+    progress = {"written": 0, "total": 0}
+    outcome = {}
+
+    def on_progress(written: int, total: int):
+        progress["written"], progress["total"] = written, total
+
+    def run_export():
+        outcome.update(get_rag_system().export_logs("interaction_logs.jsonl", progress_callback=on_progress))
+
+    worker = threading.Thread(target=run_export, daemon=True)
+    worker.start()
+    while worker.is_alive():
+        yield f"""
+        <div class="status-card">
+            <h4>⏳ Exporting Logs...</h4>
+            <p><strong>Records written:</strong> {progress['written']} / ~{progress['total']}</p>
+        </div>
+        """
+        worker.join(timeout=0.5)
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    if success:
-        return f"""
+    if outcome.get('success'):
+        yield f"""
         <div class="status-card status-success">
             <h4>✅ Logs Exported Successfully</h4>
-            <p><strong>File:</strong> interaction_logs.json</p>
+            <p><strong>File:</strong> {outcome['filepath']}</p>
+            <p><strong>Records:</strong> {outcome['records']} ({outcome['bytes'] / 1024:.1f} KB in {outcome['seconds']}s)</p>
             <p><strong>Time:</strong> {timestamp}</p>
         </div>
         """
-    return """
+        return
+    yield """
     <div class="status-card status-error">
         <h4>❌ Export Failed</h4>
         <p>Unable to export logs. Please check permissions.</p>
@@ -528,7 +659,7 @@ def export_logs_ui():
 
 def clear_memory_ui():
     """Clear conversation memory with confirmation."""
-    rag_system.clear_memory()
+    get_rag_system().clear_memory()
     return """
     <div class="status-card">
         <h4>🗑️ Memory Cleared</h4>
@@ -539,9 +670,9 @@ def clear_memory_ui():
 
 def get_conversation_stats() -> str:
     """Get conversation statistics with enhanced visuals."""
-    history = rag_system.get_conversation_history(num_interactions=100)
+    columns = get_rag_system().get_history_columns()
     
-    if not history:
+    if not len(columns):
         return """
         <div class="stats-card">
             <h3>📊 Conversation Statistics</h3>
@@ -549,18 +680,15 @@ def get_conversation_stats() -> str:
         </div>
         """
     
-    total = len(history)
-    with_feedback = sum(1 for h in history if h.feedback)
-    positive = sum(1 for h in history if h.feedback == 'positive')
-    negative = sum(1 for h in history if h.feedback == 'negative')
-    
-    # Calculate tool usage statistics
-    all_tools = []
-    for h in history:
-        all_tools.extend(h.tools_used)
+    total = len(columns)
+    feedback_counts = columns.feedback_counts()
+    with_feedback = total - feedback_counts[None]
+    positive = feedback_counts.get('positive', 0)
+    negative = feedback_counts.get('negative', 0)
     
+    # Calculate tool usage statistics (vectorized over the columnar history)
     from collections import Counter
-    tool_counts = Counter(all_tools)
+    tool_counts = Counter({tool: count for tool, count in columns.tool_counts().items() if count})
     most_used_tool = tool_counts.most_common(1)[0] if tool_counts else ("None", 0)
     
     # Satisfaction rate
@@ -630,10 +758,28 @@ def get_conversation_stats() -> str:
 def get_live_system_status():
     """Get live system status."""
     timestamp = datetime.now().strftime("%H:%M:%S")
+    if not _rag_ready.is_set():
+        return f"""
+    <div style="padding: 1rem; background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%); border-radius: 8px; color: white;">
+        <h4 style="margin: 0;">🟡 System Status: <strong>WARMING UP</strong></h4>
+        <p style="margin: 0.5rem 0 0 0; font-size: 0.9rem; opacity: 0.9;">
+            Loading models, tools and history • Last updated: {timestamp}
+        </p>
+    </div>
+    """
+    status = get_rag_system().get_system_status()
+    document = status['document'] or 'none'
+    unavailable = status.get('unavailable_tools')
+    tools_note = f" • 🔌 unavailable: {', '.join(unavailable)}" if unavailable else ""
     return f"""
     <div style="padding: 1rem; background: linear-gradient(135deg, #10b981 0%, #059669 100%); border-radius: 8px; color: white;">
         <h4 style="margin: 0;">🟢 System Status: <strong>ONLINE</strong></h4>
         <p style="margin: 0.5rem 0 0 0; font-size: 0.9rem; opacity: 0.9;">
+            📄 {document} ({status['index_vectors']} vectors) •
+            💬 {status['history_total']} interactions ({status['history_hot']} recent) •
+            👥 {status['active_sessions']} sessions{tools_note}
+        </p>
+        <p style="margin: 0.25rem 0 0 0; font-size: 0.9rem; opacity: 0.9;">
             Last updated: {timestamp}
         </p>
     </div>
@@ -684,7 +830,7 @@ def create_ui():
         
         # System Status
         with gr.Row():
-            system_status = gr.HTML(value=get_live_system_status())
+            system_status = gr.HTML(value=get_live_system_status)
         
         # Document Upload Section
         with gr.Tab("📄 Document Upload"):
@@ -716,9 +862,11 @@ def create_ui():
             """)
             
             process_btn.click(
-                fn=process_pdf_ui,
+                fn=in_lane("ingest", process_pdf_ui),
                 inputs=[pdf_input],
-                outputs=[status_output]
+                outputs=[status_output],
+                concurrency_limit=None,
+                concurrency_id="ingest"
             )
         
         # Chat Section
@@ -752,6 +900,7 @@ def create_ui():
                         clear_btn = gr.Button("🗑️ Clear Chat", size="sm", variant="secondary")
                         export_btn = gr.Button("📥 Export Logs", size="sm", variant="secondary")
                         load_history_btn = gr.Button("📂 Load History", size="sm", variant="primary")
+                        older_btn = gr.Button("⬆️ Load Older", size="sm", variant="secondary", interactive=False)
                         refresh_btn = gr.Button("🔄 Refresh Stats", size="sm", variant="secondary")
                     
                     # Hidden state
@@ -794,8 +943,8 @@ def create_ui():
             """)
             
             # Chat interaction
-            def chat_wrapper(message, history):
-                new_history, metadata = chat_ui(message, history)
+            def chat_wrapper(message, request: gr.Request):
+                new_history, metadata = chat_ui(message, request.session_hash)
                 reasoning = display_agent_reasoning(metadata)
                 sources = display_sources(metadata)
                 conv_id = metadata.get('conversation_id', -1)
@@ -803,19 +952,23 @@ def create_ui():
                 return new_history, reasoning, sources, conv_id, metadata, status
             
             send_btn.click(
-                fn=chat_wrapper,
-                inputs=[msg, chatbot],
-                outputs=[chatbot, reasoning_output, sources_output, conv_id_state, metadata_state, system_status]
-            ).then(
+                fn=in_lane("chat", chat_wrapper),
+                inputs=[msg],
+                outputs=[chatbot, reasoning_output, sources_output, conv_id_state, metadata_state, system_status],
+                concurrency_limit=None,
+                concurrency_id="chat"
+            ).success(
                 lambda: "",
                 outputs=[msg]
             )
             
             msg.submit(
-                fn=chat_wrapper,
-                inputs=[msg, chatbot],
-                outputs=[chatbot, reasoning_output, sources_output, conv_id_state, metadata_state, system_status]
-            ).then(
+                fn=in_lane("chat", chat_wrapper),
+                inputs=[msg],
+                outputs=[chatbot, reasoning_output, sources_output, conv_id_state, metadata_state, system_status],
+                concurrency_limit=None,
+                concurrency_id="chat"
+            ).success(
                 lambda: "",
                 outputs=[msg]
             )
@@ -834,19 +987,32 @@ def create_ui():
             )
             
             # Utility buttons
+            def clear_wrapper(request: gr.Request):
+                sessions.open(request.session_hash, [], None)
+                return [], clear_memory_ui(), "", "", gr.update(interactive=False)
+
             clear_btn.click(
-                fn=lambda: ([], clear_memory_ui(), "", ""),
-                outputs=[chatbot, feedback_status, reasoning_output, sources_output]
+                fn=in_lane("admin", clear_wrapper),
+                outputs=[chatbot, feedback_status, reasoning_output, sources_output, older_btn],
+                concurrency_limit=None,
+                concurrency_id="admin"
             )
             
             export_btn.click(
-                fn=export_logs_ui,
-                outputs=[feedback_status]
+                fn=in_lane("admin", export_logs_ui),
+                outputs=[feedback_status],
+                concurrency_limit=None,
+                concurrency_id="admin"
             )
             
             load_history_btn.click(
                 fn=load_conversation_history,
-                outputs=[chatbot, feedback_status]
+                outputs=[chatbot, feedback_status, older_btn]
+            )
+
+            older_btn.click(
+                fn=load_older_turns,
+                outputs=[chatbot, older_btn]
             )
             
             refresh_btn.click(
@@ -866,8 +1032,10 @@ def create_ui():
             stats_output = gr.HTML(value=get_conversation_stats())
             
             stats_btn.click(
-                fn=get_conversation_stats,
-                outputs=[stats_output]
+                fn=in_lane("admin", get_conversation_stats),
+                outputs=[stats_output],
+                concurrency_limit=None,
+                concurrency_id="admin"
             )
             
             gr.Markdown("""
@@ -915,10 +1083,11 @@ def create_ui():
                 <ul>
                     <li>✅ Previous conversations are <strong>automatically loaded</strong> when you open the UI</li>
                     <li>✅ Click <strong>"📂 Load History"</strong> button to manually reload at any time</li>
+                    <li>✅ Click <strong>"⬆️ Load Older"</strong> to page further back through earlier conversations</li>
                     <li>✅ All interactions are saved to disk every 5 messages</li>
                     <li>✅ Continue where you left off - no data loss!</li>
                 </ul>
-                <p style="margin-top: 1rem;"><em>💡 Tip: The system loads the last 50 conversations automatically. Use "🗑️ Clear Chat" to start fresh if needed.</em></p>
+                <p style="margin-top: 1rem;"><em>💡 Tip: The system loads the most recent conversations automatically. Use "🗑️ Clear Chat" to start fresh if needed.</em></p>
             </div>
             
             ### 🤖 Understanding the Agent Loop
@@ -986,23 +1155,66 @@ def create_ui():
         </div>
         """)
         
-        # Auto-load conversation history when the interface loads
+        # Auto-load conversation history when the interface loads (waits for warm-up)
         demo.load(
             fn=load_conversation_history,
-            outputs=[chatbot, feedback_status]
+            outputs=[chatbot, feedback_status, older_btn]
+        ).then(
+            fn=get_live_system_status,
+            outputs=[system_status]
         )
-    
+
+        # Track open sessions for the metrics endpoint
+        def session_ended(request: gr.Request):
+            sessions.drop(request.session_hash)
+            metrics.session_ended()
+
+        demo.load(fn=metrics.session_started)
+        demo.unload(session_ended)
+
+    # Lane handlers limit themselves (concurrency_limit=None); everything else
+    # (feedback, history paging, status) shares the default limit per event
+    demo.queue(default_concurrency_limit=settings.ui_default_concurrency)
     return demo
 
 
 
+def create_app():
+    """The UI mounted on FastAPI, plus /health and /ready probes for the worker launcher."""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/ready")
+    def ready():
+        # in_flight lets the launcher drain a worker before restarting it
+        if not _rag_ready.is_set():
+            return JSONResponse({"status": "warming up"}, status_code=503)
+        if _rag_error is not None:
+            return JSONResponse({"status": "failed", "error": str(_rag_error)}, status_code=503)
+        return {"status": "ready", "in_flight": metrics.requests_in_flight()}
+
+    demo = create_ui()
+    # Every running or waiting lane request holds a queue worker thread; size the
+    # pool like Blocks.launch(max_threads=...) would, with headroom for other events
+    demo.max_threads = sum(gate.concurrency + gate.max_waiting for gate in lanes.values()) + 40
+    demo._queue.max_thread_count = demo.max_threads
+    return gr.mount_gradio_app(app, demo, path="/", show_error=True)
+
+
 # Launch with enhanced settings
 if __name__ == "__main__":
-    demo = create_ui()
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7819,
-        share=False,
-        show_error=True,
-        inbrowser=True
-    )
+    import uvicorn
+    import webbrowser
+
+    metrics.start_metrics_server(settings.metrics_port)
+    start_warm_up()
+    app = create_app()
+    if settings.ui_open_browser:
+        threading.Timer(2.0, webbrowser.open, [f"http://127.0.0.1:{settings.ui_port}"]).start()
+    uvicorn.run(app, host=settings.ui_host, port=settings.ui_port, log_level="warning")
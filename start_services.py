@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 """
 Script to start both backend and frontend services for the AI Code Generator.
+
+With --workers N (or WORKERS) above 1, runs N app processes behind a sticky
+TCP load balancer on the public port; `kill -HUP <launcher pid>` rolls a
+restart through the workers without dropping in-flight chats.
 """
 
+import argparse
+import asyncio
+import os
+import signal
 import subprocess
 import sys
 from pathlib import Path
@@ -43,8 +51,62 @@ def start_frontend():
     return frontend_process
 
 
+async def run_workers(app: str, workers: int):
+    """Supervise N workers behind the load balancer until SIGINT/SIGTERM."""
+    from backend.config.settings import settings
+    from backend.services.load_balancer import StickyLoadBalancer
+    from backend.services.worker_supervisor import WorkerSupervisor
+
+    if app == "api":
+        command, port_env = [sys.executable, "-m", "backend.api.server"], ("API_HOST", "API_PORT")
+        host, port = settings.api_host, settings.api_port
+    else:
+        command, port_env = [sys.executable, "frontend/app.py"], ("UI_HOST", "UI_PORT")
+        host, port = settings.ui_host, settings.ui_port
+
+    # Each worker exposes its own /metrics on the next ports after METRICS_PORT
+    supervisor = WorkerSupervisor(
+        command,
+        port_env,
+        workers=workers,
+        base_port=settings.worker_base_port,
+        health_interval=settings.worker_health_interval,
+        drain_timeout=settings.worker_drain_timeout,
+        extra_env={"UI_OPEN_BROWSER": "false", "PYTHONPATH": os.getcwd()}
+    )
+    for worker in supervisor.workers:
+        worker.env["METRICS_PORT"] = str(settings.metrics_port + 1 + worker.index if settings.metrics_port > 0 else 0)
+
+    balancer = StickyLoadBalancer(supervisor.backends, host, port)
+    supervisor.start()
+    await balancer.start()
+    print(f"{app.upper()}: http://127.0.0.1:{port} ({workers} workers)")
+    print(f"Rolling restart: kill -HUP {os.getpid()}")
+    print("\nPress Ctrl+C to stop  services")
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(supervisor.rolling_restart()))
+
+    monitor = asyncio.ensure_future(supervisor.monitor())
+    await stop.wait()
+
+    print("\n🛑 Stopping services...")
+    await balancer.stop()
+    await supervisor.shutdown()
+    monitor.cancel()
+    print("Services stopped successfully!")
+
+
 def main():
     """Main function to start both services."""
+    parser = argparse.ArgumentParser(description="Start the chat bot services")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: WORKERS, 1 = single process)")
+    parser.add_argument("--app", choices=["ui", "api"], default="ui", help="What each worker runs")
+    args = parser.parse_args()
+
     print("AI Chat Bot - Service Starter")
     print("=" * 50)
 
@@ -57,11 +119,17 @@ def main():
 
     # Load variables from .env file
     load_dotenv()
-    
+
+    from backend.config.settings import settings
+    workers = args.workers if args.workers is not None else settings.workers
+    if workers > 1 or args.app == "api":
+        asyncio.run(run_workers(args.app, max(1, workers)))
+        return
+
     try:
         # Start frontend
         frontend_process = start_frontend()
-        print("Frontend UI: http://127.0.0.1:7819")
+        print(f"Frontend UI: http://127.0.0.1:{settings.ui_port}")
         print("\nPress Ctrl+C to stop  services")
         
         # Wait for processes
@@ -0,0 +1,35 @@
+from backend.services.calculator_engine import Limits, evaluate_to_text
+
+
+def result(expression):
+    ok, text = evaluate_to_text(expression)
+    assert ok, text
+    return text
+
+
+def test_integer_ranges_and_lists_stay_integral():
+    assert result("sum(range(1,101))") == "5050"
+    assert result("min([1,2])") == "1"
+    assert result("[1,2,3]*2") == "[2, 4, 6]"
+    assert result("sum(range(1,101))*10**50") == "505" + "0" * 51
+
+
+def test_mixed_and_fractional_inputs_stay_float():
+    assert result("max([1, 2.5])") == "2.5"
+    assert result("range(0, 1, 0.25)") == "[0, 0.25, 0.5, 0.75]"
+    assert result("mean([1,2,3,4])") == "2.5"
+    assert result("[2,3]**-1") == "[0.5, 0.333333]"
+
+
+def test_integer_arrays_do_not_wrap_around():
+    assert result("sum([2**61, 2**61, 2**61])") == str(3 * 2 ** 61)
+    assert result("[2**40, 3]*[2**40, 1]") == "[1.20893e+24, 3]"
+    assert result("[2,3]**70") == "[1.18059e+21, 2.50316e+33]"
+
+
+def test_nested_lists_count_every_element():
+    limits = Limits(max_elements=1000)
+    ok, text = evaluate_to_text("[range(600), range(600)]", limits)
+    assert not ok and "1000 elements" in text
+    ok, text = evaluate_to_text("sum([range(400), range(400), 5])", limits)
+    assert ok and text == str(2 * sum(range(400)) + 5)
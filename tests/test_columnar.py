@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from backend.models.columnar import InteractionColumns
+from backend.models.schemas import InteractionLog
+
+
+TOOLS = [["Calculator"], [], ["DocumentSearch", "Calculator"], ["WebSearch"], ["Calculator", "WebSearch"]]
+FEEDBACK = [None, "positive", "negative", "positive", None]
+
+
+def history(count=len(TOOLS)):
+    for i in range(count):
+        yield 100 + i, InteractionLog(
+            timestamp=f"2026-10-{1 + i % 28:02d}T12:00:00.250000",
+            query=f"question {i}",
+            response="answer " * (i % 5),
+            agent_steps=[{"tool": tool} for tool in TOOLS[i % len(TOOLS)]],
+            tools_used=list(TOOLS[i % len(TOOLS)]),
+            feedback=FEEDBACK[i % len(FEEDBACK)]
+        )
+
+
+def test_records_round_trip():
+    columns = InteractionColumns.from_history(history())
+    for row, (index, interaction) in enumerate(history()):
+        record = columns.record(row)
+        assert record.index == index
+        assert record.timestamp == interaction.timestamp
+        assert record.query == interaction.query
+        assert record.response == interaction.response
+        assert set(record.tools_used) == set(interaction.tools_used)
+        assert record.feedback == interaction.feedback
+        assert record.num_steps == len(interaction.agent_steps)
+    with pytest.raises(IndexError):
+        columns.record(len(columns))
+
+
+def test_tool_bitmask_and_counts():
+    columns = InteractionColumns.from_history(history())
+    assert columns.tool_column("Calculator").tolist() == [True, False, True, False, True]
+    assert columns.tool_column("Unknown").tolist() == [False] * 5
+    assert columns.tool_counts() == {"Calculator": 3, "DocumentSearch": 1, "WebSearch": 2}
+
+
+def test_feedback_codes_and_counts_include_no_feedback():
+    columns = InteractionColumns.from_history(history())
+    assert columns.feedback.dtype == np.int8
+    assert columns.feedback[:len(columns)].tolist() == [-1, 0, 1, 0, -1]
+    assert columns.feedback_counts() == {"positive": 2, "negative": 1, None: 2}
+    assert InteractionColumns().feedback_counts() == {None: 0}
+
+
+def test_columns_grow_past_their_capacity():
+    columns = InteractionColumns.from_history(history(40))
+    assert len(columns) == 40
+    assert columns.index[:40].tolist() == list(range(100, 140))
+    assert columns.tool_counts()["Calculator"] == 24
+    assert columns.feedback_counts()[None] == 16
+
+
+def test_too_many_tools():
+    columns = InteractionColumns()
+    for i in range(InteractionColumns.MAX_TOOLS):
+        columns.append(i, InteractionLog("2026-10-01T00:00:00", "q", "r", [], [f"tool{i}"]))
+    with pytest.raises(ValueError):
+        columns.append(64, InteractionLog("2026-10-01T00:00:00", "q", "r", [], ["one too many"]))
+
+
+def test_to_pandas():
+    columns = InteractionColumns.from_history(history())
+    frame = columns.to_pandas()
+
+    assert len(frame) == 5
+    assert frame["index"].tolist() == [100, 101, 102, 103, 104]
+    assert frame["feedback"].isna().tolist() == [True, False, False, False, True]  # code -1
+    assert frame["feedback"].value_counts().to_dict() == {"positive": 2, "negative": 1}
+    assert frame["tool_Calculator"].tolist() == [True, False, True, False, True]
+    assert frame["num_steps"].tolist() == [1, 0, 2, 1, 2]
+    assert frame["query"].tolist() == [f"question {i}" for i in range(5)]
+    assert str(frame["timestamp"].iloc[0]) == "2026-10-01 12:00:00.250000"
+
+    assert "query" not in InteractionColumns.from_history(history(), keep_text=False).to_pandas()
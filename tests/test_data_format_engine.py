@@ -0,0 +1,16 @@
+import pytest
+
+from backend.services.data_format_engine import detect_format
+
+
+@pytest.mark.parametrize("data, kind", [
+    ("milk, eggs\nbread, butter", "list"),
+    ("name,city\nalice,paris", "list"),
+    ("apples\npears", "list"),
+    ("name,age\nalice,30", "table"),
+    ("milk, eggs\nbread, butter\njam, tea", "table"),
+    ("a\tb\n1\t2\n3\t4", "table"),
+    ('[{"a": 1}]', "json"),
+])
+def test_detect_format(data, kind):
+    assert detect_format(data) == kind
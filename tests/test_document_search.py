@@ -0,0 +1,59 @@
+from langchain_community.vectorstores import FAISS
+
+from backend.services.model_backends import HashEmbeddings
+from backend.services.tool_document_search import DocumentSearchTool
+
+
+class QueryOnlyEmbeddings(HashEmbeddings):
+    """Counts how queries are embedded; search must never go through embed_documents."""
+
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.query_calls = 0
+        self.indexing = True
+
+    def embed_documents(self, texts):
+        assert self.indexing, "queries must be embedded with embed_query"
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+class CountingIndex:
+    """FAISS index proxy that counts search calls."""
+
+    def __init__(self, index):
+        self.index = index
+        self.searches = 0
+
+    def search(self, vectors, k):
+        self.searches += 1
+        return self.index.search(vectors, k)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+def test_batch_matches_single_searches():
+    embeddings = QueryOnlyEmbeddings()
+    texts = ["pricing starts at ten dollars", "the ceo is jane doe", "offices in berlin and paris", "refunds within thirty days"]
+    store = FAISS.from_texts(texts, embeddings, metadatas=[{"page": i} for i in range(len(texts))])
+    embeddings.indexing = False
+    tool = DocumentSearchTool(store)
+
+    queries = ["pricing", "who is the ceo", "refunds"]
+    singles = [tool.search(query) for query in queries]
+    embeddings.query_calls = 0
+    store.index = CountingIndex(store.index)
+    batch = tool.search_batch(queries)
+
+    assert embeddings.query_calls == len(queries)
+    assert store.index.searches == 1
+    assert batch == singles
+    assert "Page 1" in batch[1].split("\n")[0]
+
+
+def test_batch_without_document():
+    assert DocumentSearchTool().search_batch(["a", "b"]) == ["No document has been uploaded yet. Please upload a PDF first."] * 2
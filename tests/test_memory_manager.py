@@ -0,0 +1,33 @@
+from backend.config.settings import settings
+from backend.services.memory_manager import MemoryManager
+
+
+def test_iteration_survives_a_compaction_in_between(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "history_page_size", 5)
+    memory = MemoryManager(str(tmp_path), hot_limit=10, segment_size=5)
+    for i in range(30):
+        memory.add_interaction(f"q{i}", "r", [], [])
+
+    history = memory.iter_history()
+    seen = [next(history) for _ in range(25)]  # into the hot tier
+    for i in range(30, 50):
+        memory.add_interaction(f"q{i}", "r", [], [])  # archives the pages being read
+    seen.extend(history)
+
+    assert [index for index, _ in seen] == list(range(30))
+    assert [interaction.query for _, interaction in seen] == [f"q{i}" for i in range(30)]
+    assert [index for index, _ in memory.iter_history()] == list(range(50))
+
+
+def test_interaction_is_saved_once_with_its_trace(tmp_path, monkeypatch):
+    memory = MemoryManager(str(tmp_path), hot_limit=10, segment_size=5)
+    saves = []
+    save = memory._save_memory
+    monkeypatch.setattr(memory, "_save_memory", lambda: (saves.append(1), save())[1])
+
+    trace = {"trace_id": "t1", "summary": {"duration_ms": 12.5}, "root": {"name": "chat", "children": []}}
+    index = memory.add_interaction("q", "r", [], [], trace=trace)
+
+    assert len(saves) == 1
+    assert MemoryManager(str(tmp_path)).get_recent(1)[0].trace == trace
+    assert index == 0
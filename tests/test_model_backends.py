@@ -0,0 +1,28 @@
+import sys
+
+import pytest
+
+from backend.config.settings import settings
+from backend.services.model_backends import create_embeddings, create_local_embeddings
+
+
+def test_missing_sentence_transformers_fails_instead_of_hashing(monkeypatch):
+    monkeypatch.setattr(settings, "local_embedding_model", "sentence-transformers/all-MiniLM-L6-v2")
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)  # import raises ImportError
+    with pytest.raises(RuntimeError, match="LOCAL_EMBEDDING_MODEL=hash"):
+        create_local_embeddings()
+
+
+def test_hash_must_be_chosen_explicitly(monkeypatch):
+    monkeypatch.setattr(settings, "local_embedding_model", "hash")
+    monkeypatch.setattr(settings, "local_embedding_dimensions", 32)
+    embeddings = create_local_embeddings()
+    assert embeddings.namespace == "hash-32"
+    assert len(embeddings.embed_query("hello world")) == 32
+
+
+@pytest.mark.parametrize("scheduler, retries", [("auto", 0), ("on", 0), ("off", 2)])
+def test_openai_embeddings_leave_retries_to_the_scheduler(monkeypatch, scheduler, retries):
+    monkeypatch.setenv("OPENAI_API_KEY", "stand-in")
+    monkeypatch.setattr(settings, "embedding_scheduler", scheduler)
+    assert create_embeddings("openai").max_retries == retries
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import Tool
+
+from backend.services import deadline
+from backend.services.query_planner import QueryPlanner, is_multi_part
+from backend.services.tool_executor import ToolUnavailable
+
+
+@pytest.mark.parametrize("query", [
+    "What are the pros and cons of the plan?",
+    "Summarize the report, please",
+    "Tell me about cats and dogs",
+    "How much does each plan cost?",
+])
+def test_single_part_questions_skip_planning(query):
+    assert not is_multi_part(query)
+
+
+@pytest.mark.parametrize("query", [
+    "What is 25*4 and what does the report say about pricing?",
+    "What is the price? Who is the CEO?",
+    "Compare the 2023 and 2024 revenue",
+    "Python vs Java",
+])
+def test_multi_part_questions_are_planned(query):
+    assert is_multi_part(query)
+
+
+class RecordingLLM:
+    """Returns a fixed plan, then a fixed answer, and keeps every prompt."""
+
+    def __init__(self, plan):
+        self.replies = [plan, "combined answer"]
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=self.replies[len(self.prompts) - 1])
+
+
+def test_plan_and_synthesis_see_the_conversation():
+    llm = RecordingLLM('[{"tool": "Calculator", "input": "2*21"}, {"tool": "DocumentSearch", "input": "Acme pricing"}]')
+    tools = {
+        "Calculator": Tool(name="Calculator", func=lambda expression: "42", description="Evaluates math"),
+        "DocumentSearch": Tool(name="DocumentSearch", func=lambda query: "", description="Searches the document"),
+    }
+    planner = QueryPlanner(llm, tools, lambda queries: [f"page 3: {q}" for q in queries])
+    history = [HumanMessage(content="Which vendor did we pick?"), AIMessage(content="Acme.")]
+
+    query = "What is 2*21 and what does it cost?"
+    parts = planner.plan(query, history)
+    result = planner.run(query, parts, history)
+
+    assert parts == [("Calculator", "2*21"), ("DocumentSearch", "Acme pricing")]
+    assert result["output"] == "combined answer"
+    for prompt in llm.prompts:
+        assert "User: Which vendor did we pick?\nAssistant: Acme." in prompt
+
+
+def test_sub_queries_do_not_need_the_shared_deadline_pool():
+    # Fill every deadline-pool thread: sub-queries must still run (their LLM calls queue there)
+    release = threading.Event()
+    blockers = [deadline._timeout_pool.submit(release.wait) for _ in range(deadline._timeout_pool._max_workers)]
+    try:
+        tools = {"Calculator": Tool(name="Calculator", func=lambda e: threading.current_thread().name, description="Math")}
+        planner = QueryPlanner(RecordingLLM("[]"), tools, lambda queries: [], workers=2)
+        observations = planner._execute([("Calculator", "1+1"), ("Calculator", "2+2")])
+    finally:
+        release.set()
+        wait(blockers)
+    assert all(name.startswith("planner") for name in observations)
+
+
+def test_refused_batch_search_answers_every_search_part():
+    refused = ToolUnavailable("DocumentSearch is temporarily unavailable")
+    planner = QueryPlanner(RecordingLLM("[]"), {}, lambda queries: refused)
+    assert planner._execute([("DocumentSearch", "a"), ("DocumentSearch", "b")]) == [refused, refused]
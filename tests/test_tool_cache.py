@@ -0,0 +1,112 @@
+from backend.services import tool_cache
+from backend.services.tool_cache import ToolResultCache
+from backend.services.tool_executor import ToolUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StandInTool:
+    """Local tool that counts its calls and can be switched into an error mode."""
+
+    def __init__(self):
+        self.calls = 0
+        self.result = None
+
+    def run(self, query):
+        self.calls += 1
+        if self.result is not None:
+            return self.result
+        return f"results for {query}"
+
+
+def test_hits_and_misses_are_counted_per_tool():
+    cache = ToolResultCache(ttls={"WebSearch": 60})
+    tool = StandInTool()
+    search = cache.wrap("WebSearch", tool.run)
+
+    assert search("Azure pricing") == "results for Azure pricing"
+    assert search("  azure   PRICING ") == "results for Azure pricing"
+    assert search("AWS pricing") == "results for AWS pricing"
+
+    assert tool.calls == 2
+    stats = cache.stats()["WebSearch"]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["hit_rate"] == 1 / 3
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tool_cache.time, "time", clock)
+    cache = ToolResultCache(ttls={"WebSearch": 60, "Wikipedia": 3600})
+    cache.put("WebSearch", "news", "old news")
+    cache.put("Wikipedia", "python", "article")
+
+    clock.now += 59
+    assert cache.get("WebSearch", "news") == (True, "old news")
+
+    clock.now += 2
+    assert cache.get("WebSearch", "news") == (False, None)
+    assert cache.get("Wikipedia", "python") == (True, "article")
+
+
+def test_tools_without_a_ttl_are_not_cached():
+    cache = ToolResultCache(ttls={"WebSearch": 60})
+    assert not cache.is_cached("Calculator")
+    cache.put("Calculator", "2+2", "4")
+    assert cache.get("Calculator", "2+2") == (False, None)
+
+
+def test_lru_bound_evicts_least_recently_used():
+    cache = ToolResultCache(ttls={"WebSearch": 60}, max_entries=2)
+    cache.put("WebSearch", "a", "A")
+    cache.put("WebSearch", "b", "B")
+    assert cache.get("WebSearch", "a")[0]  # a is now the most recently used
+
+    cache.put("WebSearch", "c", "C")
+    assert cache.get("WebSearch", "b") == (False, None)
+    assert cache.get("WebSearch", "a") == (True, "A")
+    assert cache.get("WebSearch", "c") == (True, "C")
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = tmp_path / "tool_cache.sqlite"
+    first = ToolResultCache(ttls={"Wikipedia": 3600}, persist_path=str(path))
+    first.put("Wikipedia", "Alan Turing", {"summary": "mathematician"})
+
+    second = ToolResultCache(ttls={"Wikipedia": 3600}, persist_path=str(path))
+    assert second.get("Wikipedia", "alan turing") == (True, {"summary": "mathematician"})
+
+
+def test_expired_entries_are_dropped_from_the_store(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tool_cache.time, "time", clock)
+    path = tmp_path / "tool_cache.sqlite"
+    ToolResultCache(ttls={"WebSearch": 60}, persist_path=str(path)).put("WebSearch", "news", "old news")
+
+    clock.now += 120
+    reopened = ToolResultCache(ttls={"WebSearch": 60}, persist_path=str(path))
+    assert reopened.get("WebSearch", "news") == (False, None)
+
+
+def test_failures_are_not_cached(tmp_path):
+    cache = ToolResultCache(ttls={"WebSearch": 900}, persist_path=str(tmp_path / "tool_cache.sqlite"))
+    tool = StandInTool()
+    search = cache.wrap("WebSearch", tool.run, is_error=lambda result: result.startswith("ConnectionError"))
+
+    tool.result = "ConnectionError('search backend down')"
+    search("news")
+    tool.result = ToolUnavailable("WebSearch did not respond within 15.0 seconds.")
+    search("news")
+    assert cache.stats()["WebSearch"]["entries"] == 0
+
+    # Once the backend recovers the next call goes through and is cached
+    tool.result = None
+    assert search("news") == "results for news"
+    assert search("news") == "results for news"
+    assert tool.calls == 3
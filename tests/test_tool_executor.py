@@ -0,0 +1,120 @@
+import time
+
+from backend.services.tool_executor import CircuitBreaker, ToolExecutor, ToolPolicy, ToolUnavailable
+
+
+class FlakySearch:
+    """Stand-in for a tool that catches its own errors and returns them as text (like Tavily)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = True
+
+    def run(self, query):
+        self.calls += 1
+        if self.failing:
+            return "ConnectionError('search backend down')"
+        return [{"url": "https://example.com", "content": query}]
+
+
+def make_runner(tool, failures=3, reset=0.2):
+    executor = ToolExecutor(ToolPolicy(timeout=2, concurrency=2, failure_threshold=failures, reset_timeout=reset))
+    runner = executor.wrap("WebSearch", tool.run, is_error=lambda result: isinstance(result, str))
+    return executor, runner
+
+
+def test_error_results_open_the_breaker():
+    tool = FlakySearch()
+    executor, runner = make_runner(tool)
+    try:
+        for _ in range(3):
+            result = runner("latest news")
+            assert isinstance(result, ToolUnavailable)
+            assert "failed" in result
+        assert runner.breaker.state == CircuitBreaker.OPEN
+
+        # Open: rejected without calling the tool
+        result = runner("latest news")
+        assert isinstance(result, ToolUnavailable)
+        assert "temporarily unavailable" in result
+        assert tool.calls == 3
+        assert executor.status()["WebSearch"]["state"] == CircuitBreaker.OPEN
+    finally:
+        executor.shutdown()
+
+
+def test_half_open_probe_reopens_on_error_and_closes_on_success():
+    tool = FlakySearch()
+    executor, runner = make_runner(tool)
+    try:
+        for _ in range(3):
+            runner("q")
+        time.sleep(0.25)
+
+        # Half-open: one probe goes through, still failing, so the breaker re-opens
+        assert isinstance(runner("q"), ToolUnavailable)
+        assert tool.calls == 4
+        assert runner.breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.25)
+        tool.failing = False
+        assert runner.breaker.allow()
+        assert runner.breaker.state == CircuitBreaker.HALF_OPEN
+        runner.breaker.release_probe()
+
+        result = runner("q")
+        assert result == [{"url": "https://example.com", "content": "q"}]
+        assert runner.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        executor.shutdown()
+
+
+def test_successful_results_do_not_count_as_errors():
+    tool = FlakySearch()
+    tool.failing = False
+    executor, runner = make_runner(tool, failures=1)
+    try:
+        for _ in range(5):
+            assert isinstance(runner("q"), list)
+        assert runner.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        executor.shutdown()
+
+
+def test_raised_exceptions_and_timeouts_count_as_failures():
+    executor = ToolExecutor(ToolPolicy(timeout=0.05, concurrency=2, failure_threshold=2, reset_timeout=30))
+
+    def broken(query):
+        raise RuntimeError("boom")
+
+    def slow(query):
+        time.sleep(0.2)
+        return "late"
+
+    try:
+        failing = executor.wrap("Broken", broken)
+        assert "boom" in failing("x")
+        failing("x")
+        assert failing.breaker.state == CircuitBreaker.OPEN
+
+        hanging = executor.wrap("Slow", slow)
+        assert "did not respond" in hanging("x")
+    finally:
+        executor.shutdown()
+
+
+def test_batched_variant_shares_the_breaker():
+    executor = ToolExecutor(ToolPolicy(timeout=2, concurrency=2, failure_threshold=2, reset_timeout=30))
+    runner = executor.wrap("DocumentSearch", lambda query: f"results for {query}")
+
+    def failing_batch(queries):
+        raise ConnectionError("index unavailable")
+
+    try:
+        assert runner.call(lambda queries: [f"results for {q}" for q in queries], ["a", "b"]) == ["results for a", "results for b"]
+        for _ in range(2):
+            assert isinstance(runner.call(failing_batch, ["a"]), ToolUnavailable)
+        assert runner.breaker.state == CircuitBreaker.OPEN
+        assert "temporarily unavailable" in runner("a")
+    finally:
+        executor.shutdown()